@@ -5,7 +5,7 @@ from __future__ import annotations
 from typing import List, Optional, Iterable, Tuple, Dict, Any
 from abc import ABC, abstractmethod
 
-from .models import Usuario, Tienda, Producto, Empleado
+from .models import Usuario, Tienda, TiendaDetalle, Producto, Empleado, EmpleadoDetalle, LineaMovimiento
 
 
 class RepoUsuarios(ABC):
@@ -21,6 +21,9 @@ class RepoUsuarios(ABC):
     @abstractmethod
     def obtener_usuario_por_id(self, usuario_id: int) -> Optional[Usuario]: ...
 
+    @abstractmethod
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Usuario]: ...
+
 
 class RepoEmpleados(ABC):
     @abstractmethod
@@ -28,12 +31,21 @@ class RepoEmpleados(ABC):
     
     @abstractmethod
     def listar_empleados(self) -> List[Empleado]: ...
+
+    @abstractmethod
+    def listar_empleados_detalle(self, tienda_id: Optional[int] = None) -> List[EmpleadoDetalle]: ...
+
+    @abstractmethod
+    def buscar_empleados(self, q: str) -> List[Empleado]: ...
     
     @abstractmethod
     def obtener_empleado_por_usuario(self, usuario_id: int) -> Optional[Empleado]: ...
     
     @abstractmethod
     def obtener_empleado_por_id(self, empleado_id: int) -> Optional[Empleado]: ...
+
+    @abstractmethod
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Empleado]: ...
     
     @abstractmethod
     def actualizar_empleado(self, empleado_id: int, nombres: str, apellidos: str, dni: str, jornada: str, tienda_id: int) -> bool: ...
@@ -50,6 +62,15 @@ class RepoTiendas(ABC):
 
     @abstractmethod
     def listar_tiendas(self) -> List[Tienda]: ...
+
+    @abstractmethod
+    def listar_tiendas_detalle(self) -> List[TiendaDetalle]: ...
+
+    @abstractmethod
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Tienda]: ...
+
+    @abstractmethod
+    def buscar_tiendas(self, q: str) -> List[Tienda]: ...
     
     @abstractmethod
     def actualizar_tienda(self, tienda_id: int, nombre: str, direccion: Optional[str] = None,
@@ -70,6 +91,9 @@ class RepoProductos(ABC):
 
     @abstractmethod
     def listar_productos(self, q: str = "") -> List[Producto]: ...
+
+    @abstractmethod
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Producto]: ...
     
     @abstractmethod
     def actualizar_producto(self, producto_id: int, sku: str, nombre: str, descripcion: Optional[str], 
@@ -90,14 +114,58 @@ class RepoInventario(ABC):
     @abstractmethod
     def ajustar_stock(self, tienda_id: int, producto_id: int, delta: float, usuario_id: int, nota: Optional[str] = None) -> None: ...
 
+    @abstractmethod
+    def ajustar_stock_lote(self, lineas: List[LineaMovimiento], usuario_id: int) -> List[Dict[str, Any]]: ...
+
     @abstractmethod
     def obtener_stock(self, tienda_id: int, producto_id: int) -> Tuple[float, float]: ...
 
     @abstractmethod
     def reporte_stock(self, tienda_id: int) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def obtener_alertas(self, tienda_id: Optional[int] = None) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def obtener_transiciones_stock(self, tienda_id: Optional[int] = None, limit: int = 200) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def resumen_movimientos(self, desde: str, hasta: str, tienda_id: Optional[int] = None,
+                            producto_id: Optional[int] = None, por_dia: bool = False) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def reconstruir_resumen_diario(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> int: ...
+
+    @abstractmethod
+    def tomar_snapshot_stock(self) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def ultimo_snapshot_stock(self) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def stock_al(self, limite: int, tienda_id: Optional[int] = None,
+                 estados: Optional[Iterable[str]] = None, texto: str = "") -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def saldo_al(self, tienda_id: int, producto_id: int, limite: int) -> float: ...
+
+    @abstractmethod
+    def kardex(self, tienda_id: int, producto_id: int, desde: int, hasta: int, saldo_inicial: float,
+               cursor: Optional[Tuple[Any, int]] = None, limit: int = 500) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def consultar_reporte_stock(self, tienda_id: Optional[int] = None,
+                                estados: Optional[Iterable[str]] = None, texto: str = "",
+                                orden: str = "tienda", limit: Optional[int] = None) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def valorizacion(self, agrupar_por: Iterable[str] = ("tienda", "categoria", "proveedor"),
+                     tienda_id: Optional[int] = None) -> List[Dict[str, Any]]: ...
     
     @abstractmethod
-    def obtener_movimientos(self, tienda_id: Optional[int], limit: int) -> List[Dict[str, Any]]: ...
+    def obtener_movimientos(self, tienda_id: Optional[int], limit: int,
+                            cursor: Optional[Tuple[Any, int]] = None,
+                            historico: bool = False) -> List[Dict[str, Any]]: ...
 
 
 class Reporte(ABC):
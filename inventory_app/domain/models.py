@@ -24,6 +24,14 @@ class Tienda:
     responsable_id: Optional[int] = None
 
 
+@dataclass
+class TiendaDetalle(Tienda):
+    """Tienda con el nombre de su responsable y sus totales, para listados"""
+    responsable_nombre: Optional[str] = None
+    empleados: int = 0
+    productos: int = 0
+
+
 @dataclass
 class Producto:
     id: int
@@ -47,4 +55,21 @@ class Empleado:
     apellidos: str
     dni: str
     jornada: str  # 'COMPLETA' | 'MEDIA' | 'PARCIAL'
-    tienda_id: int
\ No newline at end of file
+    tienda_id: int
+
+
+@dataclass
+class EmpleadoDetalle(Empleado):
+    """Empleado con los datos de su usuario y su tienda, para listados"""
+    username: Optional[str]
+    rol: Optional[str]
+    activo: bool
+    tienda_nombre: Optional[str]
+
+
+@dataclass
+class LineaMovimiento:
+    tienda_id: int
+    producto_id: int
+    delta: float  # positivo = INGRESO, negativo = SALIDA
+    nota: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,40 @@
+# ==============================
+# File: inventory_app/domain/tiempo.py
+# ==============================
+"""
+Marcas de tiempo de movimientos y fotos de stock: enteros en milisegundos
+desde la época Unix (UTC). Solo se convierten a texto al mostrarlas.
+"""
+from __future__ import annotations
+from datetime import date, datetime, timedelta, timezone
+import time
+
+MS_POR_DIA = 86_400_000
+
+
+def ahora_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def dia_ms(fecha: date | str) -> int:
+    """Inicio (00:00 UTC) del día ``fecha`` (date o 'AAAA-MM-DD')"""
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha[:10])
+    inicio = datetime(fecha.year, fecha.month, fecha.day, tzinfo=timezone.utc)
+    return int(inicio.timestamp()) * 1000
+
+
+def anio_ms(anio: int) -> int:
+    """Inicio del 1 de enero de ``anio``"""
+    return dia_ms(date(int(anio), 1, 1))
+
+
+def a_datetime(ms: int) -> datetime:
+    return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(milliseconds=ms)
+
+
+def formatear(ms: int | None, segundos: bool = False) -> str:
+    """'AAAA-MM-DD HH:MM' (o con segundos) en UTC; vacío si no hay marca"""
+    if ms is None:
+        return ""
+    return a_datetime(ms).strftime("%Y-%m-%d %H:%M:%S" if segundos else "%Y-%m-%d %H:%M")
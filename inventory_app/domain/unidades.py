@@ -0,0 +1,42 @@
+# ==============================
+# File: inventory_app/domain/unidades.py
+# ==============================
+"""
+Cantidades y precios en punto fijo.
+
+En la base las cantidades se guardan como enteros en milésimas de unidad y los
+precios en centavos: sumas y saldos son exactos. Fuera de los repositorios se
+siguen usando números decimales (float).
+"""
+from __future__ import annotations
+from decimal import ROUND_HALF_UP, Decimal
+
+MILESIMAS = 1000
+CENTAVOS = 100
+
+
+def _a_entero(valor: float | int | str, escala: int) -> int:
+    return int((Decimal(str(valor)) * escala).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def a_milesimas(cantidad: float | int | str) -> int:
+    """1.5 -> 1500"""
+    return _a_entero(cantidad, MILESIMAS)
+
+
+def de_milesimas(valor: int) -> float:
+    return valor / MILESIMAS
+
+
+def a_centavos(precio: float | int | str) -> int:
+    """12.99 -> 1299"""
+    return _a_entero(precio, CENTAVOS)
+
+
+def de_centavos(valor: int) -> float:
+    return valor / CENTAVOS
+
+
+def de_importe(valor: int) -> float:
+    """Σ cantidad × precio en la base (milésimas × centavos) -> importe redondeado al centavo"""
+    return de_centavos((valor + MILESIMAS // 2) // MILESIMAS)
@@ -0,0 +1,191 @@
+# ==============================
+# File: inventory_app/infra/archivo.py
+# ==============================
+"""
+Archivo histórico de movimientos en bases anuales.
+
+Los años cerrados se mueven de ``movimientos`` a archivos SQLite separados
+(``inventario_2023.db``, ...) registrados en ``archivos_movimientos``. La base
+principal queda solo con el período vigente; las consultas históricas adjuntan
+los archivos con ``ATTACH`` y leen la vista temporal ``movimientos_historico``
+(principal + archivos).
+
+El traspaso se hace en dos transacciones: primero se copia al archivo y luego
+se borra de la principal solo lo que ya está en el archivo, así que un corte
+en el medio se resuelve volviendo a ejecutar.
+
+Uso: ``python -m inventory_app.infra.archivo [--hasta-anio AAAA] [--dry-run] [--vacuum]``
+"""
+from __future__ import annotations
+from datetime import date
+from typing import List, Optional, Tuple
+import argparse
+import os
+import re
+import sqlite3
+
+from ..domain.tiempo import a_datetime, anio_ms
+
+VISTA_HISTORICO = "movimientos_historico"
+_COLUMNAS = "id, tienda_id, producto_id, tipo, cantidad, usuario_id, ts, nota"
+# Índices que necesitan las consultas históricas dentro de cada archivo
+_INDICES_ARCHIVO = (
+    ("idx_movimientos_ts", "ts"),
+    ("idx_movimientos_tienda_ts", "tienda_id, ts"),
+    ("idx_movimientos_tienda_producto_ts", "tienda_id, producto_id, ts"),
+)
+
+
+def directorio_archivo(db_path: str) -> str:
+    return os.environ.get("INVENTARIO_ARCHIVO_DIR") or os.path.dirname(os.path.abspath(db_path))
+
+
+def ruta_archivo(db_path: str, anio: int) -> str:
+    """inventario.db -> <directorio>/inventario_2023.db"""
+    base = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(directorio_archivo(db_path), f"{base}_{anio}.db")
+
+
+def _alias(anio: int) -> str:
+    return f"arch_{int(anio)}"
+
+
+def frontera(c: sqlite3.Connection) -> Optional[int]:
+    """Primer instante (ms) que sigue en la base principal (None si no hay nada archivado)"""
+    r = c.execute("SELECT MAX(anio) FROM archivos_movimientos").fetchone()
+    return anio_ms(r[0] + 1) if r and r[0] is not None else None
+
+
+def _adjuntas(c: sqlite3.Connection) -> List[str]:
+    return [r[1] for r in c.execute("PRAGMA database_list")]
+
+
+def adjuntar_historico(c: sqlite3.Connection) -> str:
+    """Adjunta los archivos anuales y (re)crea la vista unificada; devuelve la tabla a consultar.
+
+    Debe llamarse fuera de una transacción (SQLite no permite ATTACH dentro de una).
+    """
+    archivos = c.execute("SELECT anio, ruta FROM archivos_movimientos ORDER BY anio").fetchall()
+    if not archivos:
+        return "movimientos"
+    adjuntas = _adjuntas(c)
+    for anio, ruta in archivos:
+        if _alias(anio) not in adjuntas:
+            c.execute(f"ATTACH DATABASE ? AS {_alias(anio)}", (ruta,))
+    sql = f"CREATE TEMP VIEW {VISTA_HISTORICO} AS SELECT {_COLUMNAS} FROM main.movimientos" + "".join(
+        f" UNION ALL SELECT {_COLUMNAS} FROM {_alias(anio)}.movimientos" for anio, _ in archivos
+    )
+    actual = c.execute("SELECT sql FROM sqlite_temp_master WHERE name=?", (VISTA_HISTORICO,)).fetchone()
+    if not actual or actual[0] != sql:
+        c.execute(f"DROP VIEW IF EXISTS temp.{VISTA_HISTORICO}")
+        c.execute(sql)
+    return VISTA_HISTORICO
+
+
+def fuente_movimientos(c: sqlite3.Connection, desde: Optional[int]) -> str:
+    """Tabla a leer para movimientos a partir de ``desde`` (ms): la principal o la vista histórica"""
+    limite = frontera(c)
+    if limite is None or (desde is not None and desde >= limite):
+        return "movimientos"
+    if c.in_transaction:
+        raise RuntimeError("Las consultas históricas deben abrirse fuera de una transacción")
+    return adjuntar_historico(c)
+
+
+def anios_archivables(c: sqlite3.Connection, hasta_anio: int) -> List[Tuple[int, int]]:
+    """(año, filas) de los años cerrados que siguen en la base principal"""
+    resultado = []
+    desde = 0
+    while True:
+        r = c.execute(
+            "SELECT MIN(ts) FROM movimientos WHERE ts >= ? AND ts < ?", (desde, anio_ms(hasta_anio + 1))
+        ).fetchone()
+        if not r or r[0] is None:
+            return resultado
+        anio = a_datetime(r[0]).year
+        filas = c.execute(
+            "SELECT COUNT(*) FROM movimientos WHERE ts >= ? AND ts < ?", (anio_ms(anio), anio_ms(anio + 1))
+        ).fetchone()[0]
+        resultado.append((anio, filas))
+        desde = anio_ms(anio + 1)
+
+
+def archivar_anio(c: sqlite3.Connection, db_path: str, anio: int) -> int:
+    """Mueve los movimientos del año al archivo anual; devuelve las filas movidas"""
+    ruta = ruta_archivo(db_path, anio)
+    alias = _alias(anio)
+    rango = (anio_ms(anio), anio_ms(anio + 1))
+    if c.in_transaction:
+        c.commit()
+    if alias not in _adjuntas(c):
+        c.execute(f"ATTACH DATABASE ? AS {alias}", (ruta,))
+    try:
+        # 1) Copiar al archivo (mismo esquema que la tabla principal)
+        c.execute("BEGIN IMMEDIATE")
+        ddl = c.execute("SELECT sql FROM main.sqlite_master WHERE type='table' AND name='movimientos'").fetchone()[0]
+        c.execute(re.sub(r'^CREATE TABLE\s+"?movimientos"?', f"CREATE TABLE IF NOT EXISTS {alias}.movimientos", ddl))
+        for nombre, columnas in _INDICES_ARCHIVO:
+            c.execute(f"CREATE INDEX IF NOT EXISTS {alias}.{nombre} ON movimientos({columnas})")
+        c.execute(
+            f"INSERT OR IGNORE INTO {alias}.movimientos({_COLUMNAS}) "
+            f"SELECT {_COLUMNAS} FROM main.movimientos WHERE ts >= ? AND ts < ?",
+            rango,
+        )
+        c.commit()
+        # 2) Borrar de la principal solo lo que ya quedó en el archivo
+        c.execute("BEGIN IMMEDIATE")
+        movidas = c.execute(
+            f"DELETE FROM main.movimientos WHERE ts >= ? AND ts < ? "
+            f"AND id IN (SELECT id FROM {alias}.movimientos)",
+            rango,
+        ).rowcount
+        total = c.execute(f"SELECT COUNT(*) FROM {alias}.movimientos").fetchone()[0]
+        c.execute(
+            "INSERT INTO archivos_movimientos(anio, ruta, filas, archivado_en) VALUES (?, ?, ?, datetime('now')) "
+            "ON CONFLICT(anio) DO UPDATE SET ruta=excluded.ruta, filas=excluded.filas, archivado_en=excluded.archivado_en",
+            (anio, ruta, total),
+        )
+        c.commit()
+        return movidas
+    except BaseException:
+        if c.in_transaction:
+            c.rollback()
+        raise
+    finally:
+        c.execute(f"DETACH DATABASE {alias}")
+
+
+def archivar(c: sqlite3.Connection, db_path: str, hasta_anio: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Archiva todos los años hasta ``hasta_anio`` inclusive (por defecto, el año pasado)"""
+    if hasta_anio is None:
+        hasta_anio = date.today().year - 1
+    return [(anio, archivar_anio(c, db_path, anio)) for anio, _ in anios_archivables(c, hasta_anio)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .db import DB_PATH, get_conn
+
+    parser = argparse.ArgumentParser(description="Archiva movimientos de años cerrados en bases anuales")
+    parser.add_argument("--db", default=None, help=f"Ruta de la base de datos (por defecto {DB_PATH})")
+    parser.add_argument("--hasta-anio", type=int, default=None,
+                        help="Último año a archivar (por defecto, el año pasado)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo lista lo que se archivaría")
+    parser.add_argument("--vacuum", action="store_true", help="Compacta la base principal al terminar")
+    args = parser.parse_args(argv)
+    db_path = args.db or DB_PATH
+    hasta_anio = args.hasta_anio if args.hasta_anio is not None else date.today().year - 1
+
+    with get_conn(db_path) as c:
+        if args.dry_run:
+            for anio, filas in anios_archivables(c, hasta_anio):
+                print(f"  Pendiente {anio}: {filas} movimientos -> {ruta_archivo(db_path, anio)}")
+            return
+        for anio, filas in archivar(c, db_path, hasta_anio):
+            print(f"  Archivado {anio}: {filas} movimientos -> {ruta_archivo(db_path, anio)}")
+    if args.vacuum:
+        with get_conn(db_path) as c:
+            c.execute("VACUUM")
+
+
+if __name__ == "__main__":
+    main()
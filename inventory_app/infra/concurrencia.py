@@ -0,0 +1,120 @@
+# ==============================
+# File: inventory_app/infra/concurrencia.py
+# ==============================
+"""
+Egresos concurrentes de ``ajustar_stock`` sobre un mismo SKU.
+
+``egresos_concurrentes`` carga un producto con stock y lanza N hilos que hacen
+M egresos de una unidad cada uno, todos a la vez; devuelve cuántos se
+aceptaron y rechazaron, el saldo final y los movimientos registrados. Las
+aserciones corren con la suite (``tests/test_concurrencia.py``); el módulo
+sigue siendo ejecutable sobre una base temporal:
+
+``python -m inventory_app.infra.concurrencia [--hilos N] [--egresos M]``
+(sale con código 1 si el saldo o los movimientos no cuadran).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+from . import db
+from .sqlite_repos import SQLiteRepoInventario, SQLiteRepoProductos, SQLiteRepoTiendas, SQLiteRepoUsuarios
+
+
+@dataclass
+class ResultadoEgresos:
+    inicial: int
+    aceptados: int = 0
+    rechazados: int = 0  # por stock insuficiente
+    saldo: float = 0
+    movimientos: int = 0  # salidas registradas
+    inesperados: List[str] = field(default_factory=list)
+
+    @property
+    def cuadra(self) -> bool:
+        """Saldo y movimientos coinciden con los egresos aceptados"""
+        return (not self.inesperados and self.saldo >= 0
+                and self.saldo == self.inicial - self.aceptados and self.movimientos == self.aceptados)
+
+
+def egresos_concurrentes(inicial: int, hilos: int, egresos: int, sku: str = "CONC") -> ResultadoEgresos:
+    """Crea un producto con ``inicial`` unidades y lo egresa desde ``hilos`` hilos a la vez"""
+    usuario = SQLiteRepoUsuarios().crear_usuario(f"conc-{sku}", "conc", "ADMIN")
+    tienda = SQLiteRepoTiendas().crear_tienda(f"Concurrencia {sku}")
+    producto = SQLiteRepoProductos().crear_producto(sku, "Concurrencia", None, "und", 1, None, None, 0, tienda.id)
+    ri = SQLiteRepoInventario()
+    ri.ajustar_stock(tienda.id, producto.id, inicial, usuario.id, "stock inicial")
+
+    resultado = ResultadoEgresos(inicial)
+    barrera = threading.Barrier(hilos)
+    lock = threading.Lock()
+
+    def trabajar() -> None:
+        barrera.wait()
+        for _ in range(egresos):
+            try:
+                ri.ajustar_stock(tienda.id, producto.id, -1, usuario.id, "prueba de concurrencia")
+                campo = "aceptados"
+            except ValueError:
+                campo = "rechazados"
+            except Exception as e:
+                with lock:
+                    resultado.inesperados.append(f"{type(e).__name__}: {e}")
+                continue
+            with lock:
+                setattr(resultado, campo, getattr(resultado, campo) + 1)
+
+    trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+    resultado.saldo, _ = ri.obtener_stock(tienda.id, producto.id)
+    with db.get_conn() as c:
+        resultado.movimientos = c.execute(
+            "SELECT COUNT(*) FROM movimientos WHERE producto_id=? AND tipo='SALIDA'", (producto.id,)
+        ).fetchone()[0]
+    return resultado
+
+
+@contextmanager
+def base_temporal() -> Iterator[str]:
+    """Apunta los repositorios a una base nueva mientras dura el bloque"""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "concurrencia.db")
+        anterior, db.DB_PATH = db.DB_PATH, ruta
+        try:
+            db.init_db()
+            yield ruta
+        finally:
+            db.get_pool(ruta).close()
+            db.DB_PATH = anterior
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Egresos concurrentes sobre un mismo SKU")
+    parser.add_argument("--hilos", type=int, default=16, help="Hilos simultáneos (por defecto 16)")
+    parser.add_argument("--egresos", type=int, default=50, help="Egresos por hilo (por defecto 50)")
+    args = parser.parse_args(argv)
+
+    total = args.hilos * args.egresos
+    ok = True
+    with base_temporal():
+        for sku, inicial in (("CONC-SOBRA", total + 7), ("CONC-MITAD", total // 2)):
+            r = egresos_concurrentes(inicial, args.hilos, args.egresos, sku)
+            print(f"{sku}: inicial {r.inicial}, aceptados {r.aceptados}, rechazados {r.rechazados}, "
+                  f"saldo {r.saldo}, salidas {r.movimientos}" + "".join(f"\n  ERROR {e}" for e in r.inesperados))
+            ok = ok and r.cuadra and r.aceptados == min(total, inicial)
+    print("OK" if ok else "ERROR: el saldo o los movimientos no cuadran")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,113 +2,334 @@
 # File: inventory_app/infra/db.py
 # ==============================
 from __future__ import annotations
-import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import atexit
 import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+
+DB_PATH = os.environ.get("INVENTARIO_DB_PATH", "inventario.db")
+
+# Generaciones de version_datos, compartidas por todos los pools: dos bases nunca dan el mismo número
+_GENERACIONES = itertools.count(1)
+
+# Perfiles de rendimiento aplicados a cada conexión nueva.
+# cache_size negativo = KiB; mmap_size en bytes; busy_timeout en ms.
+PERFILES_PRAGMA: Dict[str, Dict[str, object]] = {
+    # Cajas: muchas escrituras cortas concurrentes, lecturas puntuales
+    "pos-terminal": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -8192,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    # Oficina: reportes y consultas grandes, pocas escrituras
+    "back-office": {
+        "busy_timeout": 10000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    # Cargas masivas: prioriza velocidad sobre durabilidad ante cortes de luz
+    "bulk-load": {
+        "busy_timeout": 30000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -131072,
+        "mmap_size": 512 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+DB_PERFIL = os.environ.get("INVENTARIO_DB_PERFIL", "pos-terminal")
+
+
+def perfil_pragmas(nombre: Optional[str] = None) -> Dict[str, object]:
+    """Devuelve los pragmas de un perfil; INVENTARIO_DB_PRAGMAS="k=v,k=v" los sobreescribe"""
+    nombre = nombre or DB_PERFIL
+    if nombre not in PERFILES_PRAGMA:
+        raise ValueError(
+            f"Perfil de base de datos desconocido: {nombre} "
+            f"(opciones: {', '.join(PERFILES_PRAGMA)})"
+        )
+    pragmas = dict(PERFILES_PRAGMA[nombre])
+    for par in filter(None, os.environ.get("INVENTARIO_DB_PRAGMAS", "").split(",")):
+        clave, _, valor = par.partition("=")
+        pragmas[clave.strip().lower()] = valor.strip()
+    desconocidos = set(pragmas) - set(PERFILES_PRAGMA["pos-terminal"])
+    if desconocidos:
+        raise ValueError(f"Pragmas no soportados: {', '.join(sorted(desconocidos))}")
+    return pragmas
+
+
+def aplicar_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, object]) -> None:
+    # busy_timeout primero: cambiar journal_mode puede requerir esperar el lock
+    for clave in sorted(pragmas, key=lambda k: k != "busy_timeout"):
+        conn.execute(f"PRAGMA {clave}={pragmas[clave]}").fetchall()
+
+POOL_MAX_SIZE = 8
+POOL_TIMEOUT = 10.0  # segundos esperando una conexión libre
+HEALTH_CHECK_INTERVAL = 30.0  # segundos de inactividad antes de verificar una conexión
+
+
+class ConnectionPool:
+    """Pool de conexiones SQLite de larga vida.
+
+    Cada hilo obtiene una única conexión mientras la tiene en uso: los
+    ``with get_conn()`` anidados dentro del mismo hilo reutilizan la misma
+    conexión y solo el bloque más externo hace commit/rollback y la devuelve
+    al pool.
+    """
+
+    def __init__(self, db_path: str, max_size: int = POOL_MAX_SIZE,
+                 timeout: float = POOL_TIMEOUT,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 perfil: Optional[str] = None):
+        self.db_path = db_path
+        self.perfil = perfil or DB_PERFIL
+        self.pragmas = perfil_pragmas(self.perfil)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._idle: List[Tuple[sqlite3.Connection, float]] = []
+        self._open = 0
+        self._closed = False
+        # Versión de los datos: sube con cada escritura propia o ajena (ver version_datos)
+        self._generacion = next(_GENERACIONES)
+        self._vistos: Dict[int, Tuple[int, int]] = {}  # id(conn) -> (data_version, total_changes)
+        self._stats = {
+            "checkouts": 0,
+            "reuses": 0,
+            "waits": 0,
+            "created": 0,
+            "discarded": 0,
+            "health_failures": 0,
+        }
+
+    # --- ciclo de vida de conexiones ---
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            aplicar_pragmas(conn, self.pragmas)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Cierra una conexión y libera su cupo (requiere tener el lock)"""
+        self._vistos.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._open -= 1
+        self._stats["discarded"] += 1
+        self._cond.notify()
+
+    def _acquire(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("El pool de conexiones está cerrado")
+            self._stats["checkouts"] += 1
+            waited = False
+            while True:
+                while self._idle:
+                    conn, last_used = self._idle.pop()
+                    if (time.monotonic() - last_used >= self.health_check_interval
+                            and not self._is_healthy(conn)):
+                        self._stats["health_failures"] += 1
+                        self._discard(conn)
+                        continue
+                    return conn
+                if self._open < self.max_size:
+                    self._open += 1
+                    break
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise TimeoutError(
+                        f"No hay conexiones libres en el pool ({self.max_size} en uso)"
+                    )
+                if self._closed:
+                    raise RuntimeError("El pool de conexiones está cerrado")
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._cond:
+            if self._closed or conn.in_transaction:
+                # Una transacción colgada no debe filtrarse al siguiente usuario
+                self._discard(conn)
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Entrega la conexión del hilo actual, abriendo una si hace falta"""
+        local = self._local
+        if getattr(local, "depth", 0) > 0:
+            local.depth += 1
+            with self._cond:
+                self._stats["reuses"] += 1
+            try:
+                yield local.conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._acquire()
+        local.conn, local.depth = conn, 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            local.conn, local.depth = None, 0
+            self._release(conn)
+
+    def version_datos(self, conn: sqlite3.Connection, propios: bool = False) -> int:
+        """Número que cambia cuando cambian los datos de la base.
+
+        ``PRAGMA data_version`` detecta commits de otras conexiones (otros
+        procesos u otras conexiones del pool) y ``total_changes`` las escrituras
+        hechas por ``conn`` misma, que data_version no refleja. Con ``propios``
+        esas escrituras no cuentan: las usa quien ya invalidó lo que escribió.
+        Los números salen de un contador global, así que cambiar de base
+        también cambia la versión.
+        """
+        actual = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with self._cond:
+            anterior = self._vistos.get(id(conn))
+            self._vistos[id(conn)] = actual
+            if anterior is None:
+                # Conexión nueva: no sabemos qué cambió desde que la anterior miró
+                self._generacion = next(_GENERACIONES)
+            elif anterior[0] != actual[0] or (anterior != actual and not propios):
+                self._generacion = next(_GENERACIONES)
+            return self._generacion
+
+    def close(self) -> None:
+        """Cierra todas las conexiones libres; las que están en uso se cierran al devolverse"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, object]:
+        """Métricas del pool: checkouts, esperas, conexiones abiertas, etc."""
+        with self._cond:
+            return {
+                **self._stats,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "max_size": self.max_size,
+                "perfil": self.perfil,
+            }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Optional[str] = None) -> ConnectionPool:
+    db_path = db_path or DB_PATH
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+
+def get_conn(db_path: Optional[str] = None):
+    """Context manager con una conexión del pool (commit al salir, rollback si hay error)"""
+    return get_pool(db_path).connection()
+
+
+@contextmanager
+def transaccion(db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Como get_conn, pero toma el lock de escritura al inicio (BEGIN IMMEDIATE).
+
+    Evita que dos escritores lean el mismo valor y luego se pisen; si ya hay una
+    transacción abierta en el hilo, se reutiliza.
+    """
+    with get_conn(db_path) as c:
+        if not c.in_transaction:
+            c.execute("BEGIN IMMEDIATE")
+        yield c
 
-DB_PATH = "inventario.db"
 
+def version_datos(c: sqlite3.Connection, db_path: Optional[str] = None, propios: bool = False) -> int:
+    """Versión de los datos vista desde ``c`` (una conexión obtenida con get_conn)"""
+    return get_pool(db_path).version_datos(c, propios)
 
-def get_conn(db_path: str = DB_PATH):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+
+def pool_stats(db_path: Optional[str] = None) -> Dict[str, Dict[str, object]]:
+    with _pools_lock:
+        pools = dict(_pools)
+    if db_path is not None:
+        pools = {db_path: pools[db_path]} if db_path in pools else {}
+    return {path: pool.stats() for path, pool in pools.items()}
+
+
+def close_all() -> None:
+    """Cierra todos los pools; se llama al terminar la aplicación"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all)
 
 
 def _hash_pw(pw: str) -> str:
     return hashlib.sha256(pw.encode("utf-8")).hexdigest()
 
 
-def init_db():
-    ddl = [
-        # Usuarios
-        """
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            pw_hash TEXT NOT NULL,
-            rol TEXT NOT NULL CHECK(rol IN ('ADMIN','ENCARGADO','VENDEDOR')),
-            activo INTEGER NOT NULL DEFAULT 1
-        );
-        """,
-        # Tiendas
-        """
-        CREATE TABLE IF NOT EXISTS tiendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL UNIQUE,
-            direccion TEXT,
-            telefono TEXT,
-            email TEXT,
-            responsable_id INTEGER,
-            FOREIGN KEY(responsable_id) REFERENCES empleados(id) ON DELETE SET NULL
-        );
-        """,
-        # Productos
-        """
-        CREATE TABLE IF NOT EXISTS productos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sku TEXT NOT NULL UNIQUE,
-            nombre TEXT NOT NULL,
-            descripcion TEXT,
-            unidad TEXT NOT NULL,
-            precio_unit REAL NOT NULL CHECK(precio_unit >= 0),
-            categoria TEXT,
-            proveedor TEXT,
-            stock_minimo INTEGER DEFAULT 0 CHECK(stock_minimo >= 0),
-            activo INTEGER DEFAULT 1 CHECK(activo IN (0,1)),
-            tienda_id INTEGER NOT NULL,
-            FOREIGN KEY(tienda_id) REFERENCES tiendas(id) ON DELETE CASCADE
-        );
-        """,
-        # Stock
-        """
-        CREATE TABLE IF NOT EXISTS stock (
-            tienda_id INTEGER NOT NULL,
-            producto_id INTEGER NOT NULL,
-            cantidad REAL NOT NULL DEFAULT 0 CHECK(cantidad >= 0),
-            minimo REAL NOT NULL DEFAULT 0 CHECK(minimo >= 0),
-            PRIMARY KEY(tienda_id, producto_id),
-            FOREIGN KEY(tienda_id) REFERENCES tiendas(id) ON DELETE CASCADE,
-            FOREIGN KEY(producto_id) REFERENCES productos(id) ON DELETE CASCADE
-        );
-        """,
-        # Empleados (información adicional de usuarios)
-        """
-        CREATE TABLE IF NOT EXISTS empleados (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER NOT NULL UNIQUE,
-            nombres TEXT NOT NULL,
-            apellidos TEXT NOT NULL,
-            dni TEXT NOT NULL UNIQUE,
-            jornada TEXT NOT NULL CHECK(jornada IN ('COMPLETA','MEDIA','PARCIAL')),
-            tienda_id INTEGER NOT NULL,
-            FOREIGN KEY(usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
-            FOREIGN KEY(tienda_id) REFERENCES tiendas(id)
-        );
-        """,
-        # Movimientos
-        """
-        CREATE TABLE IF NOT EXISTS movimientos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tienda_id INTEGER NOT NULL,
-            producto_id INTEGER NOT NULL,
-            tipo TEXT NOT NULL CHECK(tipo IN ('INGRESO','SALIDA')),
-            cantidad REAL NOT NULL CHECK(cantidad > 0),
-            usuario_id INTEGER NOT NULL,
-            ts TEXT NOT NULL,
-            nota TEXT,
-            FOREIGN KEY(tienda_id) REFERENCES tiendas(id),
-            FOREIGN KEY(producto_id) REFERENCES productos(id),
-            FOREIGN KEY(usuario_id) REFERENCES usuarios(id)
-        );
-        """,
-    ]
+def init_db(dry_run: bool = False):
+    """Aplica las migraciones pendientes (ver infra/migrations.py)"""
+    from .migrations import migrar
+
     with get_conn() as c:
-        for stmt in ddl:
-            c.execute(stmt)
-        # Crear admin si está vacío
-        cur = c.execute("SELECT COUNT(*) AS n FROM usuarios")
-        if cur.fetchone()[0] == 0:
-            c.execute(
-                "INSERT INTO usuarios(username, pw_hash, rol, activo) VALUES (?,?,?,1)",
-                ("admin", _hash_pw("admin"), "ADMIN"),
-            )
\ No newline at end of file
+        return migrar(c, dry_run=dry_run)
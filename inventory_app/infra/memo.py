@@ -0,0 +1,277 @@
+# ==============================
+# File: inventory_app/infra/memo.py
+# ==============================
+"""
+Memoización de lecturas de los repositorios, invalidada por tabla.
+
+``@memoizar("productos", "stock")`` guarda el resultado de un método de lectura
+por argumentos, etiquetado con las tablas que lee, en una LRU acotada por
+método (``@memoizar_por_ids`` guarda cada entidad de una búsqueda por ids). ``@escribe("stock", "movimientos")`` anuncia las tablas que toca un
+método de escritura: al terminar se descartan solo las entradas etiquetadas
+con alguna de ellas.
+
+Los cambios que no pasan por un método anunciado (otra terminal, otra conexión
+del pool, SQL suelto) se detectan con ``version_datos`` (``PRAGMA data_version``
++ ``total_changes``) y vacían todo el registro. Las versiones salen de un
+contador global, así que apuntar a otra base también lo vacía.
+
+Las lecturas del catálogo (tiendas y productos en ``sqlite_repos``) son
+read-through sobre este mismo registro: ``@memoizar`` para listados y búsquedas
+por SKU, ``@memoizar_por_ids`` para las búsquedas por id, donde solo los ids que
+faltan van a SQLite. No hay otra capa de caché delante de los repositorios.
+
+Las claves no incluyen la instancia: los repositorios SQLite no tienen estado
+propio. Los resultados se comparten entre llamadas (las listas y diccionarios
+se copian al devolverlos, las entidades no): no deben modificarse.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+import functools
+import sys
+import threading
+
+from .db import get_conn, version_datos
+
+# Entradas por método antes de descartar la usada hace más tiempo
+MEMO_MAX_ENTRADAS = 64
+
+
+def _tamano(valor: Any, vistos: Optional[Set[int]] = None) -> int:
+    """Bytes aproximados de ``valor`` y lo que contiene"""
+    vistos = set() if vistos is None else vistos
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    total = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        total += sum(_tamano(k, vistos) + _tamano(v, vistos) for k, v in valor.items())
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        total += sum(_tamano(v, vistos) for v in valor)
+    elif is_dataclass(valor):
+        total += sum(_tamano(getattr(valor, f.name), vistos) for f in fields(valor))
+    return total
+
+
+def _copia(valor: Any) -> Any:
+    if isinstance(valor, list):
+        return [dict(v) if isinstance(v, dict) else v for v in valor]
+    if isinstance(valor, dict):
+        return dict(valor)
+    return valor
+
+
+def _clave(args: Tuple, kwargs: Dict[str, Any]) -> Optional[Tuple]:
+    """Clave hashable para los argumentos (None si alguno no lo es)"""
+    def congelar(v):
+        if isinstance(v, (list, tuple)):
+            return tuple(congelar(x) for x in v)
+        if isinstance(v, (set, frozenset)):
+            return frozenset(v)
+        return v
+
+    clave = (tuple(congelar(a) for a in args), tuple(sorted((k, congelar(v)) for k, v in kwargs.items())))
+    try:
+        hash(clave)
+    except TypeError:
+        return None
+    return clave
+
+
+class _CacheMetodo:
+    def __init__(self, nombre: str, tablas: Iterable[str], max_entradas: int):
+        self.nombre = nombre
+        self.tablas = frozenset(tablas)
+        self.max_entradas = max_entradas
+        self.entradas: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.generacion = 0  # sube con cada invalidación; evita guardar lecturas que la cruzaron
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+        self.descartes = 0
+
+    def vaciar(self) -> None:
+        if self.entradas:
+            self.entradas.clear()
+            self.invalidaciones += 1
+        self.generacion += 1
+
+
+class RegistroCache:
+    """Cachés de todos los métodos memoizados y su invalidación"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metodos: Dict[str, _CacheMetodo] = {}
+        # Tablas escritas dentro de una transacción aún abierta, por conexión:
+        # se vuelven a invalidar cuando la conexión ya no está en transacción
+        self._pendientes: Dict[int, Set[str]] = {}
+        self._version: Optional[int] = None  # última version_datos vista
+
+    def registrar(self, nombre: str, tablas: Iterable[str], max_entradas: int) -> _CacheMetodo:
+        with self._lock:
+            cache = self._metodos[nombre] = _CacheMetodo(nombre, tablas, max_entradas)
+            return cache
+
+    def invalidar(self, tablas: Optional[Iterable[str]] = None) -> None:
+        """Descarta las entradas que leen alguna de ``tablas`` (todas si es None)"""
+        tablas = None if tablas is None else frozenset(tablas)
+        with self._lock:
+            self._vaciar(tablas)
+
+    def _vaciar(self, tablas: Optional[frozenset]) -> None:
+        # Requiere tener el lock
+        for cache in self._metodos.values():
+            if tablas is None or cache.tablas & tablas:
+                cache.vaciar()
+
+    def comprobar(self, c) -> None:
+        """Antes de usar la caché desde ``c``: vacía todo si hubo cambios no anunciados"""
+        pendientes = None
+        if not c.in_transaction:
+            with self._lock:
+                pendientes = self._pendientes.pop(id(c), None)
+        if pendientes:
+            self.invalidar(pendientes)
+        self._al_dia(version_datos(c))
+
+    def escrito(self, c, tablas: Iterable[str]) -> None:
+        """Después de una escritura anunciada hecha con ``c`` (tras ``comprobar(c)``)"""
+        self.invalidar(tablas)
+        if c.in_transaction:
+            # Otra conexión podría guardar lo anterior antes del commit
+            with self._lock:
+                self._pendientes.setdefault(id(c), set()).update(tablas)
+        # Los cambios propios ya se invalidaron por tabla; los de otros vacían todo
+        self._al_dia(version_datos(c, propios=True))
+
+    def _al_dia(self, version: int) -> None:
+        """Vacía todo si los datos cambiaron desde la última versión vista"""
+        with self._lock:
+            if version != self._version:
+                self._vaciar(None)
+                self._version = version
+
+    def buscar(self, cache: _CacheMetodo, clave: Tuple) -> Tuple[bool, Any, int]:
+        with self._lock:
+            if clave in cache.entradas:
+                cache.entradas.move_to_end(clave)
+                cache.hits += 1
+                return True, cache.entradas[clave], cache.generacion
+            cache.misses += 1
+            return False, None, cache.generacion
+
+    def guardar(self, cache: _CacheMetodo, clave: Tuple, valor: Any, generacion: int) -> None:
+        with self._lock:
+            if cache.generacion != generacion:
+                return
+            cache.entradas[clave] = valor
+            cache.entradas.move_to_end(clave)
+            while len(cache.entradas) > cache.max_entradas:
+                cache.entradas.popitem(last=False)
+                cache.descartes += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Por método: aciertos, fallos, hit ratio, entradas y memoria aproximada (bytes)"""
+        with self._lock:
+            resultado = {}
+            for nombre, cache in self._metodos.items():
+                consultas = cache.hits + cache.misses
+                resultado[nombre] = {
+                    "tablas": sorted(cache.tablas),
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                    "hit_ratio": cache.hits / consultas if consultas else 0.0,
+                    "entradas": len(cache.entradas),
+                    "max_entradas": cache.max_entradas,
+                    "descartes": cache.descartes,
+                    "invalidaciones": cache.invalidaciones,
+                    "bytes": _tamano(list(cache.entradas.values())),
+                }
+            return resultado
+
+
+registro = RegistroCache()
+
+
+def memoizar(*tablas: str, max_entradas: int = MEMO_MAX_ENTRADAS) -> Callable:
+    """Decora un método de lectura cuyo resultado depende solo de sus argumentos y de ``tablas``"""
+    def decorador(metodo: Callable) -> Callable:
+        cache = registro.registrar(metodo.__qualname__, tablas, max_entradas)
+
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            clave = _clave(args, kwargs)
+            if clave is None:
+                return metodo(self, *args, **kwargs)
+            with get_conn() as c:
+                registro.comprobar(c)
+                encontrado, valor, generacion = registro.buscar(cache, clave)
+                if encontrado:
+                    return _copia(valor)
+                valor = metodo(self, *args, **kwargs)
+                # Dentro de una transacción podrían verse escrituras que luego se deshagan
+                if not c.in_transaction:
+                    registro.guardar(cache, clave, valor, generacion)
+                return _copia(valor)
+
+        return envoltura
+
+    return decorador
+
+
+def memoizar_por_ids(*tablas: str, max_entradas: int = MEMO_MAX_ENTRADAS) -> Callable:
+    """Como memoizar, para métodos ``ids -> {id: entidad}``: cada id se guarda por separado
+    y al método solo se le piden los que faltan (los inexistentes se recuerdan como None)"""
+    def decorador(metodo: Callable) -> Callable:
+        cache = registro.registrar(metodo.__qualname__, tablas, max_entradas)
+
+        @functools.wraps(metodo)
+        def envoltura(self, ids: Iterable[int]) -> Dict[int, Any]:
+            with get_conn() as c:
+                registro.comprobar(c)
+                resultado: Dict[int, Any] = {}
+                faltantes = []
+                generaciones = set()
+                for i in set(ids):
+                    encontrado, valor, generacion = registro.buscar(cache, i)
+                    generaciones.add(generacion)
+                    if encontrado:
+                        resultado[i] = valor
+                    else:
+                        faltantes.append(i)
+                if faltantes:
+                    encontrados = metodo(self, faltantes)
+                    # Solo si ninguna invalidación cruzó la búsqueda (una sola generación)
+                    if not c.in_transaction and len(generaciones) == 1:
+                        for i in faltantes:
+                            registro.guardar(cache, i, encontrados.get(i), generacion)
+                    resultado.update(encontrados)
+                return {i: v for i, v in resultado.items() if v is not None}
+
+        return envoltura
+
+    return decorador
+
+
+def escribe(*tablas: str) -> Callable:
+    """Decora un método de escritura: al terminar invalida las lecturas de ``tablas``"""
+    def decorador(metodo: Callable) -> Callable:
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            # Una sola conexión para comprobar, escribir y marcar: el commit queda al salir
+            with get_conn() as c:
+                registro.comprobar(c)
+                try:
+                    return metodo(self, *args, **kwargs)
+                finally:
+                    registro.escrito(c, tablas)
+
+        return envoltura
+
+    return decorador
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return registro.stats()
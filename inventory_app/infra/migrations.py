@@ -0,0 +1,752 @@
+# ==============================
+# File: inventory_app/infra/migrations.py
+# ==============================
+"""
+Migraciones versionadas del esquema.
+
+La versión aplicada se guarda en ``PRAGMA user_version``. Cada migración se
+aplica una sola vez, en orden y dentro de su propia transacción; si la base
+ya está al día, ``migrar`` no ejecuta ningún DDL.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import os
+import re
+import sqlite3
+
+from ..domain.tiempo import formatear
+from ..domain.unidades import CENTAVOS, MILESIMAS
+from .archivo import frontera
+from .db import _hash_pw
+from .resumen_diario import SQL_CREAR_TRIGGER, crear_resumen_diario, reconstruir
+from .texto import registrar_funciones
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: int
+    descripcion: str
+    sql: Tuple[str, ...] = field(default=(), repr=False)
+    python: Optional[Callable[[sqlite3.Connection], None]] = field(default=None, repr=False)
+
+
+def _crear_admin(c: sqlite3.Connection) -> None:
+    """Crea el usuario admin si la tabla de usuarios está vacía"""
+    c.execute(
+        "INSERT INTO usuarios(username, pw_hash, rol, activo) "
+        "SELECT ?, ?, ?, 1 WHERE NOT EXISTS (SELECT 1 FROM usuarios)",
+        ("admin", _hash_pw("admin"), "ADMIN"),
+    )
+
+
+def fts5_disponible(c: sqlite3.Connection) -> bool:
+    """Indica si la compilación de SQLite incluye FTS5"""
+    try:
+        c.execute("CREATE VIRTUAL TABLE temp._prueba_fts5 USING fts5(x)")
+        c.execute("DROP TABLE temp._prueba_fts5")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+_COLUMNAS_FTS = "sku, nombre, categoria, proveedor, descripcion"
+
+
+def _crear_productos_fts(c: sqlite3.Connection) -> None:
+    """Índice de texto completo sobre productos, sincronizado por triggers.
+
+    Si SQLite no trae FTS5 no se crea nada y los repositorios usan LIKE.
+    """
+    if not fts5_disponible(c):
+        return
+    c.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+            {_COLUMNAS_FTS},
+            content='productos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+    nuevas = "new.sku, new.nombre, new.categoria, new.proveedor, new.descripcion"
+    viejas = "old.sku, old.nombre, old.categoria, old.proveedor, old.descripcion"
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+            INSERT INTO productos_fts(rowid, {_COLUMNAS_FTS}) VALUES (new.id, {nuevas});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+            INSERT INTO productos_fts(productos_fts, rowid, {_COLUMNAS_FTS}) VALUES ('delete', old.id, {viejas});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE ON productos BEGIN
+            INSERT INTO productos_fts(productos_fts, rowid, {_COLUMNAS_FTS}) VALUES ('delete', old.id, {viejas});
+            INSERT INTO productos_fts(rowid, {_COLUMNAS_FTS}) VALUES (new.id, {nuevas});
+        END
+    """)
+    c.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+
+
+# tabla -> columnas con sombra normalizada (<columna>_norm)
+COLUMNAS_NORMALIZADAS = {
+    "productos": ("sku", "nombre", "categoria"),
+    "empleados": ("nombres", "apellidos"),
+    "tiendas": ("nombre",),
+}
+
+
+def _crear_columnas_normalizadas(c: sqlite3.Connection) -> None:
+    """Columnas *_norm (sin tildes, en minúsculas) indexadas y mantenidas por triggers"""
+    registrar_funciones(c)
+    for tabla, columnas in COLUMNAS_NORMALIZADAS.items():
+        asignaciones = ", ".join(f"{col}_norm = normalizar(new.{col})" for col in columnas)
+        for col in columnas:
+            c.execute(f"ALTER TABLE {tabla} ADD COLUMN {col}_norm TEXT")
+        c.execute(
+            f"UPDATE {tabla} SET " + ", ".join(f"{col}_norm = normalizar({col})" for col in columnas)
+        )
+        for col in columnas:
+            c.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{col}_norm ON {tabla}({col}_norm)")
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tabla}_norm_ai AFTER INSERT ON {tabla} BEGIN
+                UPDATE {tabla} SET {asignaciones} WHERE id = new.id;
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {tabla}_norm_au AFTER UPDATE OF {", ".join(columnas)} ON {tabla} BEGIN
+                UPDATE {tabla} SET {asignaciones} WHERE id = new.id;
+            END
+        """)
+    # El índice FTS solo debe reindexar cuando cambian sus columnas, no las *_norm
+    if c.execute("SELECT 1 FROM sqlite_master WHERE name='productos_fts_au'").fetchone():
+        nuevas = "new.sku, new.nombre, new.categoria, new.proveedor, new.descripcion"
+        viejas = "old.sku, old.nombre, old.categoria, old.proveedor, old.descripcion"
+        c.execute("DROP TRIGGER productos_fts_au")
+        c.execute(f"""
+            CREATE TRIGGER productos_fts_au AFTER UPDATE OF {_COLUMNAS_FTS} ON productos BEGIN
+                INSERT INTO productos_fts(productos_fts, rowid, {_COLUMNAS_FTS}) VALUES ('delete', old.id, {viejas});
+                INSERT INTO productos_fts(rowid, {_COLUMNAS_FTS}) VALUES (new.id, {nuevas});
+            END
+        """)
+
+
+def _norm_sin_triggers(c: sqlite3.Connection) -> None:
+    """Las columnas *_norm pasan a escribirlas los repositorios: los triggers llamaban a normalizar(),
+    que solo existe en las conexiones que la registran, y cualquier otra conexión fallaba al escribir"""
+    for tabla, columnas in COLUMNAS_NORMALIZADAS.items():
+        c.execute(f"DROP TRIGGER IF EXISTS {tabla}_norm_ai")
+        c.execute(f"DROP TRIGGER IF EXISTS {tabla}_norm_au")
+        # Altas de otros procesos que no completan *_norm: aproximación con lower() (sin quitar tildes)
+        for col in columnas:
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {tabla}_{col}_norm_ai AFTER INSERT ON {tabla}
+                WHEN new.{col}_norm IS NULL AND new.{col} IS NOT NULL BEGIN
+                    UPDATE {tabla} SET {col}_norm = lower(new.{col}) WHERE id = new.id;
+                END
+            """)
+
+
+# tabla -> columnas con índice de texto completo propio (<tabla>_fts), además de productos
+COLUMNAS_FTS_TEXTO = {
+    "tiendas": ("nombre",),
+    "empleados": ("nombres", "apellidos"),
+}
+
+
+def _crear_fts_texto(c: sqlite3.Connection) -> None:
+    """Índices FTS5 de tiendas y empleados: buscar por cualquier palabra del nombre sin recorrer la tabla.
+
+    Triggers solo con SQL nativo. Sin FTS5 no se crea nada y las búsquedas usan los índices *_norm.
+    """
+    if not fts5_disponible(c):
+        return
+    for tabla, columnas in COLUMNAS_FTS_TEXTO.items():
+        fts = f"{tabla}_fts"
+        lista = ", ".join(columnas)
+        nuevas = ", ".join(f"new.{col}" for col in columnas)
+        viejas = ", ".join(f"old.{col}" for col in columnas)
+        c.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {lista},
+                content='{tabla}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN
+                INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {nuevas});
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejas});
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {lista} ON {tabla} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejas});
+                INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {nuevas});
+            END
+        """)
+        c.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _estado_stock(cantidad: str, minimo: str) -> str:
+    """Misma regla que el reporte de stock: SIN STOCK / BAJO MINIMO / OK"""
+    return (f"CASE WHEN {cantidad} = 0 THEN 'SIN STOCK' "
+            f"WHEN {cantidad} <= {minimo} THEN 'BAJO MINIMO' ELSE 'OK' END")
+
+
+# Instante actual en los triggers: texto hasta la migración 15, luego ms desde la época (como movimientos.ts)
+_AHORA_TEXTO = "datetime('now')"
+_AHORA_MS = "CAST(round((julianday('now') - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _sql_alerta_stock(ahora: str = _AHORA_TEXTO) -> str:
+    """Cuerpo de los triggers de stock: registra la transición y actualiza la alerta"""
+    nuevo = _estado_stock("new.cantidad", "new.minimo")
+    propio = "EXISTS (SELECT 1 FROM productos WHERE id = new.producto_id AND tienda_id = new.tienda_id)"
+    return f"""
+        INSERT INTO alertas_stock_transiciones(tienda_id, producto_id, estado_anterior, estado_nuevo,
+                                               cantidad, minimo, ts)
+        SELECT new.tienda_id, new.producto_id, anterior, nuevo, new.cantidad, new.minimo, {ahora}
+        FROM (SELECT IFNULL((SELECT estado FROM alertas_stock
+                             WHERE tienda_id = new.tienda_id AND producto_id = new.producto_id), 'OK') AS anterior,
+                     {nuevo} AS nuevo)
+        WHERE anterior <> nuevo AND {propio};
+        DELETE FROM alertas_stock
+        WHERE tienda_id = new.tienda_id AND producto_id = new.producto_id AND {nuevo} = 'OK';
+        INSERT INTO alertas_stock(tienda_id, producto_id, estado, cantidad, minimo, desde)
+        SELECT new.tienda_id, new.producto_id, {nuevo}, new.cantidad, new.minimo, {ahora}
+        WHERE {nuevo} <> 'OK' AND {propio}
+        ON CONFLICT(tienda_id, producto_id) DO UPDATE SET
+            cantidad = excluded.cantidad,
+            minimo = excluded.minimo,
+            desde = CASE WHEN estado <> excluded.estado THEN excluded.desde ELSE desde END,
+            estado = excluded.estado;
+    """
+
+
+def _sql_productos_alerta_ai(ahora: str = _AHORA_TEXTO) -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS productos_alerta_ai AFTER INSERT ON productos BEGIN
+            INSERT OR IGNORE INTO alertas_stock(tienda_id, producto_id, estado, cantidad, minimo, desde)
+            VALUES (new.tienda_id, new.id, 'SIN STOCK', 0, 0, {ahora});
+            INSERT INTO alertas_stock_transiciones(tienda_id, producto_id, estado_anterior, estado_nuevo,
+                                                   cantidad, minimo, ts)
+            VALUES (new.tienda_id, new.id, NULL, 'SIN STOCK', 0, 0, {ahora});
+        END
+    """
+
+
+def _sql_productos_alerta_au(ahora: str = _AHORA_TEXTO) -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS productos_alerta_au AFTER UPDATE OF tienda_id ON productos
+        WHEN old.tienda_id <> new.tienda_id BEGIN
+            DELETE FROM alertas_stock WHERE tienda_id = old.tienda_id AND producto_id = old.id;
+            INSERT OR IGNORE INTO alertas_stock(tienda_id, producto_id, estado, cantidad, minimo, desde)
+            SELECT new.tienda_id, new.id, estado, cantidad, minimo, {ahora} FROM (
+                SELECT IFNULL(s.cantidad,0) AS cantidad, IFNULL(s.minimo,0) AS minimo,
+                       {_estado_stock("IFNULL(s.cantidad,0)", "IFNULL(s.minimo,0)")} AS estado
+                FROM (SELECT 1) LEFT JOIN stock s ON s.tienda_id = new.tienda_id AND s.producto_id = new.id
+            ) WHERE estado <> 'OK';
+        END
+    """
+
+
+def _recrear_tabla(c: sqlite3.Connection, tabla: str, columnas: Dict[str, Tuple[str, str]]) -> bool:
+    """Cambia el tipo de columnas reconstruyendo la tabla (SQLite no tiene ALTER COLUMN).
+
+    ``columnas``: nombre -> (tipo nuevo, expresión que convierte el valor actual).
+    Conserva índices, triggers y el contador AUTOINCREMENT. Devuelve False si la
+    tabla ya tenía esos tipos.
+    """
+    tipos = {r[1]: r[2].upper() for r in c.execute(f"PRAGMA table_info({tabla})")}
+    if all(tipos.get(col) == tipo for col, (tipo, _) in columnas.items()):
+        return False
+    ddl = c.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (tabla,)).fetchone()[0]
+    dependientes = [r[0] for r in c.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name=? AND type IN ('index','trigger') AND sql IS NOT NULL",
+        (tabla,),
+    )]
+    nueva = f"{tabla}_nueva"
+    ddl = re.sub(rf'^CREATE TABLE\s+"?{tabla}"?', f"CREATE TABLE {nueva}", ddl)
+    for col, (tipo, _) in columnas.items():
+        ddl, n = re.subn(rf"\b({col}\s+)\w+", rf"\g<1>{tipo}", ddl, count=1)
+        if n != 1:
+            raise RuntimeError(f"No se encontró la columna {tabla}.{col}")
+    nombres = list(tipos)
+    valores = ", ".join(columnas[col][1] if col in columnas else col for col in nombres)
+    secuencia = None
+    if c.execute("SELECT 1 FROM sqlite_master WHERE name='sqlite_sequence'").fetchone():
+        r = c.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (tabla,)).fetchone()
+        secuencia = r[0] if r else None
+    c.execute(ddl)
+    c.execute(f"INSERT INTO {nueva}({', '.join(nombres)}) SELECT {valores} FROM {tabla}")
+    c.execute(f"DROP TABLE {tabla}")
+    # Los triggers de otras tablas ya nombran a la tabla final: no revalidarlos a mitad del cambio
+    c.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        c.execute(f"ALTER TABLE {nueva} RENAME TO {tabla}")
+    finally:
+        c.execute("PRAGMA legacy_alter_table = OFF")
+    for sql in dependientes:
+        c.execute(sql)
+    if secuencia is not None:
+        # Los id ya usados (p. ej. movimientos archivados) no deben reutilizarse
+        c.execute("DELETE FROM sqlite_sequence WHERE name=?", (tabla,))
+        c.execute(
+            f"INSERT INTO sqlite_sequence(name, seq) SELECT ?, MAX(?, IFNULL(MAX(id), 0)) FROM {tabla}",
+            (tabla, secuencia),
+        )
+    return True
+
+
+def _a_ms(columna: str) -> Tuple[str, str]:
+    """'AAAA-MM-DD HH:MM:SS' (UTC) -> milisegundos desde la época; los enteros quedan igual"""
+    return "INTEGER", (f"CASE WHEN typeof({columna}) = 'integer' THEN {columna} "
+                       f"ELSE CAST(round((julianday({columna}) - 2440587.5) * 86400000) AS INTEGER) END")
+
+
+_TS_A_MS = _a_ms("ts")
+
+
+def _es_fecha(columna: str) -> str:
+    """Condición: texto 'AAAA-MM-DD...' válido (julianday solo también aceptaría un número suelto)"""
+    return (f"({columna} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+            f"AND julianday({columna}) IS NOT NULL)")
+
+
+def _reparar_ts_nota(c: sqlite3.Connection) -> int:
+    """Intercambia ts y nota en los movimientos que los tienen cruzados; devuelve cuántos.
+
+    Antes de la migración 11 ``ajustar_stock`` pasaba la nota en el lugar de ts
+    y guardaba la fecha en nota. Se reconocen por tener texto que no es fecha
+    en ts y una fecha en nota.
+    """
+    return c.execute(
+        f"UPDATE movimientos SET ts = nota, nota = ts "
+        f"WHERE typeof(ts) = 'text' AND NOT {_es_fecha('ts')} AND {_es_fecha('nota')}"
+    ).rowcount
+
+
+def _verificar_ts(c: sqlite3.Connection, tabla: str) -> None:
+    """Falla (y la migración se deshace) si alguna fila tiene un ts que no se puede convertir"""
+    malas = c.execute(
+        f"SELECT COUNT(*), MIN(id) FROM {tabla} WHERE typeof(ts) <> 'integer' AND NOT {_es_fecha('ts')}"
+    ).fetchone()
+    if malas[0]:
+        archivo = c.execute("PRAGMA database_list").fetchone()[2] or ":memory:"
+        ejemplo = c.execute(f"SELECT ts FROM {tabla} WHERE id = ?", (malas[1],)).fetchone()[0]
+        raise RuntimeError(
+            f"{archivo}: {malas[0]} filas de {tabla} con ts no convertible a fecha "
+            f"(p. ej. id {malas[1]}: {ejemplo!r}); corríjalas y vuelva a ejecutar la migración"
+        )
+
+
+def _ts_movimientos_en_ms(c: sqlite3.Connection) -> None:
+    _reparar_ts_nota(c)
+    _verificar_ts(c, "movimientos")
+    _recrear_tabla(c, "movimientos", {"ts": _TS_A_MS})
+
+
+def _ts_en_milisegundos(c: sqlite3.Connection) -> None:
+    """movimientos.ts y stock_snapshots.ts pasan a enteros (ms desde la época, UTC)"""
+    _ts_movimientos_en_ms(c)
+    _verificar_ts(c, "stock_snapshots")
+    _recrear_tabla(c, "stock_snapshots", {"ts": _TS_A_MS})
+    # El trigger del resumen diario se recrea con la fecha calculada desde ms
+    c.execute("DROP TRIGGER IF EXISTS movimientos_diarios_ai")
+    c.execute(SQL_CREAR_TRIGGER)
+    # Solo los días que siguen en la base principal: los archivados ya están resumidos
+    inicio = frontera(c)
+    reconstruir(c, formatear(inicio)[:10] if inicio is not None else None)
+    _en_archivos(c, _ts_movimientos_en_ms)
+
+
+def _en_archivos(c: sqlite3.Connection, aplicar: Callable[[sqlite3.Connection], Any]) -> None:
+    """Aplica un cambio a cada archivo anual de movimientos (ver infra/archivo.py).
+
+    Son bases aparte: cada una se modifica con su propia conexión y transacción;
+    el cambio debe poder repetirse sobre un archivo ya convertido.
+    """
+    for (ruta,) in c.execute("SELECT ruta FROM archivos_movimientos").fetchall():
+        if not os.path.exists(ruta):
+            continue
+        archivo = sqlite3.connect(ruta)
+        try:
+            archivo.execute("BEGIN IMMEDIATE")
+            aplicar(archivo)
+            archivo.commit()
+        finally:
+            archivo.close()
+
+
+def _punto_fijo(columna: str, escala: int) -> Tuple[str, str]:
+    return "INTEGER", f"CAST(round({columna} * {escala}) AS INTEGER)"
+
+
+# tabla -> columnas que pasan a enteros: cantidades en milésimas, precios en centavos
+COLUMNAS_PUNTO_FIJO = {
+    "productos": {"precio_unit": CENTAVOS},
+    "stock": {"cantidad": MILESIMAS, "minimo": MILESIMAS},
+    "movimientos": {"cantidad": MILESIMAS},
+    "movimientos_diarios": {"ingreso_total": MILESIMAS, "salida_total": MILESIMAS},
+    "stock_snapshot_lineas": {"cantidad": MILESIMAS},
+    "alertas_stock": {"cantidad": MILESIMAS, "minimo": MILESIMAS},
+    "alertas_stock_transiciones": {"cantidad": MILESIMAS, "minimo": MILESIMAS},
+}
+
+
+def _alertas_en_milisegundos(c: sqlite3.Connection) -> None:
+    """alertas_stock.desde y alertas_stock_transiciones.ts pasan a ms enteros, y los triggers los escriben así"""
+    _recrear_tabla(c, "alertas_stock", {"desde": _a_ms("desde")})
+    _recrear_tabla(c, "alertas_stock_transiciones", {"ts": _TS_A_MS})
+    for trigger in ("stock_alerta_ai", "stock_alerta_au", "productos_alerta_ai", "productos_alerta_au"):
+        c.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    c.execute(f"CREATE TRIGGER stock_alerta_ai AFTER INSERT ON stock BEGIN {_sql_alerta_stock(_AHORA_MS)} END")
+    c.execute("CREATE TRIGGER stock_alerta_au AFTER UPDATE OF cantidad, minimo ON stock "
+              f"BEGIN {_sql_alerta_stock(_AHORA_MS)} END")
+    c.execute(_sql_productos_alerta_ai(_AHORA_MS))
+    c.execute(_sql_productos_alerta_au(_AHORA_MS))
+
+
+def _cantidades_en_punto_fijo(c: sqlite3.Connection) -> None:
+    """Cantidades y precios REAL -> enteros (ver domain/unidades.py)"""
+    for tabla, columnas in COLUMNAS_PUNTO_FIJO.items():
+        _recrear_tabla(c, tabla, {col: _punto_fijo(col, escala) for col, escala in columnas.items()})
+    _en_archivos(c, lambda a: _recrear_tabla(a, "movimientos", {"cantidad": _punto_fijo("cantidad", MILESIMAS)}))
+
+
+MIGRACIONES: List[Migracion] = [
+    Migracion(
+        version=1,
+        descripcion="Esquema inicial",
+        sql=(
+            # Usuarios
+            """
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                pw_hash TEXT NOT NULL,
+                rol TEXT NOT NULL CHECK(rol IN ('ADMIN','ENCARGADO','VENDEDOR')),
+                activo INTEGER NOT NULL DEFAULT 1
+            );
+            """,
+            # Tiendas
+            """
+            CREATE TABLE IF NOT EXISTS tiendas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL UNIQUE,
+                direccion TEXT,
+                telefono TEXT,
+                email TEXT,
+                responsable_id INTEGER,
+                FOREIGN KEY(responsable_id) REFERENCES empleados(id) ON DELETE SET NULL
+            );
+            """,
+            # Productos
+            """
+            CREATE TABLE IF NOT EXISTS productos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sku TEXT NOT NULL UNIQUE,
+                nombre TEXT NOT NULL,
+                descripcion TEXT,
+                unidad TEXT NOT NULL,
+                precio_unit REAL NOT NULL CHECK(precio_unit >= 0),
+                categoria TEXT,
+                proveedor TEXT,
+                stock_minimo INTEGER DEFAULT 0 CHECK(stock_minimo >= 0),
+                activo INTEGER DEFAULT 1 CHECK(activo IN (0,1)),
+                tienda_id INTEGER NOT NULL,
+                FOREIGN KEY(tienda_id) REFERENCES tiendas(id) ON DELETE CASCADE
+            );
+            """,
+            # Stock
+            """
+            CREATE TABLE IF NOT EXISTS stock (
+                tienda_id INTEGER NOT NULL,
+                producto_id INTEGER NOT NULL,
+                cantidad REAL NOT NULL DEFAULT 0 CHECK(cantidad >= 0),
+                minimo REAL NOT NULL DEFAULT 0 CHECK(minimo >= 0),
+                PRIMARY KEY(tienda_id, producto_id),
+                FOREIGN KEY(tienda_id) REFERENCES tiendas(id) ON DELETE CASCADE,
+                FOREIGN KEY(producto_id) REFERENCES productos(id) ON DELETE CASCADE
+            );
+            """,
+            # Empleados (información adicional de usuarios)
+            """
+            CREATE TABLE IF NOT EXISTS empleados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER NOT NULL UNIQUE,
+                nombres TEXT NOT NULL,
+                apellidos TEXT NOT NULL,
+                dni TEXT NOT NULL UNIQUE,
+                jornada TEXT NOT NULL CHECK(jornada IN ('COMPLETA','MEDIA','PARCIAL')),
+                tienda_id INTEGER NOT NULL,
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+                FOREIGN KEY(tienda_id) REFERENCES tiendas(id)
+            );
+            """,
+            # Movimientos
+            """
+            CREATE TABLE IF NOT EXISTS movimientos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tienda_id INTEGER NOT NULL,
+                producto_id INTEGER NOT NULL,
+                tipo TEXT NOT NULL CHECK(tipo IN ('INGRESO','SALIDA')),
+                cantidad REAL NOT NULL CHECK(cantidad > 0),
+                usuario_id INTEGER NOT NULL,
+                ts TEXT NOT NULL,
+                nota TEXT,
+                FOREIGN KEY(tienda_id) REFERENCES tiendas(id),
+                FOREIGN KEY(producto_id) REFERENCES productos(id),
+                FOREIGN KEY(usuario_id) REFERENCES usuarios(id)
+            );
+            """,
+        ),
+        python=_crear_admin,
+    ),
+    Migracion(
+        version=2,
+        descripcion="Índices de rendimiento para movimientos, productos, stock y empleados",
+        sql=(
+            # Historial por tienda: WHERE tienda_id = ? ORDER BY ts DESC LIMIT ?
+            "CREATE INDEX IF NOT EXISTS idx_movimientos_tienda_ts ON movimientos(tienda_id, ts)",
+            # Historial global: ORDER BY ts DESC LIMIT ?
+            "CREATE INDEX IF NOT EXISTS idx_movimientos_ts ON movimientos(ts)",
+            "CREATE INDEX IF NOT EXISTS idx_movimientos_producto ON movimientos(producto_id)",
+            # Catálogo por tienda y listado ordenado por nombre
+            "CREATE INDEX IF NOT EXISTS idx_productos_tienda_nombre ON productos(tienda_id, nombre)",
+            "CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre)",
+            # Listado de empleados ordenado y filtrado por tienda
+            "CREATE INDEX IF NOT EXISTS idx_empleados_apellidos ON empleados(apellidos, nombres)",
+            "CREATE INDEX IF NOT EXISTS idx_empleados_tienda ON empleados(tienda_id, apellidos, nombres)",
+        ),
+    ),
+    Migracion(
+        version=3,
+        descripcion="Búsqueda de texto completo (FTS5) de productos",
+        python=_crear_productos_fts,
+    ),
+    Migracion(
+        version=4,
+        descripcion="Columnas normalizadas (sin tildes ni mayúsculas) para búsquedas",
+        python=_crear_columnas_normalizadas,
+    ),
+    Migracion(
+        version=5,
+        descripcion="Alertas de stock materializadas con historial de transiciones",
+        sql=(
+            # Solo las filas en alerta (BAJO MINIMO / SIN STOCK); volver a OK borra la fila
+            """
+            CREATE TABLE IF NOT EXISTS alertas_stock (
+                tienda_id INTEGER NOT NULL,
+                producto_id INTEGER NOT NULL,
+                estado TEXT NOT NULL CHECK(estado IN ('BAJO MINIMO','SIN STOCK')),
+                cantidad REAL NOT NULL,
+                minimo REAL NOT NULL,
+                desde TEXT NOT NULL,
+                PRIMARY KEY(tienda_id, producto_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS alertas_stock_transiciones (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tienda_id INTEGER NOT NULL,
+                producto_id INTEGER NOT NULL,
+                estado_anterior TEXT,
+                estado_nuevo TEXT NOT NULL,
+                cantidad REAL NOT NULL,
+                minimo REAL NOT NULL,
+                ts TEXT NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_alertas_transiciones_tienda_ts "
+            "ON alertas_stock_transiciones(tienda_id, ts)",
+            "CREATE INDEX IF NOT EXISTS idx_alertas_transiciones_ts ON alertas_stock_transiciones(ts)",
+            f"""
+            INSERT OR IGNORE INTO alertas_stock(tienda_id, producto_id, estado, cantidad, minimo, desde)
+            SELECT tienda_id, producto_id, estado, cantidad, minimo, datetime('now') FROM (
+                SELECT p.tienda_id, p.id AS producto_id, IFNULL(s.cantidad,0) AS cantidad,
+                       IFNULL(s.minimo,0) AS minimo,
+                       {_estado_stock("IFNULL(s.cantidad,0)", "IFNULL(s.minimo,0)")} AS estado
+                FROM productos p
+                JOIN tiendas t ON t.id = p.tienda_id
+                LEFT JOIN stock s ON s.tienda_id = p.tienda_id AND s.producto_id = p.id
+            ) WHERE estado <> 'OK'
+            """,
+            f"CREATE TRIGGER IF NOT EXISTS stock_alerta_ai AFTER INSERT ON stock BEGIN {_sql_alerta_stock()} END",
+            "CREATE TRIGGER IF NOT EXISTS stock_alerta_au AFTER UPDATE OF cantidad, minimo ON stock "
+            f"BEGIN {_sql_alerta_stock()} END",
+            # Un producto nuevo empieza sin stock en su tienda
+            _sql_productos_alerta_ai(),
+            """
+            CREATE TRIGGER IF NOT EXISTS productos_alerta_ad AFTER DELETE ON productos BEGIN
+                DELETE FROM alertas_stock WHERE tienda_id = old.tienda_id AND producto_id = old.id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS tiendas_alerta_ad AFTER DELETE ON tiendas BEGIN
+                DELETE FROM alertas_stock WHERE tienda_id = old.id;
+            END
+            """,
+        ),
+    ),
+    Migracion(
+        version=6,
+        descripcion="Resumen diario de movimientos por tienda y producto",
+        python=crear_resumen_diario,
+    ),
+    Migracion(
+        version=7,
+        descripcion="Fotos periódicas del stock para consultas a una fecha",
+        sql=(
+            # ultimo_mov_id: la foto incluye exactamente los movimientos con id <= este valor
+            """
+            CREATE TABLE IF NOT EXISTS stock_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                ultimo_mov_id INTEGER NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_stock_snapshots_ts ON stock_snapshots(ts)",
+            """
+            CREATE TABLE IF NOT EXISTS stock_snapshot_lineas (
+                snapshot_id INTEGER NOT NULL,
+                tienda_id INTEGER NOT NULL,
+                producto_id INTEGER NOT NULL,
+                cantidad REAL NOT NULL,
+                PRIMARY KEY(snapshot_id, tienda_id, producto_id),
+                FOREIGN KEY(snapshot_id) REFERENCES stock_snapshots(id) ON DELETE CASCADE
+            )
+            """,
+        ),
+    ),
+    Migracion(
+        version=8,
+        descripcion="Alertas de stock: seguir al producto cuando cambia de tienda",
+        sql=(
+            _sql_productos_alerta_au(),
+        ),
+    ),
+    Migracion(
+        version=9,
+        descripcion="Índice para el kardex por tienda y producto",
+        sql=(
+            # Kardex: WHERE tienda_id = ? AND producto_id = ? ORDER BY ts, id
+            "CREATE INDEX IF NOT EXISTS idx_movimientos_tienda_producto_ts "
+            "ON movimientos(tienda_id, producto_id, ts)",
+        ),
+    ),
+    Migracion(
+        version=10,
+        descripcion="Registro de archivos anuales de movimientos",
+        sql=(
+            # Años movidos a bases separadas (ver infra/archivo.py)
+            """
+            CREATE TABLE IF NOT EXISTS archivos_movimientos (
+                anio INTEGER PRIMARY KEY,
+                ruta TEXT NOT NULL,
+                filas INTEGER NOT NULL,
+                archivado_en TEXT NOT NULL
+            )
+            """,
+        ),
+    ),
+    Migracion(
+        version=11,
+        descripcion="Marcas de tiempo de movimientos y fotos en milisegundos enteros",
+        python=_ts_en_milisegundos,
+    ),
+    Migracion(
+        version=12,
+        descripcion="Cantidades en milésimas y precios en centavos (enteros)",
+        python=_cantidades_en_punto_fijo,
+    ),
+    Migracion(
+        version=13,
+        descripcion="Columnas normalizadas escritas por los repositorios, sin triggers",
+        python=_norm_sin_triggers,
+    ),
+    Migracion(
+        version=14,
+        descripcion="Índices de texto completo de tiendas y empleados",
+        python=_crear_fts_texto,
+    ),
+    Migracion(
+        version=15,
+        descripcion="Marcas de tiempo de alertas en milisegundos enteros",
+        python=_alertas_en_milisegundos,
+    ),
+]
+
+ULTIMA_VERSION = MIGRACIONES[-1].version
+
+
+def version_actual(c: sqlite3.Connection) -> int:
+    return c.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pendientes(c: sqlite3.Connection) -> List[Migracion]:
+    actual = version_actual(c)
+    return [m for m in MIGRACIONES if m.version > actual]
+
+
+def _aplicar(c: sqlite3.Connection, m: Migracion) -> bool:
+    """Aplica una migración en su propia transacción. Devuelve False si otro proceso ya la aplicó"""
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        # Releer con el lock tomado: otra terminal pudo migrar mientras tanto
+        if version_actual(c) >= m.version:
+            c.rollback()
+            return False
+        for stmt in m.sql:
+            c.execute(stmt)
+        if m.python is not None:
+            m.python(c)
+        c.execute(f"PRAGMA user_version = {int(m.version)}")
+        c.commit()
+        return True
+    except BaseException:
+        c.rollback()
+        raise
+
+
+def migrar(c: sqlite3.Connection, dry_run: bool = False) -> List[Migracion]:
+    """Lleva el esquema a ULTIMA_VERSION.
+
+    Devuelve las migraciones aplicadas o, con ``dry_run``, las que se aplicarían.
+    """
+    # Camino rápido: esquema al día, sin DDL
+    if version_actual(c) >= ULTIMA_VERSION:
+        return []
+    por_aplicar = pendientes(c)
+    if dry_run:
+        return por_aplicar
+    if c.in_transaction:
+        c.commit()
+    return [m for m in por_aplicar if _aplicar(c, m)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .db import DB_PATH, get_conn
+
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de inventario")
+    parser.add_argument("--db", default=None, help=f"Ruta de la base de datos (por defecto {DB_PATH})")
+    parser.add_argument("--dry-run", action="store_true", help="Solo lista las migraciones pendientes")
+    args = parser.parse_args(argv)
+
+    with get_conn(args.db) as c:
+        print(f"Versión actual: {version_actual(c)} / última: {ULTIMA_VERSION}")
+        for m in migrar(c, dry_run=args.dry_run):
+            prefijo = "Pendiente" if args.dry_run else "Aplicada"
+            print(f"  {prefijo} v{m.version}: {m.descripcion}")
+
+
+if __name__ == "__main__":
+    main()
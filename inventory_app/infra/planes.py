@@ -0,0 +1,217 @@
+# ==============================
+# File: inventory_app/infra/planes.py
+# ==============================
+"""
+Verificación de planes de ejecución de las consultas críticas.
+
+Construye el esquema completo en una base en memoria y revisa con
+``EXPLAIN QUERY PLAN`` que ninguna consulta crítica haga un SCAN de tabla
+completa ni ordene con un B-tree temporal, y que use el índice que la respalda.
+
+Las aserciones corren con la suite (``tests/test_planes.py``); el módulo sigue
+siendo ejecutable para revisarlas a mano: ``python -m inventory_app.infra.planes``
+(sale con código 1 si hay regresiones).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import re
+import sqlite3
+import sys
+
+from .migrations import migrar
+from .sqlite_repos import (
+    SQL_ALERTAS_TIENDA,
+    SQL_BUSCAR_EMPLEADOS,
+    SQL_BUSCAR_PRODUCTOS_FTS,
+    SQL_BUSCAR_TIENDAS,
+    SQL_KARDEX,
+    SQL_LISTAR_EMPLEADOS,
+    SQL_LISTAR_EMPLEADOS_TIENDA,
+    SQL_LISTAR_TIENDAS_DETALLE,
+    SQL_MOVIMIENTOS_RECIENTES,
+    SQL_MOVIMIENTOS_RECIENTES_CURSOR,
+    SQL_MOVIMIENTOS_TIENDA,
+    SQL_MOVIMIENTOS_TIENDA_CURSOR,
+    SQL_OBTENER_STOCK,
+    SQL_REPORTE_STOCK_TIENDA,
+    SQL_SNAPSHOT_ANTERIOR,
+    SQL_SALDO_DESDE_SNAPSHOT,
+    SQL_TRANSICIONES,
+    SQL_TRANSICIONES_TIENDA,
+    _filtro_prefijo,
+    _filtro_texto,
+    sql_reporte_stock,
+    sql_resumen_movimientos,
+    sql_stock_al,
+    sql_valorizacion,
+)
+
+
+@dataclass(frozen=True)
+class ConsultaCritica:
+    nombre: str
+    sql: str
+    params: Tuple = ()
+    indices: Tuple[str, ...] = ()  # índices que el plan debe usar
+    requiere: Optional[str] = None  # tabla opcional (p. ej. FTS5) sin la cual se omite
+    ordena_resultado: bool = False  # ordenar el conjunto ya filtrado (p. ej. por relevancia) es aceptable
+
+
+def _busqueda_prefijo(nombre: str, tabla: str, columnas: Tuple[str, ...], orden: str) -> ConsultaCritica:
+    condicion, params = _filtro_prefijo(columnas, "abc")
+    return ConsultaCritica(nombre, f"SELECT * FROM {tabla} WHERE {condicion} ORDER BY {orden}",
+                           tuple(params), tuple(f"idx_{tabla}_{col}" for col in columnas),
+                           ordena_resultado=True)
+
+
+def _busqueda_texto(nombre: str, sql: str, tabla: str, columnas_norm: Tuple[str, ...]) -> List[ConsultaCritica]:
+    """La búsqueda por texto de ``tabla`` con su índice FTS5 y, sin él, con los índices *_norm"""
+    consultas = []
+    for fts in (True, False):
+        condicion, params = _filtro_texto(f"{tabla}_fts", "id", columnas_norm, "abc", fts)
+        indices = ("VIRTUAL TABLE INDEX 0:M",) if fts else tuple(f"idx_{tabla}_{col}" for col in columnas_norm)
+        consultas.append(ConsultaCritica(nombre if fts else f"{nombre} sin FTS", sql.format(condicion=condicion),
+                                         tuple(params), indices, f"{tabla}_fts" if fts else None,
+                                         ordena_resultado=True))
+    return consultas
+
+
+CONSULTAS_CRITICAS: List[ConsultaCritica] = [
+    ConsultaCritica("movimientos por tienda", SQL_MOVIMIENTOS_TIENDA, (1, 200),
+                    ("idx_movimientos_tienda_ts",)),
+    ConsultaCritica("movimientos recientes", SQL_MOVIMIENTOS_RECIENTES, (200,),
+                    ("idx_movimientos_ts",)),
+    ConsultaCritica("página de movimientos por tienda", SQL_MOVIMIENTOS_TIENDA_CURSOR,
+                    (1, 1704067200000, 1000, 100), ("idx_movimientos_tienda_ts",)),
+    ConsultaCritica("página de movimientos recientes", SQL_MOVIMIENTOS_RECIENTES_CURSOR,
+                    (1704067200000, 1000, 100), ("idx_movimientos_ts",)),
+    ConsultaCritica("obtener stock", SQL_OBTENER_STOCK, (1, 1),
+                    ("sqlite_autoindex_stock_1",)),
+    # Reporte de stock: cada tienda recorre solo su catálogo, ya en orden de nombre
+    ConsultaCritica("reporte de stock de todas las tiendas", *sql_reporte_stock(),
+                    ("idx_productos_tienda_nombre", "sqlite_autoindex_stock_1")),
+    ConsultaCritica("reporte de stock de una tienda", SQL_REPORTE_STOCK_TIENDA, (1,),
+                    ("idx_productos_tienda_nombre", "sqlite_autoindex_stock_1")),
+    # Búsqueda dentro del reporte: solo las coincidencias, ordenadas después
+    ConsultaCritica("búsqueda en reporte de stock", *sql_reporte_stock(texto="arroz", fts=True),
+                    ("VIRTUAL TABLE INDEX 0:M", "sqlite_autoindex_stock_1"), requiere="productos_fts",
+                    ordena_resultado=True),
+    ConsultaCritica("búsqueda en reporte de stock sin FTS", *sql_reporte_stock(texto="arroz"),
+                    ("idx_productos_sku_norm", "idx_productos_nombre_norm"), ordena_resultado=True),
+    # Alertas: se recorren solo las filas en alerta de la tienda
+    ConsultaCritica("alertas de una tienda", SQL_ALERTAS_TIENDA, (1,),
+                    ("sqlite_autoindex_alertas_stock_1",), ordena_resultado=True),
+    ConsultaCritica("transiciones de stock", SQL_TRANSICIONES, (200,),
+                    ("idx_alertas_transiciones_ts",)),
+    ConsultaCritica("transiciones de stock por tienda", SQL_TRANSICIONES_TIENDA, (1, 200),
+                    ("idx_alertas_transiciones_tienda_ts",)),
+    # Analítica histórica desde el resumen diario, nunca desde movimientos
+    ConsultaCritica("resumen de movimientos por rango", *sql_resumen_movimientos("2024-01-01", "2024-01-31"),
+                    ("sqlite_autoindex_movimientos_diarios_1",), ordena_resultado=True),
+    ConsultaCritica("resumen de movimientos de un producto",
+                    *sql_resumen_movimientos("2024-01-01", "2024-01-31", 1, 1, por_dia=True),
+                    ("idx_movimientos_diarios_tienda_producto",)),
+    # Stock a una fecha: foto anterior + solo los movimientos posteriores a ella
+    ConsultaCritica("foto de stock anterior", SQL_SNAPSHOT_ANTERIOR, (1706745600000,),
+                    ("idx_stock_snapshots_ts",)),
+    ConsultaCritica("stock a una fecha por tienda",
+                    *sql_stock_al(1706745600000, {"id": 1, "ts": 1706659200000, "ultimo_mov_id": 1000}, 1),
+                    ("idx_movimientos_tienda_ts", "sqlite_autoindex_stock_snapshot_lineas_1"),
+                    ordena_resultado=True),
+    # Kardex: los movimientos del producto en su tienda, ya en orden (ts, id)
+    ConsultaCritica("kardex", SQL_KARDEX, (0, 1, 1, 1706745600000, 1704067200000, 0, 500),
+                    ("idx_movimientos_tienda_producto_ts",)),
+    ConsultaCritica("saldo desde la foto", SQL_SALDO_DESDE_SNAPSHOT, (1, 1, 1704067200000, 1706745600000, 1000),
+                    ("idx_movimientos_tienda_producto_ts",)),
+    # Valorización de una tienda: solo su catálogo; agrupar exige ordenar los grupos
+    ConsultaCritica("valorización de una tienda", *sql_valorizacion(tienda_id=1),
+                    ("idx_productos_tienda_nombre", "sqlite_autoindex_stock_1"), ordena_resultado=True),
+    ConsultaCritica("producto por sku", "SELECT * FROM productos WHERE sku=?", ("X",),
+                    ("sqlite_autoindex_productos_1",)),
+    ConsultaCritica("listar empleados", SQL_LISTAR_EMPLEADOS, (),
+                    ("idx_empleados_apellidos",)),
+    ConsultaCritica("listar empleados de una tienda", SQL_LISTAR_EMPLEADOS_TIENDA, (1,),
+                    ("idx_empleados_tienda",)),
+    ConsultaCritica("listar tiendas con responsable y totales", SQL_LISTAR_TIENDAS_DETALLE, (),
+                    ("idx_empleados_tienda", "idx_productos_tienda_nombre")),
+    # Búsquedas de filas hijas al eliminar un producto / una tienda
+    ConsultaCritica("movimientos de un producto",
+                    "SELECT 1 FROM movimientos WHERE producto_id=?", (1,),
+                    ("idx_movimientos_producto",)),
+    ConsultaCritica("productos de una tienda",
+                    "SELECT id, nombre FROM productos WHERE tienda_id=? ORDER BY nombre", (1,),
+                    ("idx_productos_tienda_nombre",)),
+    ConsultaCritica("empleados de una tienda",
+                    "SELECT id FROM empleados WHERE tienda_id=? ORDER BY apellidos, nombres", (1,),
+                    ("idx_empleados_tienda",)),
+    # Búsquedas por prefijo sobre columnas normalizadas (un rango por índice)
+    _busqueda_prefijo("búsqueda de productos sin FTS", "productos", ("sku_norm", "nombre_norm"), "nombre"),
+    ConsultaCritica("búsqueda de empleados por DNI",
+                    SQL_BUSCAR_EMPLEADOS.format(condicion=_filtro_prefijo(("dni",), "123")[0]),
+                    tuple(_filtro_prefijo(("dni",), "123")[1]), ("sqlite_autoindex_empleados_2",),
+                    ordena_resultado=True),
+    # Búsquedas por palabra: solo las coincidencias del índice FTS5, ordenadas después
+    *_busqueda_texto("búsqueda de tiendas", SQL_BUSCAR_TIENDAS, "tiendas", ("nombre_norm",)),
+    *_busqueda_texto("búsqueda de empleados", SQL_BUSCAR_EMPLEADOS, "empleados", ("nombres_norm", "apellidos_norm")),
+    # Ordenar por relevancia exige ordenar las coincidencias, pero no recorrer el catálogo
+    ConsultaCritica("búsqueda de productos", SQL_BUSCAR_PRODUCTOS_FTS, ('"arroz"*',),
+                    ("VIRTUAL TABLE INDEX 0:M",), requiere="productos_fts", ordena_resultado=True),
+]
+
+_SCAN_COMPLETO = re.compile(r"^SCAN \w+$")
+
+
+def plan(c: sqlite3.Connection, sql: str, params: Tuple = ()) -> List[str]:
+    return [row[3] for row in c.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def problemas_de_plan(detalles: List[str], indices: Tuple[str, ...] = (),
+                      ordena_resultado: bool = False) -> List[str]:
+    problemas = []
+    for d in detalles:
+        if _SCAN_COMPLETO.match(d.strip()):
+            problemas.append(f"recorrido completo: {d}")
+        if "TEMP B-TREE" in d and not ordena_resultado:
+            problemas.append(f"ordenamiento temporal: {d}")
+    texto = " | ".join(detalles)
+    for idx in indices:
+        if idx not in texto:
+            problemas.append(f"no usa {idx}")
+    return problemas
+
+
+def base_de_planes() -> sqlite3.Connection:
+    """Base en memoria con el esquema completo"""
+    c = sqlite3.connect(":memory:")
+    migrar(c)
+    return c
+
+
+def problemas_de_consulta(c: sqlite3.Connection, consulta: ConsultaCritica) -> Optional[List[str]]:
+    """Problemas del plan de ``consulta`` (None si falta la tabla opcional que requiere)"""
+    if consulta.requiere and not c.execute(
+        "SELECT 1 FROM sqlite_master WHERE name=?", (consulta.requiere,)
+    ).fetchone():
+        return None
+    return problemas_de_plan(plan(c, consulta.sql, consulta.params), consulta.indices, consulta.ordena_resultado)
+
+
+def verificar_planes(c: Optional[sqlite3.Connection] = None) -> List[str]:
+    """Devuelve la lista de regresiones encontradas (vacía si todo está bien)"""
+    c = c or base_de_planes()
+    return [f"{consulta.nombre}: {p}" for consulta in CONSULTAS_CRITICAS
+            for p in problemas_de_consulta(c, consulta) or ()]
+
+
+def main() -> int:
+    errores = verificar_planes()
+    for e in errores:
+        print(f"REGRESIÓN {e}")
+    if not errores:
+        print(f"OK: {len(CONSULTAS_CRITICAS)} consultas críticas usan índices")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
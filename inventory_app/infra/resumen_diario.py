@@ -0,0 +1,156 @@
+# ==============================
+# File: inventory_app/infra/resumen_diario.py
+# ==============================
+"""
+Resumen diario de movimientos por (fecha, tienda, producto).
+
+La tabla ``movimientos_diarios`` la mantiene un trigger sobre ``movimientos``
+dentro de la misma transacción que registra el movimiento. Este módulo la
+reconstruye a partir de los movimientos crudos (datos previos a la migración
+o tras una corrección manual).
+
+Uso: ``python -m inventory_app.infra.resumen_diario [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]``
+"""
+from __future__ import annotations
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+import argparse
+import sqlite3
+
+from ..domain.tiempo import dia_ms
+
+# Día (UTC) de un movimiento; ts está en milisegundos desde la época (migración 11)
+_FECHA = "date({m}.ts / 1000, 'unixepoch')"
+# Hasta la migración 11 ts era texto 'AAAA-MM-DD HH:MM:SS'; las filas con ts ilegible no aportan
+_FECHA_TEXTO = "date({m}.ts)"
+
+# Fila del resumen que aporta un movimiento (los alias coinciden con las columnas)
+_APORTE = """
+    CASE WHEN {m}.tipo = 'INGRESO' THEN {m}.cantidad ELSE 0 END AS ingreso_total,
+    {m}.tipo = 'INGRESO' AS ingreso_movs,
+    CASE WHEN {m}.tipo = 'SALIDA' THEN {m}.cantidad ELSE 0 END AS salida_total,
+    {m}.tipo = 'SALIDA' AS salida_movs
+"""
+
+SQL_CREAR_TABLA = """
+    CREATE TABLE IF NOT EXISTS movimientos_diarios (
+        fecha TEXT NOT NULL,
+        tienda_id INTEGER NOT NULL,
+        producto_id INTEGER NOT NULL,
+        ingreso_total REAL NOT NULL DEFAULT 0,
+        ingreso_movs INTEGER NOT NULL DEFAULT 0,
+        salida_total REAL NOT NULL DEFAULT 0,
+        salida_movs INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY(fecha, tienda_id, producto_id)
+    )
+"""
+
+
+def _sql_trigger(fecha: str) -> str:
+    """Trigger que suma cada movimiento nuevo al día que da la expresión ``fecha`` (nunca NULL)"""
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS movimientos_diarios_ai AFTER INSERT ON movimientos BEGIN
+        INSERT INTO movimientos_diarios(fecha, tienda_id, producto_id,
+                                        ingreso_total, ingreso_movs, salida_total, salida_movs)
+        SELECT {fecha.format(m="new")}, new.tienda_id, new.producto_id, {_APORTE.format(m="new")}
+        WHERE {fecha.format(m="new")} IS NOT NULL
+        ON CONFLICT(fecha, tienda_id, producto_id) DO UPDATE SET
+            ingreso_total = ingreso_total + excluded.ingreso_total,
+            ingreso_movs = ingreso_movs + excluded.ingreso_movs,
+            salida_total = salida_total + excluded.salida_total,
+            salida_movs = salida_movs + excluded.salida_movs;
+    END
+"""
+
+
+SQL_CREAR_TRIGGER = _sql_trigger(_FECHA)
+
+
+def _rango(columna: str, desde: Optional[str], hasta: Optional[str], en_ms: bool = False) -> Tuple[str, List]:
+    """Condición para el rango de días [desde, hasta] (ambos opcionales, inclusive).
+
+    ``en_ms``: la columna es una marca en milisegundos en lugar de una fecha 'AAAA-MM-DD'.
+    """
+    condiciones, params = [] if en_ms else [f"date({columna}) IS NOT NULL"], []
+    if desde:
+        condiciones.append(f"{columna} >= ?")
+        params.append(dia_ms(desde) if en_ms else desde)
+    if hasta:
+        # Se compara contra el inicio del día siguiente
+        siguiente = date.fromisoformat(hasta[:10]) + timedelta(days=1)
+        condiciones.append(f"{columna} < ?")
+        params.append(dia_ms(siguiente) if en_ms else siguiente.isoformat())
+    return (" WHERE " + " AND ".join(condiciones)) if condiciones else "", params
+
+
+def reconstruir(c: sqlite3.Connection, desde: Optional[str] = None, hasta: Optional[str] = None,
+                fuente: str = "movimientos") -> int:
+    """Recalcula el resumen del rango desde ``fuente``; devuelve las filas generadas.
+
+    Debe llamarse dentro de una transacción de escritura para no mezclarse con
+    movimientos que se registren mientras tanto. Con años archivados, ``fuente``
+    es la vista histórica (ver infra/archivo.py).
+    """
+    filtro, params = _rango("fecha", desde, hasta)
+    c.execute("DELETE FROM movimientos_diarios" + filtro, params)
+    filtro, params = _rango("m.ts", desde, hasta, en_ms=True)
+    cur = c.execute(f"""
+        INSERT INTO movimientos_diarios(fecha, tienda_id, producto_id,
+                                        ingreso_total, ingreso_movs, salida_total, salida_movs)
+        SELECT fecha, tienda_id, producto_id,
+               SUM(ingreso_total), SUM(ingreso_movs), SUM(salida_total), SUM(salida_movs)
+        FROM (
+            SELECT {_FECHA.format(m="m")} AS fecha, m.tienda_id, m.producto_id, {_APORTE.format(m="m")}
+            FROM {fuente} m{filtro}
+        )
+        GROUP BY fecha, tienda_id, producto_id
+    """, params)
+    return cur.rowcount
+
+
+def crear_resumen_diario(c: sqlite3.Connection) -> None:
+    """Migración 6: tabla, índice por tienda/producto, trigger y carga inicial.
+
+    Corre con ts todavía en texto, así que usa la fecha de texto; la migración 11
+    recrea el trigger con ts en milisegundos y reconstruye el resumen.
+    """
+    c.execute(SQL_CREAR_TABLA)
+    # "¿Cuánto arroz vendió la tienda X el mes pasado?": tienda/producto fijos, rango de fechas
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_movimientos_diarios_tienda_producto "
+        "ON movimientos_diarios(tienda_id, producto_id, fecha)"
+    )
+    c.execute(_sql_trigger(_FECHA_TEXTO))
+    c.execute("DELETE FROM movimientos_diarios")
+    c.execute(f"""
+        INSERT INTO movimientos_diarios(fecha, tienda_id, producto_id,
+                                        ingreso_total, ingreso_movs, salida_total, salida_movs)
+        SELECT fecha, tienda_id, producto_id,
+               SUM(ingreso_total), SUM(ingreso_movs), SUM(salida_total), SUM(salida_movs)
+        FROM (
+            SELECT {_FECHA_TEXTO.format(m="m")} AS fecha, m.tienda_id, m.producto_id, {_APORTE.format(m="m")}
+            FROM movimientos m WHERE {_FECHA_TEXTO.format(m="m")} IS NOT NULL
+        )
+        GROUP BY fecha, tienda_id, producto_id
+    """)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .archivo import fuente_movimientos
+    from .db import DB_PATH, get_conn, transaccion
+
+    parser = argparse.ArgumentParser(description="Reconstruye el resumen diario de movimientos")
+    parser.add_argument("--db", default=None, help=f"Ruta de la base de datos (por defecto {DB_PATH})")
+    parser.add_argument("--desde", default=None, help="Primera fecha a recalcular (AAAA-MM-DD)")
+    parser.add_argument("--hasta", default=None, help="Última fecha a recalcular (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+
+    with get_conn(args.db) as c:
+        fuente = fuente_movimientos(c, dia_ms(args.desde) if args.desde else None)
+        with transaccion(args.db) as c:
+            filas = reconstruir(c, args.desde, args.hasta, fuente)
+    print(f"Resumen diario reconstruido: {filas} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,437 @@
 # File: inventory_app/infra/sqlite_repos.py
 # ==============================
 from __future__ import annotations
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+import re
 import sqlite3
 
-from ..domain.models import Usuario, Tienda, Producto, Empleado
+from ..domain.models import Usuario, Tienda, TiendaDetalle, Producto, Empleado, EmpleadoDetalle, LineaMovimiento
 from ..domain.interfaces import RepoUsuarios, RepoTiendas, RepoProductos, RepoInventario, RepoEmpleados
-from .db import get_conn, _hash_pw
+from ..domain.tiempo import ahora_ms, dia_ms
+from ..domain.unidades import a_centavos, a_milesimas, de_centavos, de_importe, de_milesimas
+from .db import get_conn, transaccion, _hash_pw
+from .memo import escribe, memoizar, memoizar_por_ids
+from .texto import normalizar, rango_prefijo
+from . import resumen_diario
+from .archivo import fuente_movimientos
+
+
+# Consultas críticas compartidas con infra/planes.py, que verifica sus planes de ejecución
+_SQL_EMPLEADOS_DETALLE = """
+    SELECT e.*, u.username, u.rol, u.activo, t.nombre as tienda_nombre
+    FROM empleados e
+    LEFT JOIN usuarios u ON e.usuario_id = u.id
+    LEFT JOIN tiendas t ON e.tienda_id = t.id
+"""
+SQL_LISTAR_EMPLEADOS = _SQL_EMPLEADOS_DETALLE + " ORDER BY e.apellidos, e.nombres"
+SQL_LISTAR_EMPLEADOS_TIENDA = _SQL_EMPLEADOS_DETALLE + " WHERE e.tienda_id = ? ORDER BY e.apellidos, e.nombres"
+
+# Responsable por LEFT JOIN; los conteos por tienda salen de idx_empleados_tienda
+# e idx_productos_tienda_nombre sin tocar las tablas
+SQL_LISTAR_TIENDAS_DETALLE = """
+    SELECT t.*, r.nombres || ' ' || r.apellidos AS responsable_nombre,
+           (SELECT COUNT(*) FROM empleados e WHERE e.tienda_id = t.id) AS empleados,
+           (SELECT COUNT(*) FROM productos p WHERE p.tienda_id = t.id) AS productos
+    FROM tiendas t
+    LEFT JOIN empleados r ON r.id = t.responsable_id
+    ORDER BY t.nombre
+"""
+
+SQL_OBTENER_STOCK = "SELECT cantidad, minimo FROM stock WHERE tienda_id=? AND producto_id=?"
+
+# Cada tienda solo con su propio catálogo: productos -> tienda dueña -> su fila de stock
+_SQL_REPORTE_STOCK_BASE = """
+    SELECT t.id AS tienda_id, t.nombre AS tienda_nombre, p.id AS producto_id,
+           p.sku, p.nombre, p.unidad, IFNULL(s.cantidad,0) AS cantidad, IFNULL(s.minimo,0) AS minimo,
+           CASE WHEN IFNULL(s.cantidad,0) = 0 THEN 'SIN STOCK'
+                WHEN IFNULL(s.cantidad,0) <= IFNULL(s.minimo,0) THEN 'BAJO MINIMO'
+                ELSE 'OK' END AS estado
+    FROM productos p
+    JOIN tiendas t ON t.id = p.tienda_id
+    LEFT JOIN stock s ON s.tienda_id = p.tienda_id AND s.producto_id = p.id
+"""
+SQL_REPORTE_STOCK_TIENDA = _SQL_REPORTE_STOCK_BASE + " WHERE p.tienda_id = ? ORDER BY p.nombre"
+
+# Alertas materializadas (migración 5): se leen solo las filas en alerta
+_SQL_ALERTAS_BASE = """
+    SELECT a.tienda_id, t.nombre AS tienda_nombre, a.producto_id, p.sku, p.nombre, p.unidad,
+           a.cantidad, a.minimo, a.estado, a.desde
+    FROM alertas_stock a
+    JOIN productos p ON p.id = a.producto_id
+    JOIN tiendas t ON t.id = a.tienda_id
+"""
+SQL_ALERTAS = _SQL_ALERTAS_BASE + " ORDER BY t.nombre, t.id, p.nombre"
+SQL_ALERTAS_TIENDA = _SQL_ALERTAS_BASE + " WHERE a.tienda_id = ? ORDER BY p.nombre"
+
+_SQL_TRANSICIONES_BASE = """
+    SELECT x.id, x.tienda_id, t.nombre AS tienda_nombre, x.producto_id, p.sku, p.nombre,
+           x.estado_anterior, x.estado_nuevo, x.cantidad, x.minimo, x.ts
+    FROM alertas_stock_transiciones x
+    LEFT JOIN productos p ON p.id = x.producto_id
+    LEFT JOIN tiendas t ON t.id = x.tienda_id
+"""
+SQL_TRANSICIONES = _SQL_TRANSICIONES_BASE + " ORDER BY x.ts DESC, x.id DESC LIMIT ?"
+SQL_TRANSICIONES_TIENDA = (
+    _SQL_TRANSICIONES_BASE + " WHERE x.tienda_id = ? ORDER BY x.ts DESC, x.id DESC LIMIT ?"
+)
+
+def sql_resumen_movimientos(desde: str, hasta: str, tienda_id: Optional[int] = None,
+                            producto_id: Optional[int] = None,
+                            por_dia: bool = False) -> Tuple[str, List[Any]]:
+    """Totales de ingresos/salidas entre dos fechas (inclusive) leídos de movimientos_diarios"""
+    condiciones = ["d.fecha >= ?", "d.fecha <= ?"]
+    params: List[Any] = [desde, hasta]
+    if tienda_id is not None:
+        condiciones.append("d.tienda_id = ?")
+        params.append(tienda_id)
+    if producto_id is not None:
+        condiciones.append("d.producto_id = ?")
+        params.append(producto_id)
+    grupo = "d.tienda_id, d.producto_id"
+    if por_dia:
+        grupo = "d.fecha, " + grupo
+    sql = f"""
+        SELECT {"d.fecha, " if por_dia else ""}d.tienda_id, t.nombre AS tienda_nombre,
+               d.producto_id, p.sku, p.nombre,
+               SUM(d.ingreso_total) AS ingreso_total, SUM(d.ingreso_movs) AS ingreso_movs,
+               SUM(d.salida_total) AS salida_total, SUM(d.salida_movs) AS salida_movs
+        FROM movimientos_diarios d
+        LEFT JOIN tiendas t ON t.id = d.tienda_id
+        LEFT JOIN productos p ON p.id = d.producto_id
+        WHERE {" AND ".join(condiciones)}
+        GROUP BY {grupo}
+        ORDER BY {grupo}
+    """
+    return sql, params
+
+
+# Kardex: saldo acumulado con una función de ventana, por páginas (ts, id)
+SQL_KARDEX = """
+    SELECT m.id, m.ts, m.tipo, m.nota, u.username,
+           CASE WHEN m.tipo = 'INGRESO' THEN m.cantidad ELSE 0 END AS entrada,
+           CASE WHEN m.tipo = 'SALIDA' THEN m.cantidad ELSE 0 END AS salida,
+           ? + SUM(CASE WHEN m.tipo = 'INGRESO' THEN m.cantidad ELSE -m.cantidad END)
+                 OVER (ORDER BY m.ts, m.id ROWS UNBOUNDED PRECEDING) AS saldo
+    FROM movimientos m
+    LEFT JOIN usuarios u ON u.id = m.usuario_id
+    WHERE m.tienda_id = ? AND m.producto_id = ? AND m.ts < ? AND (m.ts, m.id) > (?, ?)
+    ORDER BY m.ts, m.id
+    LIMIT ?
+"""
+SQL_SALDO_DESDE_SNAPSHOT = """
+    SELECT IFNULL(SUM(CASE WHEN tipo = 'INGRESO' THEN cantidad ELSE -cantidad END), 0)
+    FROM movimientos
+    WHERE tienda_id = ? AND producto_id = ? AND ts >= ? AND ts < ? AND id > ?
+"""
+
+# Foto de stock más reciente tomada antes de un instante (ms)
+SQL_SNAPSHOT_ANTERIOR = "SELECT id, ts, ultimo_mov_id FROM stock_snapshots WHERE ts < ? ORDER BY ts DESC, id DESC LIMIT 1"
+
+
+def sql_stock_al(limite: int, snapshot: Optional[Dict[str, Any]] = None, tienda_id: Optional[int] = None,
+                 estados: Optional[Iterable[str]] = None, texto: str = "",
+                 fts: bool = False) -> Tuple[str, List[Any]]:
+    """Stock de cada tienda justo antes de ``limite``: foto anterior + movimientos posteriores a ella.
+
+    Solo se leen los movimientos con ts en [foto.ts, limite) e id > foto.ultimo_mov_id;
+    sin foto se reproducen todos. El estado usa el mínimo vigente. ``texto`` filtra
+    como en sql_reporte_stock (``fts`` indica si existe productos_fts).
+    """
+    por_tienda = " AND tienda_id = ?" if tienda_id is not None else ""
+    tienda = [tienda_id] if tienda_id is not None else []
+    params: List[Any] = [snapshot["id"] if snapshot else None, *tienda,
+                         snapshot["ts"] if snapshot else 0, limite,
+                         snapshot["ultimo_mov_id"] if snapshot else 0, *tienda, *tienda]
+    condiciones: List[str] = []
+    if estados is not None:
+        estados = set(estados)
+        desconocidos = estados - set(ESTADOS_STOCK)
+        if desconocidos:
+            raise ValueError(f"Estados de stock desconocidos: {', '.join(sorted(desconocidos))}")
+        condiciones.append(f"estado IN ({', '.join('?' * len(estados))})")
+        params.extend(sorted(estados))
+    if texto and texto.strip():
+        condicion, params_texto = _filtro_sku_nombre("producto_id", ("sku_norm", "nombre_norm"), texto, fts)
+        condiciones.append(condicion)
+        params.extend(params_texto)
+    sql = f"""
+        WITH base AS (
+            SELECT tienda_id, producto_id, cantidad FROM stock_snapshot_lineas
+            WHERE snapshot_id = ?{por_tienda}
+        ), delta AS (
+            SELECT tienda_id, producto_id,
+                   SUM(CASE WHEN tipo = 'INGRESO' THEN cantidad ELSE -cantidad END) AS cantidad
+            FROM movimientos
+            WHERE ts >= ? AND ts < ? AND id > ?{por_tienda}
+            GROUP BY tienda_id, producto_id
+        ), al AS (
+            SELECT t.id AS tienda_id, t.nombre AS tienda_nombre, p.id AS producto_id,
+                   p.sku, p.nombre, p.unidad, p.sku_norm, p.nombre_norm,
+                   IFNULL(b.cantidad,0) + IFNULL(d.cantidad,0) AS cantidad, IFNULL(s.minimo,0) AS minimo
+            FROM productos p
+            JOIN tiendas t ON t.id = p.tienda_id
+            LEFT JOIN base b ON b.tienda_id = p.tienda_id AND b.producto_id = p.id
+            LEFT JOIN delta d ON d.tienda_id = p.tienda_id AND d.producto_id = p.id
+            LEFT JOIN stock s ON s.tienda_id = p.tienda_id AND s.producto_id = p.id
+            WHERE {"p.tienda_id = ?" if tienda else "1"}
+        )
+        SELECT tienda_id, tienda_nombre, producto_id, sku, nombre, unidad, cantidad, minimo, estado FROM (
+            SELECT tienda_id, tienda_nombre, producto_id, sku, nombre, unidad, cantidad, minimo,
+                   CASE WHEN cantidad = 0 THEN 'SIN STOCK'
+                        WHEN cantidad <= minimo THEN 'BAJO MINIMO'
+                        ELSE 'OK' END AS estado,
+                   sku_norm, nombre_norm
+            FROM al
+        )
+        WHERE {" AND ".join(condiciones) or "1"}
+        ORDER BY tienda_nombre, tienda_id, nombre
+    """
+    return sql, params
+
+
+# Filtros y órdenes aceptados por consultar_reporte_stock (nunca se interpola texto del usuario)
+_CONDICIONES_ESTADO = {
+    "SIN STOCK": "IFNULL(s.cantidad,0) = 0",
+    "BAJO MINIMO": "IFNULL(s.cantidad,0) > 0 AND IFNULL(s.cantidad,0) <= IFNULL(s.minimo,0)",
+    "OK": "IFNULL(s.cantidad,0) > 0 AND IFNULL(s.cantidad,0) > IFNULL(s.minimo,0)",
+}
+ESTADOS_STOCK = tuple(_CONDICIONES_ESTADO)
+_ORDEN_REPORTE = {
+    "tienda": "t.nombre, t.id, p.nombre",
+    "producto": "p.nombre, t.nombre",
+    "sku": "p.sku, t.nombre",
+    "stock": "cantidad, p.nombre",
+}
+
+
+def sql_reporte_stock(tienda_id: Optional[int] = None, estados: Optional[Iterable[str]] = None,
+                      texto: str = "", orden: str = "tienda", limit: Optional[int] = None,
+                      fts: bool = False) -> Tuple[str, List[Any]]:
+    """Arma la consulta del reporte de stock filtrado.
+
+    ``estados`` es un subconjunto de ESTADOS_STOCK (None = todos), ``texto`` busca en SKU
+    o nombre sin distinguir tildes (por palabra si ``fts``, es decir, si existe
+    productos_fts; si no, por prefijo) y ``orden`` es una clave de _ORDEN_REPORTE.
+    """
+    if orden not in _ORDEN_REPORTE:
+        raise ValueError(f"Orden de reporte desconocido: {orden} (opciones: {', '.join(_ORDEN_REPORTE)})")
+    condiciones: List[str] = []
+    params: List[Any] = []
+    if tienda_id is not None:
+        condiciones.append("p.tienda_id = ?")
+        params.append(tienda_id)
+    if estados is not None:
+        estados = set(estados)
+        desconocidos = estados - set(ESTADOS_STOCK)
+        if desconocidos:
+            raise ValueError(f"Estados de stock desconocidos: {', '.join(sorted(desconocidos))}")
+        if estados and len(estados) < len(ESTADOS_STOCK):
+            condiciones.append(
+                "(" + " OR ".join(f"({_CONDICIONES_ESTADO[e]})" for e in ESTADOS_STOCK if e in estados) + ")"
+            )
+    if texto and texto.strip():
+        condicion, params_texto = _filtro_sku_nombre("p.id", ("p.sku_norm", "p.nombre_norm"), texto, fts)
+        condiciones.append(condicion)
+        params.extend(params_texto)
+    sql = _SQL_REPORTE_STOCK_BASE
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += f" ORDER BY {_ORDEN_REPORTE[orden]}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+# Valorización: dimensión -> (columnas que devuelve, expresión de agrupación)
+_DIMENSIONES_VALORIZACION = {
+    "tienda": ("t.id AS tienda_id, t.nombre AS tienda_nombre", "t.nombre, t.id"),
+    "categoria": ("p.categoria", "p.categoria"),
+    "proveedor": ("p.proveedor", "p.proveedor"),
+}
+DIMENSIONES_VALORIZACION = tuple(_DIMENSIONES_VALORIZACION)
+
+
+def sql_valorizacion(agrupar_por: Iterable[str] = DIMENSIONES_VALORIZACION,
+                     tienda_id: Optional[int] = None) -> Tuple[str, List[Any]]:
+    """Σ cantidad × precio_unit del stock de cada tienda, agrupado por las dimensiones pedidas.
+
+    El importe sale en milésimas × centavos (entero exacto); ver de_importe.
+    """
+    pedidas = set(agrupar_por)
+    desconocidas = pedidas - set(DIMENSIONES_VALORIZACION)
+    if desconocidas:
+        raise ValueError(f"Dimensiones desconocidas: {', '.join(sorted(desconocidas))}")
+    agrupar_por = [d for d in DIMENSIONES_VALORIZACION if d in pedidas]
+    columnas = "".join(f"{_DIMENSIONES_VALORIZACION[d][0]}, " for d in agrupar_por)
+    grupo = ", ".join(_DIMENSIONES_VALORIZACION[d][1] for d in agrupar_por)
+    sql = f"""
+        SELECT {columnas}COUNT(*) AS productos,
+               SUM(s.cantidad > 0) AS con_stock,
+               IFNULL(SUM(s.cantidad * p.precio_unit), 0) AS valor
+        FROM productos p
+        JOIN tiendas t ON t.id = p.tienda_id
+        LEFT JOIN stock s ON s.tienda_id = p.tienda_id AND s.producto_id = p.id
+    """
+    params: List[Any] = []
+    if tienda_id is not None:
+        sql += " WHERE p.tienda_id = ?"
+        params.append(tienda_id)
+    if grupo:
+        sql += f" GROUP BY {grupo} ORDER BY {grupo}"
+    return sql, params
+
+_SQL_MOVIMIENTOS_BASE = """
+    SELECT m.id, m.producto_id, p.sku, p.nombre as producto_nombre, 
+           m.tipo, m.cantidad, m.usuario_id, u.username, 
+           t.nombre as tienda_nombre, m.ts, m.nota
+    FROM movimientos m
+    JOIN productos p ON m.producto_id = p.id
+    JOIN usuarios u ON m.usuario_id = u.id
+    JOIN tiendas t ON m.tienda_id = t.id
+"""
+
+# Paginación por cursor (ts, id): cada página es un recorrido de rango del índice,
+# sin OFFSET, por profunda que sea
+SQL_MOVIMIENTOS_TIENDA = _SQL_MOVIMIENTOS_BASE + """
+    WHERE m.tienda_id = ?
+    ORDER BY m.ts DESC, m.id DESC LIMIT ?
+"""
+
+SQL_MOVIMIENTOS_TIENDA_CURSOR = _SQL_MOVIMIENTOS_BASE + """
+    WHERE m.tienda_id = ? AND (m.ts, m.id) < (?, ?)
+    ORDER BY m.ts DESC, m.id DESC LIMIT ?
+"""
+
+SQL_MOVIMIENTOS_RECIENTES = _SQL_MOVIMIENTOS_BASE + """
+    ORDER BY m.ts DESC, m.id DESC LIMIT ?
+"""
+
+SQL_MOVIMIENTOS_RECIENTES_CURSOR = _SQL_MOVIMIENTOS_BASE + """
+    WHERE (m.ts, m.id) < (?, ?)
+    ORDER BY m.ts DESC, m.id DESC LIMIT ?
+"""
+
+# Máximo de parámetros por sentencia (SQLite antiguos admiten 999)
+_MAX_PARAMS = 900
+
+# Productos recordados por id: alcanza para la tabla de productos entera
+CATALOGO_MAX_ENTRADAS = 2000
+
+
+def _lotes(items: List[Any], tamano: int) -> Iterable[List[Any]]:
+    for i in range(0, len(items), tamano):
+        yield items[i:i + tamano]
+
+
+def _por_ids(tabla: str, ids: Iterable[int], convertir: Callable[[sqlite3.Row], Any]) -> Dict[int, Any]:
+    """{id: fila convertida} con un ``WHERE id IN (...)`` por lote; los ids inexistentes no aparecen"""
+    ids = list(set(ids))
+    filas: Dict[int, Any] = {}
+    with get_conn() as c:
+        for lote in _lotes(ids, _MAX_PARAMS):
+            marcas = ",".join("?" * len(lote))
+            for r in c.execute(f"SELECT * FROM {tabla} WHERE id IN ({marcas})", lote):
+                filas[r["id"]] = convertir(r)
+    return filas
+
+
+def _expresion_fts(texto: str) -> str:
+    """Convierte texto libre en una consulta FTS5 de prefijos: 'arroz cost' -> '"arroz"* "cost"*'"""
+    return " ".join(f'"{t}"*' for t in re.findall(r"\w+", normalizar(texto)))
+
+
+def _filtro_prefijo(columnas: Tuple[str, ...], texto: str) -> Tuple[str, List[str]]:
+    """Condición por prefijo sobre columnas *_norm, resuelta con sus índices (OR de rangos)"""
+    desde, hasta = rango_prefijo(texto)
+    condicion = " OR ".join(f"({col} >= ? AND {col} < ?)" for col in columnas)
+    return f"({condicion})", [desde, hasta] * len(columnas)
+
+
+def _filtro_texto(tabla_fts: str, columna_id: str, columnas_norm: Tuple[str, ...], texto: str,
+                  fts: bool, columnas_fts: str = "") -> Tuple[str, List[str]]:
+    """Condición de búsqueda por texto resuelta con índices.
+
+    Con el índice FTS5 ``tabla_fts`` cada palabra debe empezar alguna palabra de
+    las columnas indexadas (``columnas_fts`` las restringe); sin FTS5 cae al
+    prefijo de la columna entera sobre los índices *_norm.
+    """
+    expresion = _expresion_fts(texto)
+    if fts and expresion:
+        consulta = f"{{{columnas_fts}}} : ({expresion})" if columnas_fts else expresion
+        return f"{columna_id} IN (SELECT rowid FROM {tabla_fts} WHERE {tabla_fts} MATCH ?)", [consulta]
+    return _filtro_prefijo(columnas_norm, texto)
+
+
+def _filtro_sku_nombre(columna_id: str, columnas_norm: Tuple[str, str], texto: str,
+                       fts: bool) -> Tuple[str, List[str]]:
+    """Condición sobre SKU o nombre del producto (``columna_id`` y sku_norm/nombre_norm de la consulta).
+
+    Con productos_fts busca cada palabra como inicio de una palabra del SKU o
+    del nombre ('gloria' -> 'Leche Gloria Lata', '001' -> 'ARR-001').
+    """
+    return _filtro_texto("productos_fts", columna_id, columnas_norm, texto, fts, "sku nombre")
+
+
+def _sobre(sql: str, fuente: str) -> str:
+    """La misma consulta leyendo ``fuente`` (p. ej. la vista histórica) en lugar de movimientos"""
+    if fuente == "movimientos":
+        return sql
+    return re.sub(r"\bFROM movimientos\b", f"FROM {fuente}", sql)
+
+
+# Columnas en punto fijo (ver domain/unidades.py): cantidades en milésimas, precios en centavos
+_COLUMNAS_MILESIMAS = frozenset({
+    "cantidad", "minimo", "stock", "entrada", "salida", "saldo", "ingreso_total", "salida_total",
+})
+_COLUMNAS_CENTAVOS = frozenset({"precio_unit"})
+
+
+def _fila(row: sqlite3.Row) -> Dict[str, Any]:
+    """dict de la fila con cantidades y precios ya convertidos a decimales"""
+    fila = dict(row)
+    for k, v in fila.items():
+        if v is None:
+            continue
+        if k in _COLUMNAS_MILESIMAS:
+            fila[k] = de_milesimas(v)
+        elif k in _COLUMNAS_CENTAVOS:
+            fila[k] = de_centavos(v)
+    return fila
+
+
+def _tiene_fts(c: sqlite3.Connection, tabla: str = "productos_fts") -> bool:
+    return c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (tabla,)
+    ).fetchone() is not None
+
+
+# Pesos bm25 por columna: sku, nombre, categoria, proveedor, descripcion
+_RANKING_FTS = "bm25(productos_fts, 10.0, 5.0, 2.0, 2.0, 1.0)"
+
+SQL_BUSCAR_PRODUCTOS_FTS = f"""
+    SELECT p.* FROM productos_fts f
+    JOIN productos p ON p.id = f.rowid
+    WHERE productos_fts MATCH ?
+    ORDER BY {_RANKING_FTS}, p.nombre
+"""
 
         
+SQL_BUSCAR_TIENDAS = "SELECT * FROM tiendas WHERE {condicion} ORDER BY nombre"
+SQL_BUSCAR_EMPLEADOS = "SELECT * FROM empleados WHERE {condicion} ORDER BY apellidos, nombres"
+
+
+class _ConFTS:
+    _TABLA_FTS = "productos_fts"
+
+    def _usar_fts(self, c: sqlite3.Connection) -> bool:
+        """Detecta una sola vez si la base tiene el índice FTS5 del repositorio"""
+        if getattr(self, "_fts", None) is None:
+            self._fts = _tiene_fts(c, self._TABLA_FTS)
+        return self._fts
+
+
 class SQLiteRepoUsuarios(RepoUsuarios):
     def autenticar(self, username: str, password: str) -> Optional[Usuario]:
         with get_conn() as c:
@@ -20,6 +442,7 @@ class SQLiteRepoUsuarios(RepoUsuarios):
                 return None
             return Usuario(id=row["id"], username=row["username"], rol=row["rol"], activo=bool(row["activo"]))
 
+    @escribe("usuarios")
     def crear_usuario(self, username: str, password: str, rol: str) -> Usuario:
         with get_conn() as c:
             cur = c.execute(
@@ -59,15 +482,26 @@ class SQLiteRepoUsuarios(RepoUsuarios):
                 activo=bool(row["activo"])
             )
 
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Usuario]:
+        return _por_ids("usuarios", ids, lambda row: Usuario(
+            id=row["id"],
+            username=row["username"],
+            rol=row["rol"],
+            activo=bool(row["activo"])
+        ))
+
+
+class SQLiteRepoTiendas(_ConFTS, RepoTiendas):
+    _TABLA_FTS = "tiendas_fts"
 
-class SQLiteRepoTiendas(RepoTiendas):
+    @escribe("tiendas")
     def crear_tienda(self, nombre: str, direccion: Optional[str] = None, 
                      telefono: Optional[str] = None, email: Optional[str] = None,
                      responsable_id: Optional[int] = None) -> Tienda:
         with get_conn() as c:
             cur = c.execute(
-                "INSERT INTO tiendas(nombre, direccion, telefono, email, responsable_id) VALUES (?,?,?,?,?)", 
-                (nombre, direccion, telefono, email, responsable_id)
+                "INSERT INTO tiendas(nombre, direccion, telefono, email, responsable_id, nombre_norm) VALUES (?,?,?,?,?,?)", 
+                (nombre, direccion, telefono, email, responsable_id, normalizar(nombre))
             )
             return Tienda(
                 id=cur.lastrowid, 
@@ -78,6 +512,7 @@ class SQLiteRepoTiendas(RepoTiendas):
                 responsable_id=responsable_id
             )
 
+    @memoizar("tiendas")
     def listar_tiendas(self) -> List[Tienda]:
         with get_conn() as c:
             cur = c.execute("SELECT * FROM tiendas ORDER BY nombre")
@@ -89,17 +524,63 @@ class SQLiteRepoTiendas(RepoTiendas):
                 email=r["email"] if r["email"] else None,
                 responsable_id=r["responsable_id"] if r["responsable_id"] else None
             ) for r in cur.fetchall()]
+
+    @memoizar_por_ids("tiendas")
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Tienda]:
+        return _por_ids("tiendas", ids, lambda r: Tienda(
+            id=r["id"],
+            nombre=r["nombre"],
+            direccion=r["direccion"] if r["direccion"] else None,
+            telefono=r["telefono"] if r["telefono"] else None,
+            email=r["email"] if r["email"] else None,
+            responsable_id=r["responsable_id"] if r["responsable_id"] else None
+        ))
+
+    @memoizar("tiendas", "empleados", "productos")
+    def listar_tiendas_detalle(self) -> List[TiendaDetalle]:
+        """Tiendas con responsable, cantidad de empleados y de productos en una sola consulta"""
+        with get_conn() as c:
+            cur = c.execute(SQL_LISTAR_TIENDAS_DETALLE)
+            return [TiendaDetalle(
+                id=r["id"],
+                nombre=r["nombre"],
+                direccion=r["direccion"] if r["direccion"] else None,
+                telefono=r["telefono"] if r["telefono"] else None,
+                email=r["email"] if r["email"] else None,
+                responsable_id=r["responsable_id"] if r["responsable_id"] else None,
+                responsable_nombre=r["responsable_nombre"],
+                empleados=r["empleados"],
+                productos=r["productos"],
+            ) for r in cur.fetchall()]
+    
+    @memoizar("tiendas")
+    def buscar_tiendas(self, q: str) -> List[Tienda]:
+        """Tiendas con alguna palabra del nombre que empieza por cada palabra de q, sin distinguir tildes
+        (sin FTS5, tiendas cuyo nombre empieza por q)"""
+        with get_conn() as c:
+            condicion, params = _filtro_texto("tiendas_fts", "id", ("nombre_norm",), q, self._usar_fts(c))
+            cur = c.execute(SQL_BUSCAR_TIENDAS.format(condicion=condicion), params)
+            return [Tienda(
+                id=r["id"],
+                nombre=r["nombre"],
+                direccion=r["direccion"] if r["direccion"] else None,
+                telefono=r["telefono"] if r["telefono"] else None,
+                email=r["email"] if r["email"] else None,
+                responsable_id=r["responsable_id"] if r["responsable_id"] else None
+            ) for r in cur.fetchall()]
     
+    @escribe("tiendas")
     def actualizar_tienda(self, tienda_id: int, nombre: str, direccion: Optional[str] = None,
                          telefono: Optional[str] = None, email: Optional[str] = None,
                          responsable_id: Optional[int] = None) -> bool:
         with get_conn() as c:
             cur = c.execute(
-                "UPDATE tiendas SET nombre=?, direccion=?, telefono=?, email=?, responsable_id=? WHERE id=?",
-                (nombre, direccion, telefono, email, responsable_id, tienda_id)
+                "UPDATE tiendas SET nombre=?, direccion=?, telefono=?, email=?, responsable_id=?, nombre_norm=? WHERE id=?",
+                (nombre, direccion, telefono, email, responsable_id, normalizar(nombre), tienda_id)
             )
             return cur.rowcount > 0
     
+    @escribe("tiendas", "productos", "stock", "empleados")
     def eliminar_tienda(self, tienda_id: int) -> bool:
         with get_conn() as c:
             cur = c.execute("DELETE FROM tiendas WHERE id=?", (tienda_id,))
@@ -107,7 +588,7 @@ class SQLiteRepoTiendas(RepoTiendas):
 
 
 
-class SQLiteRepoProductos(RepoProductos):
+class SQLiteRepoProductos(_ConFTS, RepoProductos):
     def _row_to_producto(self, row) -> Optional[Producto]:
         """Convierte una fila de BD a modelo Producto"""
         if not row:
@@ -119,7 +600,7 @@ class SQLiteRepoProductos(RepoProductos):
             nombre=row["nombre"],
             descripcion=row["descripcion"] if row["descripcion"] else None,
             unidad=row["unidad"],
-            precio_unit=row["precio_unit"],
+            precio_unit=de_centavos(row["precio_unit"]),
             categoria=row["categoria"] if row["categoria"] else None,
             proveedor=row["proveedor"] if row["proveedor"] else None,
             stock_minimo=row["stock_minimo"] if row["stock_minimo"] is not None else 0,
@@ -127,12 +608,15 @@ class SQLiteRepoProductos(RepoProductos):
             tienda_id=row["tienda_id"]
         )
     
+    @escribe("productos")
     def crear_producto(self, sku: str, nombre: str, descripcion: Optional[str], unidad: str, precio: float, 
                       categoria: Optional[str], proveedor: Optional[str], stock_minimo: int = 0, tienda_id: int = 1) -> Producto:
         with get_conn() as c:
             cur = c.execute(
-                "INSERT INTO productos(sku, nombre, descripcion, unidad, precio_unit, categoria, proveedor, stock_minimo, tienda_id) VALUES (?,?,?,?,?,?,?,?,?)",
-                (sku, nombre, descripcion, unidad, precio, categoria, proveedor, stock_minimo, tienda_id),
+                "INSERT INTO productos(sku, nombre, descripcion, unidad, precio_unit, categoria, proveedor, stock_minimo, tienda_id, "
+                "sku_norm, nombre_norm, categoria_norm) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                (sku, nombre, descripcion, unidad, a_centavos(precio), categoria, proveedor, stock_minimo, tienda_id,
+                 normalizar(sku), normalizar(nombre), normalizar(categoria)),
             )
             return Producto(
                 id=cur.lastrowid, 
@@ -148,36 +632,50 @@ class SQLiteRepoProductos(RepoProductos):
                 tienda_id=tienda_id
             )
 
+    @memoizar("productos")
     def buscar_por_sku(self, sku: str) -> Optional[Producto]:
         with get_conn() as c:
             cur = c.execute("SELECT * FROM productos WHERE sku=?", (sku,))
             return self._row_to_producto(cur.fetchone())
 
+    @memoizar("productos")
     def listar_productos(self, q: str = "") -> List[Producto]:
-        q_like = f"%{q}%"
         with get_conn() as c:
-            cur = c.execute(
-                "SELECT * FROM productos WHERE sku LIKE ? OR nombre LIKE ? ORDER BY nombre",
-                (q_like, q_like),
-            )
+            expresion = _expresion_fts(q)
+            if not expresion:
+                cur = c.execute("SELECT * FROM productos ORDER BY nombre")
+            elif self._usar_fts(c):
+                cur = c.execute(SQL_BUSCAR_PRODUCTOS_FTS, (expresion,))
+            else:
+                condicion, params = _filtro_prefijo(("sku_norm", "nombre_norm"), q)
+                cur = c.execute(f"SELECT * FROM productos WHERE {condicion} ORDER BY nombre", params)
             return [self._row_to_producto(r) for r in cur.fetchall()]
     
+    @memoizar_por_ids("productos", max_entradas=CATALOGO_MAX_ENTRADAS)
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Producto]:
+        return _por_ids("productos", ids, self._row_to_producto)
+    
+    @escribe("productos")
     def actualizar_producto(self, producto_id: int, sku: str, nombre: str, descripcion: Optional[str], 
                            unidad: str, precio: float, categoria: Optional[str], proveedor: Optional[str], 
                            stock_minimo: int = 0, activo: bool = True, tienda_id: int = 1) -> bool:
         with get_conn() as c:
             cur = c.execute("""
                 UPDATE productos 
-                SET sku=?, nombre=?, descripcion=?, unidad=?, precio_unit=?, categoria=?, proveedor=?, stock_minimo=?, activo=?, tienda_id=?
+                SET sku=?, nombre=?, descripcion=?, unidad=?, precio_unit=?, categoria=?, proveedor=?, stock_minimo=?, activo=?, tienda_id=?,
+                    sku_norm=?, nombre_norm=?, categoria_norm=?
                 WHERE id=?
-            """, (sku, nombre, descripcion, unidad, precio, categoria, proveedor, stock_minimo, int(activo), tienda_id, producto_id))
+            """, (sku, nombre, descripcion, unidad, a_centavos(precio), categoria, proveedor, stock_minimo,
+                  int(activo), tienda_id, normalizar(sku), normalizar(nombre), normalizar(categoria), producto_id))
             return cur.rowcount > 0
     
+    @escribe("productos", "stock")
     def eliminar_producto(self, producto_id: int) -> bool:
         with get_conn() as c:
             cur = c.execute("DELETE FROM productos WHERE id=?", (producto_id,))
             return cur.rowcount > 0
     
+    @memoizar("productos", "tiendas", "stock")
     def buscar_con_stock(self, filtro: str = "", stock_mayor_a: float = 0):
         with get_conn() as c:
             base_query = """
@@ -186,109 +684,316 @@ class SQLiteRepoProductos(RepoProductos):
                 FROM productos p
                 JOIN tiendas t ON p.tienda_id = t.id
                 LEFT JOIN stock s ON p.id = s.producto_id AND s.tienda_id = t.id
-                WHERE p.activo = 1 AND COALESCE(s.cantidad, 0) > ?
             """
-            
-            params = [stock_mayor_a]
+            condiciones = "WHERE p.activo = 1 AND COALESCE(s.cantidad, 0) > ?"
+            params = [a_milesimas(stock_mayor_a)]
+            orden = " ORDER BY p.sku"
             
             # Agregar filtro si se proporciona
-            if filtro:
-                base_query += " AND (LOWER(p.sku) LIKE ? OR LOWER(p.nombre) LIKE ? OR LOWER(p.categoria) LIKE ?)"
-                filtro_param = f"%{filtro.lower()}%"
-                params.extend([filtro_param, filtro_param, filtro_param])
-            
-            base_query += " ORDER BY p.sku"
+            expresion = _expresion_fts(filtro) if filtro else ""
+            if expresion and self._usar_fts(c):
+                # Resultados ordenados por relevancia
+                base_query = base_query.replace(
+                    "FROM productos p", "FROM productos_fts f JOIN productos p ON p.id = f.rowid", 1
+                )
+                condiciones += " AND productos_fts MATCH ?"
+                params.append(expresion)
+                orden = f" ORDER BY {_RANKING_FTS}, p.sku"
+            elif expresion:
+                condicion, params_prefijo = _filtro_prefijo(("p.sku_norm", "p.nombre_norm", "p.categoria_norm"), filtro)
+                condiciones += f" AND {condicion}"
+                params.extend(params_prefijo)
             
-            productos = c.execute(base_query, params).fetchall()
-            return [dict(row) for row in productos]
+            productos = c.execute(base_query + condiciones + orden, params).fetchall()
+            return [_fila(row) for row in productos]
 
 
-class SQLiteRepoInventario(RepoInventario):
+class SQLiteRepoInventario(_ConFTS, RepoInventario):
+    @escribe("stock")
     def set_minimo(self, tienda_id: int, producto_id: int, minimo: float) -> None:
         with get_conn() as c:
             c.execute(
                 "INSERT INTO stock(tienda_id, producto_id, minimo, cantidad) VALUES (?,?,?,0) "
                 "ON CONFLICT(tienda_id, producto_id) DO UPDATE SET minimo=excluded.minimo",
-                (tienda_id, producto_id, minimo),
+                (tienda_id, producto_id, a_milesimas(minimo)),
             )
 
+    @escribe("stock", "movimientos")
     def ajustar_stock(self, tienda_id: int, producto_id: int, delta: float, usuario_id: int, nota: Optional[str] = None) -> None:
-        with get_conn() as c:
-            cur = c.execute("SELECT cantidad FROM stock WHERE tienda_id=? AND producto_id=?", (tienda_id, producto_id))
-            row = cur.fetchone()
-            if row is None:
-                if delta < 0:
-                    raise ValueError("No se puede egresar stock inexistente")
-                c.execute("INSERT INTO stock(tienda_id, producto_id, cantidad, minimo) VALUES (?,?,?,0)", (tienda_id, producto_id, delta))
+        # El lock de escritura se toma antes de leer: dos cajas no pueden pisarse el saldo
+        delta = a_milesimas(delta)
+        with transaccion() as c:
+            if delta >= 0:
+                row = c.execute(
+                    "INSERT INTO stock(tienda_id, producto_id, cantidad, minimo) VALUES (?,?,?,0) "
+                    "ON CONFLICT(tienda_id, producto_id) DO UPDATE SET cantidad = cantidad + excluded.cantidad "
+                    "RETURNING cantidad",
+                    (tienda_id, producto_id, delta),
+                ).fetchall()
             else:
-                nueva = row["cantidad"] + delta
-                if nueva < 0:
+                row = c.execute(
+                    "UPDATE stock SET cantidad = cantidad + ? "
+                    "WHERE tienda_id=? AND producto_id=? AND cantidad + ? >= 0 "
+                    "RETURNING cantidad",
+                    (delta, tienda_id, producto_id, delta),
+                ).fetchall()
+                if not row:
+                    existe = c.execute(
+                        "SELECT 1 FROM stock WHERE tienda_id=? AND producto_id=?", (tienda_id, producto_id)
+                    ).fetchone()
+                    if existe is None:
+                        raise ValueError("No se puede egresar stock inexistente")
                     raise ValueError("Stock insuficiente para la operación")
-                c.execute("UPDATE stock SET cantidad=? WHERE tienda_id=? AND producto_id=?", (nueva, tienda_id, producto_id))
             c.execute(
-                "INSERT INTO movimientos(tienda_id, producto_id, tipo, cantidad, usuario_id, ts, nota) VALUES (?,?,?,?,?,?,datetime('now'))",
-                (tienda_id, producto_id, "INGRESO" if delta > 0 else "SALIDA", abs(delta), usuario_id, nota),
+                "INSERT INTO movimientos(tienda_id, producto_id, tipo, cantidad, usuario_id, ts, nota) VALUES (?,?,?,?,?,?,?)",
+                (tienda_id, producto_id, "INGRESO" if delta > 0 else "SALIDA", abs(delta), usuario_id, ahora_ms(), nota),
             )
 
+    @escribe("stock", "movimientos")
+    def ajustar_stock_lote(self, lineas: List[LineaMovimiento], usuario_id: int) -> List[Dict[str, Any]]:
+        """Aplica todas las líneas en una sola transacción, o ninguna si alguna es inválida"""
+        if not lineas:
+            return []
+        deltas = [a_milesimas(l.delta) for l in lineas]
+        with transaccion() as c:
+            claves = list({(l.tienda_id, l.producto_id) for l in lineas})
+
+            # Validar todo antes de escribir: productos existentes y saldos suficientes
+            productos_ids = list({pid for _, pid in claves})
+            existentes = set()
+            for lote in _lotes(productos_ids, _MAX_PARAMS):
+                marcas = ",".join("?" * len(lote))
+                existentes.update(
+                    r["id"] for r in c.execute(f"SELECT id FROM productos WHERE id IN ({marcas})", lote)
+                )
+            saldos: Dict[Tuple[int, int], int] = {}
+            for lote in _lotes(claves, _MAX_PARAMS // 2):
+                valores = ",".join("(?,?)" for _ in lote)
+                params = [v for clave in lote for v in clave]
+                for r in c.execute(
+                    f"SELECT tienda_id, producto_id, cantidad FROM stock "
+                    f"WHERE (tienda_id, producto_id) IN (VALUES {valores})",
+                    params,
+                ):
+                    saldos[(r["tienda_id"], r["producto_id"])] = r["cantidad"]
+
+            errores = []
+            resultados = []
+            for n, (l, delta) in enumerate(zip(lineas, deltas), start=1):
+                clave = (l.tienda_id, l.producto_id)
+                if delta == 0:
+                    errores.append(f"Línea {n}: la cantidad debe ser distinta de 0")
+                    continue
+                if l.producto_id not in existentes:
+                    errores.append(f"Línea {n}: producto {l.producto_id} no encontrado")
+                    continue
+                if clave not in saldos and delta < 0:
+                    errores.append(f"Línea {n}: no se puede egresar stock inexistente (producto {l.producto_id})")
+                    continue
+                nueva = saldos.get(clave, 0) + delta
+                if nueva < 0:
+                    errores.append(
+                        f"Línea {n}: stock insuficiente (producto {l.producto_id}, disponible {de_milesimas(saldos[clave]):g})"
+                    )
+                    continue
+                saldos[clave] = nueva
+                resultados.append({
+                    'linea': n,
+                    'tienda_id': l.tienda_id,
+                    'producto_id': l.producto_id,
+                    'tipo': "INGRESO" if delta > 0 else "SALIDA",
+                    'cantidad': de_milesimas(abs(delta)),
+                    'saldo': de_milesimas(nueva),
+                })
+            if errores:
+                raise ValueError("\n".join(errores))
+
+            netos: Dict[Tuple[int, int], int] = {}
+            for l, delta in zip(lineas, deltas):
+                clave = (l.tienda_id, l.producto_id)
+                netos[clave] = netos.get(clave, 0) + delta
+            # El upsert solo sirve para netos positivos: el CHECK se evalúa sobre la fila a insertar
+            c.executemany(
+                "INSERT INTO stock(tienda_id, producto_id, cantidad, minimo) VALUES (?,?,?,0) "
+                "ON CONFLICT(tienda_id, producto_id) DO UPDATE SET cantidad = cantidad + excluded.cantidad",
+                [(t, p, d) for (t, p), d in netos.items() if d >= 0],
+            )
+            c.executemany(
+                "UPDATE stock SET cantidad = cantidad + ? WHERE tienda_id=? AND producto_id=?",
+                [(d, t, p) for (t, p), d in netos.items() if d < 0],
+            )
+            ts = ahora_ms()  # el mismo instante para todo el lote; el id desempata
+            c.executemany(
+                "INSERT INTO movimientos(tienda_id, producto_id, tipo, cantidad, usuario_id, ts, nota) VALUES (?,?,?,?,?,?,?)",
+                [
+                    (l.tienda_id, l.producto_id, "INGRESO" if delta > 0 else "SALIDA", abs(delta), usuario_id, ts, l.nota)
+                    for l, delta in zip(lineas, deltas)
+                ],
+            )
+            return resultados
+
     def obtener_stock(self, tienda_id: int, producto_id: int) -> Tuple[float, float]:
         with get_conn() as c:
-            cur = c.execute("SELECT cantidad, minimo FROM stock WHERE tienda_id=? AND producto_id=?", (tienda_id, producto_id))
+            cur = c.execute(SQL_OBTENER_STOCK, (tienda_id, producto_id))
             r = cur.fetchone()
             if not r:
                 return 0.0, 0.0
-            return float(r["cantidad"]), float(r["minimo"])
+            return de_milesimas(r["cantidad"]), de_milesimas(r["minimo"])
 
+    @memoizar("productos", "tiendas", "stock")
     def reporte_stock(self, tienda_id: int):
-        sql = """
-        SELECT p.sku, p.nombre, p.unidad, IFNULL(s.cantidad,0) AS cantidad, IFNULL(s.minimo,0) AS minimo,
-               CASE WHEN IFNULL(s.cantidad,0) = 0 THEN 'SIN STOCK'
-                    WHEN IFNULL(s.cantidad,0) <= IFNULL(s.minimo,0) THEN 'BAJO MINIMO'
-                    ELSE 'OK' END AS estado
-        FROM productos p
-        LEFT JOIN stock s ON s.producto_id = p.id AND s.tienda_id = ?
-        ORDER BY p.nombre
+        """Stock de la tienda sobre su propio catálogo"""
+        with get_conn() as c:
+            return [_fila(row) for row in c.execute(SQL_REPORTE_STOCK_TIENDA, (tienda_id,))]
+
+    def obtener_alertas(self, tienda_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Productos en BAJO MINIMO o SIN STOCK, leídos de la tabla de alertas (mantenida por triggers)"""
+        with get_conn() as c:
+            if tienda_id is not None:
+                cur = c.execute(SQL_ALERTAS_TIENDA, (tienda_id,))
+            else:
+                cur = c.execute(SQL_ALERTAS)
+            return [_fila(row) for row in cur]
+
+    def obtener_transiciones_stock(self, tienda_id: Optional[int] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        """Cambios de estado (OK / BAJO MINIMO / SIN STOCK), del más reciente al más antiguo"""
+        with get_conn() as c:
+            if tienda_id is not None:
+                cur = c.execute(SQL_TRANSICIONES_TIENDA, (tienda_id, limit))
+            else:
+                cur = c.execute(SQL_TRANSICIONES, (limit,))
+            return [_fila(row) for row in cur]
+
+    def resumen_movimientos(self, desde: str, hasta: str, tienda_id: Optional[int] = None,
+                            producto_id: Optional[int] = None, por_dia: bool = False) -> List[Dict[str, Any]]:
+        sql, params = sql_resumen_movimientos(desde, hasta, tienda_id, producto_id, por_dia)
+        with get_conn() as c:
+            return [_fila(row) for row in c.execute(sql, params)]
+
+    @escribe("movimientos_diarios")
+    def reconstruir_resumen_diario(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> int:
+        with get_conn() as c:
+            # Los días ya archivados también se recalculan (ATTACH antes de abrir la transacción)
+            fuente = fuente_movimientos(c, dia_ms(desde) if desde else None)
+            with transaccion() as c:
+                return resumen_diario.reconstruir(c, desde, hasta, fuente)
+
+    @escribe("stock_snapshots")
+    def tomar_snapshot_stock(self) -> Dict[str, Any]:
+        """Guarda una foto del stock actual junto con el último movimiento que incluye"""
+        with transaccion() as c:
+            ultimo_mov_id = c.execute("SELECT IFNULL(MAX(id), 0) FROM movimientos").fetchone()[0]
+            snapshot = c.execute(
+                "INSERT INTO stock_snapshots(ts, ultimo_mov_id) VALUES (?, ?) "
+                "RETURNING id, ts, ultimo_mov_id",
+                (ahora_ms(), ultimo_mov_id),
+            ).fetchone()
+            cur = c.execute(
+                "INSERT INTO stock_snapshot_lineas(snapshot_id, tienda_id, producto_id, cantidad) "
+                "SELECT ?, tienda_id, producto_id, cantidad FROM stock",
+                (snapshot["id"],),
+            )
+            return {**dict(snapshot), "filas": cur.rowcount}
+
+    def ultimo_snapshot_stock(self) -> Optional[Dict[str, Any]]:
+        with get_conn() as c:
+            r = c.execute("SELECT id, ts, ultimo_mov_id FROM stock_snapshots ORDER BY ts DESC, id DESC LIMIT 1").fetchone()
+            return dict(r) if r else None
+
+    def stock_al(self, limite: int, tienda_id: Optional[int] = None,
+                 estados: Optional[Iterable[str]] = None, texto: str = "") -> List[Dict[str, Any]]:
+        """Stock tal como estaba justo antes del instante ``limite`` (ms desde la época)"""
+        with get_conn() as c:
+            r = c.execute(SQL_SNAPSHOT_ANTERIOR, (limite,)).fetchone()
+            sql, params = sql_stock_al(limite, dict(r) if r else None, tienda_id, estados, texto,
+                                       self._usar_fts(c))
+            fuente = fuente_movimientos(c, r["ts"] if r else None)
+            return [_fila(row) for row in c.execute(_sobre(sql, fuente), params)]
+
+    def saldo_al(self, tienda_id: int, producto_id: int, limite: int) -> float:
+        """Saldo de un producto justo antes de ``limite`` (foto anterior + movimientos posteriores)"""
+        with get_conn() as c:
+            snapshot = c.execute(SQL_SNAPSHOT_ANTERIOR, (limite,)).fetchone()
+            base, desde, ultimo_mov_id = 0, 0, 0
+            if snapshot:
+                r = c.execute(
+                    "SELECT cantidad FROM stock_snapshot_lineas "
+                    "WHERE snapshot_id=? AND tienda_id=? AND producto_id=?",
+                    (snapshot["id"], tienda_id, producto_id),
+                ).fetchone()
+                base = r["cantidad"] if r else 0
+                desde, ultimo_mov_id = snapshot["ts"], snapshot["ultimo_mov_id"]
+            fuente = fuente_movimientos(c, desde if snapshot else None)
+            delta = c.execute(
+                _sobre(SQL_SALDO_DESDE_SNAPSHOT, fuente), (tienda_id, producto_id, desde, limite, ultimo_mov_id)
+            ).fetchone()[0]
+            return de_milesimas(base + delta)
+
+    def kardex(self, tienda_id: int, producto_id: int, desde: int, hasta: int, saldo_inicial: float,
+               cursor: Optional[Tuple[Any, int]] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Una página del kardex en [desde, hasta): movimientos con su saldo acumulado.
+
+        ``cursor`` y ``saldo_inicial`` son el (ts, id) y el saldo de la última fila ya leída.
         """
+        ts, mov_id = cursor if cursor else (desde, 0)
         with get_conn() as c:
-            return [dict(row) for row in c.execute(sql, (tienda_id,))]
+            sql = _sobre(SQL_KARDEX, fuente_movimientos(c, ts))
+            cur = c.execute(sql, (a_milesimas(saldo_inicial), tienda_id, producto_id, hasta, ts, mov_id, limit))
+            return [_fila(row) for row in cur]
+
+    @memoizar("productos", "tiendas", "stock")
+    def consultar_reporte_stock(self, tienda_id: Optional[int] = None,
+                                estados: Optional[Iterable[str]] = None, texto: str = "",
+                                orden: str = "tienda", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Reporte de stock filtrado en SQL (ver sql_reporte_stock)"""
+        if estados is not None and not set(estados):
+            return []
+        with get_conn() as c:
+            sql, params = sql_reporte_stock(tienda_id, estados, texto, orden, limit, self._usar_fts(c))
+            return [_fila(row) for row in c.execute(sql, params)]
     
-    def obtener_movimientos(self, tienda_id: Optional[int] = None, limit: int = 200):
+    @memoizar("stock", "productos", "tiendas")
+    def valorizacion(self, agrupar_por: Iterable[str] = DIMENSIONES_VALORIZACION,
+                     tienda_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Valor del stock (Σ cantidad × precio) por tienda/categoría/proveedor, en una sola consulta"""
+        sql, params = sql_valorizacion(agrupar_por, tienda_id)
+        with get_conn() as c:
+            return [{**_fila(r), "valor": de_importe(r["valor"])} for r in c.execute(sql, params)]
+
+    @memoizar("movimientos", "productos", "usuarios", "tiendas", "archivos_movimientos")
+    def obtener_movimientos(self, tienda_id: Optional[int] = None, limit: int = 200,
+                            cursor: Optional[Tuple[Any, int]] = None, historico: bool = False):
+        """Movimientos del más reciente al más antiguo.
+
+        ``cursor`` es el (ts, id) de la última fila ya mostrada; se devuelven las siguientes.
+        Solo se lee la base principal salvo que se pida ``historico`` (incluye los años archivados).
+        """
         with get_conn() as c:
+            fuente = fuente_movimientos(c, None) if historico else "movimientos"
             if tienda_id:
-                query = """
-                    SELECT m.id, m.producto_id, p.sku, p.nombre as producto_nombre, 
-                           m.tipo, m.cantidad, m.usuario_id, u.username, 
-                           t.nombre as tienda_nombre, m.ts, m.nota
-                    FROM movimientos m
-                    JOIN productos p ON m.producto_id = p.id
-                    JOIN usuarios u ON m.usuario_id = u.id
-                    JOIN tiendas t ON m.tienda_id = t.id
-                    WHERE t.id = ?
-                    ORDER BY m.ts DESC LIMIT ?
-                """
-                params = (tienda_id, limit)
+                if cursor:
+                    sql, params = SQL_MOVIMIENTOS_TIENDA_CURSOR, (tienda_id, *cursor, limit)
+                else:
+                    sql, params = SQL_MOVIMIENTOS_TIENDA, (tienda_id, limit)
             else:
-                query = """
-                    SELECT m.id, m.producto_id, p.sku, p.nombre as producto_nombre, 
-                           m.tipo, m.cantidad, m.usuario_id, u.username, 
-                           t.nombre as tienda_nombre, m.ts, m.nota
-                    FROM movimientos m
-                    JOIN productos p ON m.producto_id = p.id
-                    JOIN usuarios u ON m.usuario_id = u.id
-                    JOIN tiendas t ON m.tienda_id = t.id
-                    ORDER BY m.ts DESC LIMIT ?
-                """
-                params = (limit,)
-            
-            movimientos = c.execute(query, params).fetchall()
-            return [dict(m) for m in movimientos]
+                if cursor:
+                    sql, params = SQL_MOVIMIENTOS_RECIENTES_CURSOR, (*cursor, limit)
+                else:
+                    sql, params = SQL_MOVIMIENTOS_RECIENTES, (limit,)
+            movimientos = c.execute(_sobre(sql, fuente), params).fetchall()
+            return [_fila(m) for m in movimientos]
 
 
-class SQLiteRepoEmpleados(RepoEmpleados):
+class SQLiteRepoEmpleados(_ConFTS, RepoEmpleados):
+    _TABLA_FTS = "empleados_fts"
+
+    @escribe("empleados")
     def crear_empleado(self, usuario_id: int, nombres: str, apellidos: str, dni: str, jornada: str, tienda_id: int) -> Empleado:
         with get_conn() as c:
             cur = c.execute(
-                "INSERT INTO empleados(usuario_id, nombres, apellidos, dni, jornada, tienda_id) VALUES (?,?,?,?,?,?)",
-                (usuario_id, nombres, apellidos, dni, jornada, tienda_id)
+                "INSERT INTO empleados(usuario_id, nombres, apellidos, dni, jornada, tienda_id, nombres_norm, apellidos_norm) "
+                "VALUES (?,?,?,?,?,?,?,?)",
+                (usuario_id, nombres, apellidos, dni, jornada, tienda_id, normalizar(nombres), normalizar(apellidos))
             )
             return Empleado(
                 id=cur.lastrowid,
@@ -300,15 +1005,58 @@ class SQLiteRepoEmpleados(RepoEmpleados):
                 tienda_id=tienda_id
             )
 
+    @memoizar("empleados")
     def listar_empleados(self) -> List[Empleado]:
         with get_conn() as c:
-            cur = c.execute("""
-                SELECT e.*, u.username, u.rol, u.activo, t.nombre as tienda_nombre
-                FROM empleados e
-                JOIN usuarios u ON e.usuario_id = u.id
-                JOIN tiendas t ON e.tienda_id = t.id
-                ORDER BY e.apellidos, e.nombres
-            """)
+            cur = c.execute(SQL_LISTAR_EMPLEADOS)
+            return [
+                Empleado(
+                    id=row["id"],
+                    usuario_id=row["usuario_id"],
+                    nombres=row["nombres"],
+                    apellidos=row["apellidos"],
+                    dni=row["dni"],
+                    jornada=row["jornada"],
+                    tienda_id=row["tienda_id"]
+                )
+                for row in cur.fetchall()
+            ]
+
+    def listar_empleados_detalle(self, tienda_id: Optional[int] = None) -> List[EmpleadoDetalle]:
+        """Empleados con usuario y tienda en una sola consulta (opcionalmente de una tienda)"""
+        with get_conn() as c:
+            if tienda_id is None:
+                cur = c.execute(SQL_LISTAR_EMPLEADOS)
+            else:
+                cur = c.execute(SQL_LISTAR_EMPLEADOS_TIENDA, (tienda_id,))
+            return [
+                EmpleadoDetalle(
+                    id=row["id"],
+                    usuario_id=row["usuario_id"],
+                    nombres=row["nombres"],
+                    apellidos=row["apellidos"],
+                    dni=row["dni"],
+                    jornada=row["jornada"],
+                    tienda_id=row["tienda_id"],
+                    username=row["username"],
+                    rol=row["rol"],
+                    activo=bool(row["activo"]),
+                    tienda_nombre=row["tienda_nombre"],
+                )
+                for row in cur.fetchall()
+            ]
+
+    def buscar_empleados(self, q: str) -> List[Empleado]:
+        """Empleados cuyo DNI empieza por q o que tienen, entre nombres y apellidos, una palabra
+        que empieza por cada palabra de q ('perez' encuentra a 'Ana García Pérez'), sin distinguir tildes
+        (sin FTS5, empleados cuyos nombres o apellidos empiezan por q)"""
+        with get_conn() as c:
+            if q.strip().isdigit():
+                condicion, params = _filtro_prefijo(("dni",), q.strip())
+            else:
+                condicion, params = _filtro_texto("empleados_fts", "id", ("nombres_norm", "apellidos_norm"), q,
+                                                  self._usar_fts(c))
+            cur = c.execute(SQL_BUSCAR_EMPLEADOS.format(condicion=condicion), params)
             return [
                 Empleado(
                     id=row["id"],
@@ -354,15 +1102,28 @@ class SQLiteRepoEmpleados(RepoEmpleados):
                 tienda_id=row["tienda_id"]
             )
 
+    def obtener_por_ids(self, ids: Iterable[int]) -> Dict[int, Empleado]:
+        return _por_ids("empleados", ids, lambda row: Empleado(
+            id=row["id"],
+            usuario_id=row["usuario_id"],
+            nombres=row["nombres"],
+            apellidos=row["apellidos"],
+            dni=row["dni"],
+            jornada=row["jornada"],
+            tienda_id=row["tienda_id"]
+        ))
+
+    @escribe("empleados")
     def actualizar_empleado(self, empleado_id: int, nombres: str, apellidos: str, dni: str, jornada: str, tienda_id: int) -> bool:
         with get_conn() as c:
             cur = c.execute("""
                 UPDATE empleados 
-                SET nombres=?, apellidos=?, dni=?, jornada=?, tienda_id=?
+                SET nombres=?, apellidos=?, dni=?, jornada=?, tienda_id=?, nombres_norm=?, apellidos_norm=?
                 WHERE id=?
-            """, (nombres, apellidos, dni, jornada, tienda_id, empleado_id))
+            """, (nombres, apellidos, dni, jornada, tienda_id, normalizar(nombres), normalizar(apellidos), empleado_id))
             return cur.rowcount > 0
 
+    @escribe("empleados", "tiendas")
     def eliminar_empleado(self, empleado_id: int) -> bool:
         with get_conn() as c:
             cur = c.execute("DELETE FROM empleados WHERE id=?", (empleado_id,))
@@ -0,0 +1,29 @@
+# ==============================
+# File: inventory_app/infra/texto.py
+# ==============================
+from __future__ import annotations
+from typing import Optional, Tuple
+import sqlite3
+import unicodedata
+
+# Mayor carácter Unicode: cierra el rango de búsqueda por prefijo
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalizar(texto: Optional[str]) -> Optional[str]:
+    """Quita tildes y pasa a minúsculas: 'Azúcar Rubia' -> 'azucar rubia'"""
+    if texto is None:
+        return None
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(ch for ch in descompuesto if not unicodedata.combining(ch)).casefold()
+
+
+def rango_prefijo(texto: str) -> Tuple[str, str]:
+    """Límites [desde, hasta) para buscar por prefijo en una columna normalizada con su índice"""
+    desde = normalizar(texto.strip()) or ""
+    return desde, desde + _MAX_CHAR
+
+
+def registrar_funciones(conn: sqlite3.Connection) -> None:
+    """Expone normalizar() a SQL (solo para la migración que crea las columnas *_norm)"""
+    conn.create_function("normalizar", 1, normalizar, deterministic=True)
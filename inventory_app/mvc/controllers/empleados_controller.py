@@ -13,42 +13,33 @@ class EmpleadosController(BaseController):
     def __init__(self, inventory_models, user_models, current_user):
         super().__init__(inventory_models, user_models, current_user)
         self.tienda_filtro = None
+        self.busqueda = ""
     
     def get_data(self) -> List[Dict[str, Any]]:
         """Obtiene todos los empleados con información completa"""
         try:
-            # Obtener empleados completos desde el servicio
-            empleados = self.inventory_models.inventory_service.listar_empleados()
-            empleados_data = []
-            
-            for empleado in empleados:
-                # Obtener información del usuario desde user_models
-                usuario = self.user_models.get_usuario_por_id(empleado.usuario_id)
-                
-                # Obtener información de la tienda
-                tienda = self.inventory_models.inventory_service._rt.listar_tiendas()
-                tienda_nombre = "N/A"
-                for t in tienda:
-                    if t.id == empleado.tienda_id:
-                        tienda_nombre = t.nombre
-                        break
-                
-                # Aplicar filtro de tienda si está activo
-                if self.tienda_filtro is None or empleado.tienda_id == self.tienda_filtro:
-                    empleados_data.append({
-                        'id': empleado.id,
-                        'usuario_id': empleado.usuario_id,
-                        'username': usuario.username if usuario else "N/A",
-                        'nombres': empleado.nombres,
-                        'apellidos': empleado.apellidos,
-                        'dni': empleado.dni,
-                        'jornada': empleado.jornada,
-                        'tienda': tienda_nombre,
-                        'rol': usuario.rol if usuario else "N/A",
-                        'estado': "Activo" if usuario and usuario.activo else "Inactivo"
-                    })
-            
-            return empleados_data
+            # Empleado, usuario y tienda en una sola consulta; el filtro de tienda se aplica en SQL
+            service = self.inventory_models.inventory_service
+            empleados = service.listar_empleados_detalle(self.tienda_filtro)
+            if self.busqueda:
+                # La búsqueda (nombre, apellido o DNI) resuelve los ids con su índice
+                ids = {e.id for e in service.buscar_empleados(self.busqueda)}
+                empleados = [e for e in empleados if e.id in ids]
+            return [
+                {
+                    'id': empleado.id,
+                    'usuario_id': empleado.usuario_id,
+                    'username': empleado.username or "N/A",
+                    'nombres': empleado.nombres,
+                    'apellidos': empleado.apellidos,
+                    'dni': empleado.dni,
+                    'jornada': empleado.jornada,
+                    'tienda': empleado.tienda_nombre or "N/A",
+                    'rol': empleado.rol or "N/A",
+                    'estado': "Activo" if empleado.activo else "Inactivo"
+                }
+                for empleado in empleados
+            ]
             
         except Exception as e:
             print(f"Error al obtener empleados: {e}")
@@ -83,6 +74,8 @@ class EmpleadosController(BaseController):
                 return self._edit_empleado_completo(data)
             elif action == "delete_empleado":
                 return self._delete_empleado(data)
+            elif action == "set_busqueda":
+                return self._set_busqueda(data)
             elif action == "set_tienda_filter":
                 return self._set_tienda_filter(data)
             elif action == "clear_filters":
@@ -98,9 +91,15 @@ class EmpleadosController(BaseController):
         self.tienda_filtro = tienda_id
         return True
     
+    def _set_busqueda(self, data: Dict[str, Any]) -> bool:
+        """Establece el texto de búsqueda (vacío muestra todos los empleados)"""
+        self.busqueda = (data.get('texto') or "").strip()
+        return True
+    
     def _clear_filters(self) -> bool:
         """Limpia todos los filtros"""
         self.tienda_filtro = None
+        self.busqueda = ""
         return True
     
     def _create_empleado(self, data: Dict[str, Any]) -> bool:
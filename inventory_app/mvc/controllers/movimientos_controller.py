@@ -10,17 +10,35 @@ from .base_controller import BaseController
 class MovimientosController(BaseController):
     """Controlador para la gestión de movimientos"""
     
+    PAGE_SIZE = 100
+    
     def __init__(self, inventory_models, user_models, current_user):
         super().__init__(inventory_models, user_models, current_user)
         self.tienda_filtro = None
+        self._cursor = None
+        self._hay_mas = False
         # Para usuarios no-ADMIN, filtrar automáticamente por su tienda asignada
         if self.current_user.rol != "ADMIN":
             user_info = self.get_user_info()
             self.tienda_filtro = user_info.get('tienda_id')
     
     def get_data(self) -> List[Dict[str, Any]]:
-        """Obtiene los movimientos de inventario"""
-        movimientos = self.inventory_models.get_movimientos(self.tienda_filtro)
+        """Obtiene la primera página de movimientos (reinicia la paginación)"""
+        self._cursor = None
+        return self._siguiente_pagina()
+    
+    def get_next_page(self) -> Dict[str, Any]:
+        """Obtiene la siguiente página de movimientos para el scroll infinito"""
+        if not self._hay_mas:
+            return {'data': [], 'has_more': False}
+        data = self._siguiente_pagina()
+        return {'data': data, 'has_more': self._hay_mas}
+    
+    def _siguiente_pagina(self) -> List[Dict[str, Any]]:
+        movimientos, self._cursor = self.inventory_models.get_movimientos_pagina(
+            self.tienda_filtro, self.PAGE_SIZE, self._cursor
+        )
+        self._hay_mas = self._cursor is not None
         return [
             {
                 'id': m.id,
@@ -46,6 +64,8 @@ class MovimientosController(BaseController):
                 return self._registrar_ingreso(data)
             elif action == "registrar_salida":
                 return self._registrar_salida(data)
+            elif action == "registrar_venta":
+                return self._registrar_venta(data)
             else:
                 return False
         except Exception as e:
@@ -109,6 +129,33 @@ class MovimientosController(BaseController):
         self.inventory_models.registrar_salida_tienda(producto_id, cantidad_float, self.current_user.id, nota)
         return True
     
+    def _registrar_venta(self, data: Dict[str, Any]) -> bool:
+        """Registra un ticket de venta con varias líneas (todo o nada)"""
+        if not self.has_any_role(["ADMIN", "ENCARGADO", "VENDEDOR"]):
+            raise PermissionError("No tiene permisos para registrar ventas")
+        
+        lineas = data.get('lineas') or []
+        nota = data.get('nota')
+        
+        if not lineas:
+            raise ValueError("El ticket debe tener al menos un producto")
+        
+        carrito = []
+        for n, linea in enumerate(lineas, start=1):
+            producto_id = linea.get('producto_id')
+            if not producto_id:
+                raise ValueError(f"Línea {n}: producto requerido")
+            try:
+                cantidad_float = float(linea.get('cantidad'))
+            except (ValueError, TypeError):
+                raise ValueError(f"Línea {n}: cantidad inválida")
+            if cantidad_float <= 0:
+                raise ValueError(f"Línea {n}: la cantidad debe ser mayor a 0")
+            carrito.append({'producto_id': producto_id, 'cantidad': cantidad_float})
+        
+        self.inventory_models.registrar_venta(carrito, self.current_user.id, nota)
+        return True
+    
     def get_productos_for_selector(self) -> Dict[str, Any]:
         """Obtiene los productos disponibles para el selector"""
         productos = self.inventory_models.get_productos()
@@ -26,31 +26,31 @@ class ProductosController(BaseController):
         if self.tienda_filtro is not None:
             productos = [p for p in productos if p.tienda_id == self.tienda_filtro]
         
-        return [
-            {
-                'id': p.id,
-                'sku': p.sku,
-                'nombre': p.nombre,
-                'descripcion': p.descripcion or "",
-                'categoria': p.categoria or "",
-                'proveedor': p.proveedor or "",
-                'unidad': p.unidad,
-                'precio': f"{p.precio_unit:.2f}",
-                'stock_minimo': str(p.stock_minimo),
-                'tienda': self._get_tienda_name(p.tienda_id),
-                'estado': "Activo" if p.activo else "Inactivo"
-            }
-            for p in productos
-        ]
+        cargador = self.inventory_models.nuevo_cargador()
+        cargador.pedir("tiendas", *{p.tienda_id for p in productos})
+        return [self._to_dict(p, cargador) for p in productos]
     
-    def _get_tienda_name(self, tienda_id: int) -> str:
-        """Obtiene el nombre de la tienda por su ID"""
+    def _to_dict(self, p, cargador) -> Dict[str, Any]:
+        """Fila de la tabla de productos"""
+        return {
+            'id': p.id,
+            'sku': p.sku,
+            'nombre': p.nombre,
+            'descripcion': p.descripcion or "",
+            'categoria': p.categoria or "",
+            'proveedor': p.proveedor or "",
+            'unidad': p.unidad,
+            'precio': f"{p.precio_unit:.2f}",
+            'stock_minimo': str(p.stock_minimo),
+            'tienda': self._get_tienda_name(p.tienda_id, cargador),
+            'estado': "Activo" if p.activo else "Inactivo"
+        }
+    
+    def _get_tienda_name(self, tienda_id: int, cargador) -> str:
+        """Obtiene el nombre de la tienda por su ID (el cargador agrupa las búsquedas)"""
         try:
-            tiendas = self.inventory_models.get_tiendas()
-            for tienda in tiendas:
-                if tienda.id == tienda_id:
-                    return tienda.nombre
-            return f"Tienda {tienda_id}"
+            tienda = cargador.obtener("tiendas", tienda_id)
+            return tienda.nombre if tienda else f"Tienda {tienda_id}"
         except Exception as e:
             print(f"Error obteniendo nombre de tienda: {e}")
             return f"Tienda {tienda_id}"
@@ -155,16 +155,15 @@ class ProductosController(BaseController):
     
     def get_producto_by_id(self, producto_id: int) -> Optional[Dict[str, Any]]:
         """Obtiene un producto por ID"""
-        productos = self.get_data()
-        for producto in productos:
-            if producto['id'] == producto_id:
-                return producto
-        return None
+        cargador = self.inventory_models.nuevo_cargador()
+        p = cargador.obtener("productos", producto_id)
+        if p is None or (self.tienda_filtro is not None and p.tienda_id != self.tienda_filtro):
+            return None
+        return self._to_dict(p, cargador)
     
     def get_producto_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
         """Obtiene un producto por SKU"""
-        productos = self.get_data()
-        for producto in productos:
-            if producto['sku'] == sku:
-                return producto
-        return None
+        p = self.inventory_models.get_producto_por_sku(sku)
+        if p is None or (self.tienda_filtro is not None and p.tienda_id != self.tienda_filtro):
+            return None
+        return self._to_dict(p, self.inventory_models.nuevo_cargador())
@@ -2,11 +2,22 @@
 # File: inventory_app/mvc/controllers/reportes_controller.py
 # ==============================
 from __future__ import annotations
+from datetime import date
 from typing import List, Dict, Any, Optional
 
+from ...domain.tiempo import formatear
 from .base_controller import BaseController
 
 
+# Filtro de estado de la vista -> estados de stock a consultar (None = todos)
+ESTADOS_POR_FILTRO = {
+    "todos": None,
+    "ok": ["OK"],
+    "bajo_stock": ["BAJO MINIMO"],
+    "sin_stock": ["SIN STOCK"],
+}
+
+
 class ReportesController(BaseController):
     """Controlador para reportes y alertas"""
     
@@ -15,41 +26,20 @@ class ReportesController(BaseController):
         self.tienda_filtro = None
         self.status_filtro = "todos"
         self.search_filtro = ""
+        self.fecha_filtro = None  # None = stock actual; 'AAAA-MM-DD' = stock al cierre de ese día
         # Para usuarios no-ADMIN, filtrar automáticamente por su tienda asignada
         if self.current_user.rol != "ADMIN":
             user_info = self.get_user_info()
             self.tienda_filtro = user_info.get('tienda_id')
     
     def get_data(self) -> List[Dict[str, Any]]:
-        """Obtiene el reporte de stock"""
-        stock_report = self.inventory_models.get_stock_report(self.tienda_filtro)
-        
-        # Filtrar por estado si es necesario
-        filtered_report = []
-        for s in stock_report:
-            # Aplicar filtro de estado
-            estado_match = False
-            if self.status_filtro == "todos":
-                estado_match = True
-            elif self.status_filtro == "ok" and s.estado == "OK":
-                estado_match = True
-            elif self.status_filtro == "bajo_stock" and s.estado == "BAJO MINIMO":
-                estado_match = True
-            elif self.status_filtro == "sin_stock" and s.estado == "SIN STOCK":
-                estado_match = True
-            
-            # Aplicar filtro de búsqueda de producto
-            search_match = True
-            if self.search_filtro:
-                search_lower = self.search_filtro.lower()
-                sku_match = search_lower in s.producto_sku.lower()
-                nombre_match = search_lower in s.producto_nombre.lower()
-                search_match = sku_match or nombre_match
-            
-            # Solo agregar si pasa ambos filtros
-            if estado_match and search_match:
-                filtered_report.append(s)
-        
+        """Obtiene el reporte de stock ya filtrado por tienda, estado y búsqueda"""
+        stock_report = self.inventory_models.get_stock_report(
+            self.tienda_filtro,
+            estados=ESTADOS_POR_FILTRO[self.status_filtro],
+            texto=self.search_filtro,
+            al=self.fecha_filtro,
+        )
         return [
             {
                 'id': s.producto_sku,  # Usar SKU como ID
@@ -58,7 +48,7 @@ class ReportesController(BaseController):
                 'estado': s.estado,
                 'stock': s.cantidad
             }
-            for s in filtered_report
+            for s in stock_report
         ]
     
     def handle_action(self, action: str, data: Dict[str, Any]) -> bool:
@@ -70,12 +60,16 @@ class ReportesController(BaseController):
                 return self._set_status_filter(data)
             elif action == "set_search_filter":
                 return self._set_search_filter(data)
+            elif action == "set_fecha_filter":
+                return self._set_fecha_filter(data)
             elif action == "clear_tienda_filter":
                 return self._clear_tienda_filter()
             elif action == "clear_filters":
                 return self._clear_filters()
             elif action == "export_csv":
                 return self._export_csv(data)
+            elif action == "export_kardex":
+                return self._export_kardex(data)
             else:
                 return False
         except Exception as e:
@@ -90,7 +84,7 @@ class ReportesController(BaseController):
     def _set_status_filter(self, data: Dict[str, Any]) -> bool:
         """Establece el filtro de estado"""
         status_filter = data.get('status_filter')
-        if status_filter in ["todos", "ok", "bajo_stock", "sin_stock"]:
+        if status_filter in ESTADOS_POR_FILTRO:
             self.status_filtro = status_filter
             return True
         return False
@@ -101,6 +95,17 @@ class ReportesController(BaseController):
         self.search_filtro = search_text
         return True
     
+    def _set_fecha_filter(self, data: Dict[str, Any]) -> bool:
+        """Establece la fecha del reporte (None para volver al stock actual)"""
+        fecha = data.get('fecha') or None
+        if fecha is not None:
+            try:
+                date.fromisoformat(fecha)
+            except ValueError:
+                raise ValueError("Fecha inválida, use el formato AAAA-MM-DD")
+        self.fecha_filtro = fecha
+        return True
+    
     def _clear_tienda_filter(self) -> bool:
         """Limpia solo el filtro de tienda (mantiene el filtro de estado)"""
         self.tienda_filtro = None
@@ -111,6 +116,7 @@ class ReportesController(BaseController):
         self.tienda_filtro = None
         self.status_filtro = "todos"
         self.search_filtro = ""
+        self.fecha_filtro = None
         return True
     
     def _export_csv(self, data: Dict[str, Any]) -> bool:
@@ -125,13 +131,57 @@ class ReportesController(BaseController):
         # La lógica de exportación se manejará en la vista
         return True
     
+    def _producto_kardex(self, sku: str):
+        """Producto cuyo kardex se pide, validando que el usuario pueda verlo"""
+        producto = self.inventory_models.get_producto_por_sku(sku)
+        if not producto:
+            raise ValueError(f"Producto {sku} no encontrado")
+        if self.current_user.rol != "ADMIN" and producto.tienda_id != self.tienda_filtro:
+            raise PermissionError("Solo puede ver el kardex de productos de su tienda")
+        return producto
+    
+    def get_kardex(self, sku: str, desde: str, hasta: str) -> Dict[str, Any]:
+        """Kardex de un producto en su tienda; 'filas' se va leyendo a medida que se recorre"""
+        producto = self._producto_kardex(sku)
+        filas = self.inventory_models.get_kardex(producto.tienda_id, producto.id, desde, hasta)
+        return {
+            'titulo': f"{producto.sku} - {producto.nombre}",
+            'filas': (
+                {
+                    'fecha': formatear(f['ts']),
+                    'tipo': f['tipo'],
+                    'entrada': f['entrada'],
+                    'salida': f['salida'],
+                    'saldo': f['saldo'],
+                    'usuario': f['username'] or "",
+                    'nota': f['nota'] or ""
+                }
+                for f in filas
+            )
+        }
+    
+    def _export_kardex(self, data: Dict[str, Any]) -> bool:
+        """Exporta el kardex de un producto a CSV"""
+        if not self.validate_user_permission("ADMIN"):
+            raise PermissionError("Solo los administradores pueden exportar reportes")
+        
+        filename = data.get('filename')
+        if not filename:
+            raise ValueError("Nombre de archivo requerido")
+        
+        producto = self._producto_kardex(data.get('sku', ''))
+        self.inventory_models.exportar_kardex(
+            filename, producto.tienda_id, producto.id, data.get('desde'), data.get('hasta')
+        )
+        return True
+    
     def get_alerts(self) -> List[Dict[str, Any]]:
         """Obtiene las alertas de stock"""
         alerts = self.inventory_models.get_alerts()
         return [
             {
                 'tienda': a.tienda,
-                'almacen': a.almacen,
+                'almacen': a.tienda,
                 'producto': f"{a.producto_sku} - {a.producto_nombre}",
                 'stock': a.cantidad,
                 'minimo': a.minimo,
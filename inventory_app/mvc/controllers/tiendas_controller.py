@@ -10,32 +10,28 @@ from .base_controller import BaseController
 class TiendasController(BaseController):
     """Controlador para la gestión de tiendas"""
     
+    def __init__(self, inventory_models, user_models, current_user):
+        super().__init__(inventory_models, user_models, current_user)
+        self.busqueda = ""
+    
     def get_data(self) -> List[Dict[str, Any]]:
-        """Obtiene todas las tiendas con información completa"""
-        tiendas = self.inventory_models.get_tiendas()
-        result = []
-        
-        for t in tiendas:
-            # Obtener nombre del responsable si existe
-            responsable_nombre = "Sin asignar"
-            if t.responsable_id:
-                try:
-                    empleado = self.inventory_models.inventory_service.obtener_empleado_por_id(t.responsable_id)
-                    if empleado:
-                        responsable_nombre = f"{empleado.nombres} {empleado.apellidos}"
-                except Exception as e:
-                    print(f"Error al obtener responsable: {e}")
-            
-            result.append({
-                'id': t.id,
-                'nombre': t.nombre,
-                'direccion': t.direccion or '',
-                'telefono': t.telefono or '',
-                'email': t.email or '',
-                'responsable': responsable_nombre
-            })
-        
-        return result
+        """Obtiene las tiendas con información completa (una sola consulta), filtradas por la búsqueda"""
+        service = self.inventory_models.inventory_service
+        tiendas = service.listar_tiendas_detalle()
+        if self.busqueda:
+            # La búsqueda resuelve los ids con su índice; el detalle ya está en la lista
+            ids = {t.id for t in service.buscar_tiendas(self.busqueda)}
+            tiendas = [t for t in tiendas if t.id in ids]
+        return [{
+            'id': t.id,
+            'nombre': t.nombre,
+            'direccion': t.direccion or '',
+            'telefono': t.telefono or '',
+            'email': t.email or '',
+            'responsable': t.responsable_nombre or "Sin asignar",
+            'empleados': t.empleados,
+            'productos': t.productos
+        } for t in tiendas]
     
     def handle_action(self, action: str, data: Dict[str, Any]) -> bool:
         """Maneja las acciones de la vista de tiendas"""
@@ -46,11 +42,18 @@ class TiendasController(BaseController):
                 return self._edit_tienda(data)
             elif action == "delete_tienda":
                 return self._delete_tienda(data)
+            elif action == "set_busqueda":
+                return self._set_busqueda(data)
             else:
                 return False
         except Exception as e:
             raise Exception(f"Error en acción {action}: {str(e)}")
     
+    def _set_busqueda(self, data: Dict[str, Any]) -> bool:
+        """Establece el texto de búsqueda (vacío muestra todas las tiendas)"""
+        self.busqueda = (data.get('texto') or "").strip()
+        return True
+    
     def _create_tienda(self, data: Dict[str, Any]) -> bool:
         """Crea una nueva tienda"""
         if not self.validate_user_permission("ADMIN"):
@@ -2,11 +2,13 @@
 # File: inventory_app/mvc/models/inventory_models.py
 # ==============================
 from __future__ import annotations
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
 from ...domain.models import Tienda, Producto
+from ...domain.tiempo import formatear
+from ...services.cargador import CargadorLotes
 from ...services.inventory_service import InventarioService
 
 
@@ -97,6 +99,10 @@ class InventoryModels:
     def __init__(self, inventory_service: InventarioService):
         self.inventory_service = inventory_service
     
+    def nuevo_cargador(self) -> CargadorLotes:
+        """Cargador por lotes para resolver ids durante una solicitud"""
+        return self.inventory_service.cargador()
+    
     # Tiendas
     def get_tiendas(self) -> List[TiendaModel]:
         """Obtiene todas las tiendas"""
@@ -146,9 +152,17 @@ class InventoryModels:
         """Obtiene los movimientos de inventario"""
         # Usar Service Layer
         movimientos_dict = self.inventory_service.obtener_movimientos(tienda_id, limit)
-        
-        # Convertir a MovimientoModel
-        return [MovimientoModel(
+        return [self._to_movimiento_model(m) for m in movimientos_dict]
+    
+    def get_movimientos_pagina(self, tienda_id: Optional[int] = None, limit: int = 100,
+                               cursor: Optional[Tuple[Any, int]] = None) -> Tuple[List[MovimientoModel], Optional[Tuple[Any, int]]]:
+        """Obtiene una página de movimientos y el cursor para pedir la siguiente"""
+        movimientos_dict, siguiente = self.inventory_service.pagina_movimientos(tienda_id, limit, cursor)
+        return [self._to_movimiento_model(m) for m in movimientos_dict], siguiente
+    
+    def _to_movimiento_model(self, m: Dict[str, Any]) -> MovimientoModel:
+        """Convierte un movimiento del servicio a MovimientoModel"""
+        return MovimientoModel(
             id=m['id'],
             producto_id=m['producto_id'],
             producto_sku=m['sku'],
@@ -158,9 +172,9 @@ class InventoryModels:
             usuario_id=m['usuario_id'],
             usuario_nombre=m['username'],
             tienda_nombre=m['tienda_nombre'],
-            fecha=m['ts'][:16],  # Solo fecha y hora
+            fecha=formatear(m['ts']),  # Solo fecha y hora
             nota=m['nota']
-        ) for m in movimientos_dict]
+        )
     
     def registrar_salida(self, producto_id: int, tienda_id: int, cantidad: float, usuario_id: int, nota: Optional[str] = None) -> bool:
         """Registra una salida de producto"""
@@ -175,9 +189,8 @@ class InventoryModels:
     def registrar_salida_tienda(self, producto_id: int, cantidad: float, usuario_id: int, nota: Optional[str] = None) -> bool:
         """Registra una salida de producto directamente en la tienda"""
         try:
-            # Obtener el producto completo a través del servicio
-            productos = self.inventory_service.listar_productos()
-            producto = next((p for p in productos if p.id == producto_id), None)
+            # Obtener solo el producto a través del servicio
+            producto = self.inventory_service.obtener_productos_por_ids([producto_id]).get(producto_id)
             
             if not producto:
                 raise ValueError("Producto no encontrado")
@@ -190,6 +203,12 @@ class InventoryModels:
             print(f"Error al registrar salida: {e}")
             raise e
     
+    def registrar_venta(self, lineas: List[Dict[str, Any]], usuario_id: int, nota: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Registra un ticket de venta con varias líneas en una sola transacción"""
+        return self.inventory_service.registrar_venta(
+            [(l['producto_id'], l['cantidad']) for l in lineas], usuario_id, nota
+        )
+    
     def get_productos_con_stock(self, filtro: str = "") -> Dict[str, Any]:
         """Obtiene productos con stock disponible"""
         try:
@@ -216,56 +235,43 @@ class InventoryModels:
             return {'productos': []}
     
     # Stock y Reportes
-    def get_stock_report(self, tienda_id: Optional[int] = None) -> List[StockModel]:
-        """Obtiene el reporte de stock"""
-        if tienda_id:
-            # Usar Service Layer para una tienda específica
-            reporte_dict = self.inventory_service.items_bajo_minimo(tienda_id) if False else []
-            # Para obtener todos los items de una tienda, usar el reporte completo
-            tienda = next((t for t in self.inventory_service.listar_tiendas() if t.id == tienda_id), None)
-            tienda_nombre = tienda.nombre if tienda else f"Tienda {tienda_id}"
-            
-            filas = self.inventory_service._ri.reporte_stock(tienda_id)
-            return [StockModel(
-                tienda=tienda_nombre,
-                producto_sku=r['sku'],
-                producto_nombre=r['nombre'],
-                cantidad=r['cantidad'],
-                minimo=r['minimo'],
-                estado=r['estado']
-            ) for r in filas]
+    def _to_stock_model(self, r: Dict[str, Any]) -> StockModel:
+        return StockModel(
+            tienda=r['tienda_nombre'],
+            producto_sku=r['sku'],
+            producto_nombre=r['nombre'],
+            cantidad=r['cantidad'],
+            minimo=r['minimo'],
+            estado=r['estado']
+        )
+    
+    def get_stock_report(self, tienda_id: Optional[int] = None, estados: Optional[List[str]] = None,
+                         texto: str = "", orden: str = "tienda", limit: Optional[int] = None,
+                         al: Optional[str] = None) -> List[StockModel]:
+        """Obtiene el reporte de stock (de una tienda o de todas) con los filtros aplicados en SQL.
+
+        Con ``al`` ('AAAA-MM-DD') devuelve el stock al cierre de ese día.
+        """
+        if al:
+            filas = self.inventory_service.stock_al(al, tienda_id, estados, texto)
         else:
-            # Obtener para todas las tiendas
-            result = []
-            for tienda in self.inventory_service.listar_tiendas():
-                filas = self.inventory_service._ri.reporte_stock(tienda.id)
-                for r in filas:
-                    result.append(StockModel(
-                        tienda=tienda.nombre,
-                        producto_sku=r['sku'],
-                        producto_nombre=r['nombre'],
-                        cantidad=r['cantidad'],
-                        minimo=r['minimo'],
-                        estado=r['estado']
-                    ))
-            return result
+            filas = self.inventory_service.consultar_stock(tienda_id, estados, texto, orden, limit)
+        return [self._to_stock_model(r) for r in filas]
     
     def get_alerts(self) -> List[StockModel]:
-        """Obtiene las alertas de stock"""
-        # Obtener alertas para todas las tiendas usando Service Layer
-        result = []
-        for tienda in self.inventory_service.listar_tiendas():
-            alertas = self.inventory_service.items_bajo_minimo(tienda.id)
-            for a in alertas:
-                result.append(StockModel(
-                    tienda=tienda.nombre,
-                    producto_sku=a['sku'],
-                    producto_nombre=a['nombre'],
-                    cantidad=a['cantidad'],
-                    minimo=a['minimo'],
-                    estado=a['estado']
-                ))
-        return result
+        """Obtiene las alertas de stock de todas las tiendas"""
+        return [self._to_stock_model(r) for r in self.inventory_service.alertas_stock()]
+    
+    def get_producto_por_sku(self, sku: str) -> Optional[ProductoModel]:
+        producto = self.inventory_service.buscar_producto_por_sku(sku)
+        return ProductoModel.from_domain(producto) if producto else None
+    
+    def get_kardex(self, tienda_id: int, producto_id: int, desde: str, hasta: str) -> Iterator[Dict[str, Any]]:
+        """Kardex del producto como iterador (saldo inicial + movimientos con saldo acumulado)"""
+        return self.inventory_service.kardex(tienda_id, producto_id, desde, hasta)
+    
+    def exportar_kardex(self, filename: str, tienda_id: int, producto_id: int, desde: str, hasta: str) -> int:
+        return self.inventory_service.exportar_kardex(filename, tienda_id, producto_id, desde, hasta)
     
     def get_empleado_by_user_id(self, user_id: int):
         """Obtiene un empleado por su ID de usuario"""
@@ -58,9 +58,9 @@ class BaseView(ABC):
         self.tree.grid(row=0, column=0, sticky="nsew", padx=1, pady=1)
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(table_container, orient="vertical", command=self.tree.yview)
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(table_container, orient="vertical", command=self.tree.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
     
     def create_button(self, text: str, command, bg_color: str = None, **kwargs) -> tk.Button:
         """Crea un botón con el estilo estándar"""
@@ -78,6 +78,25 @@ class BaseView(ABC):
             **kwargs
         )
     
+    def create_search_box(self, label: str = "Buscar:") -> tk.Entry:
+        """Caja de búsqueda a la derecha de los botones; cada cambio envía la acción
+        ``set_busqueda`` al controlador de la vista y recarga la tabla"""
+        search_var = tk.StringVar()
+        entry = tk.Entry(self.action_frame, textvariable=search_var, font=("Arial", 11), width=25)
+        entry.pack(side="right", padx=5)
+        tk.Label(self.action_frame, text=label, bg=self.white, font=("Arial", 11)).pack(side="right")
+        
+        def buscar(*args):
+            self.on_action("handle_view_action", {
+                "view_name": self.get_view_name(),
+                "action": "set_busqueda",
+                "action_data": {"texto": search_var.get()}
+            })
+            self.refresh_data()
+        
+        search_var.trace("w", buscar)
+        return entry
+    
     def setup_table_columns(self, columns: List[str], widths: List[int] = None):
         """Configura las columnas de la tabla"""
         if widths is None:
@@ -98,6 +117,10 @@ class BaseView(ABC):
     def populate_table(self, data: List[Dict[str, Any]]):
         """Pobla la tabla con datos"""
         self.clear_table()
+        self.append_to_table(data)
+    
+    def append_to_table(self, data: List[Dict[str, Any]]):
+        """Agrega filas al final de la tabla sin borrar las existentes"""
         for row_data in data:
             values = []
             for col in self.tree["columns"]:
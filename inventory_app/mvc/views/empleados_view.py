@@ -21,6 +21,9 @@ class EmpleadosView(BaseView):
         btn_eliminar = self.create_button("Eliminar Empleado", self._eliminar_empleado, self.red_color)
         btn_eliminar.pack(side="left", padx=5)
         
+        # Búsqueda por nombre, apellido o DNI
+        self.create_search_box()
+        
         # Configurar tabla
         columns = ["ID", "Usuario", "Nombres", "Apellidos", "DNI", "Jornada", "Tienda", "Rol", "Estado"]
         widths = [60, 120, 120, 120, 100, 80, 120, 80, 80]
@@ -34,6 +34,11 @@ class MovimientosView(BaseView):
         widths = [60, 200, 80, 80, 100, 120, 120, 150]
         self.setup_table_columns(columns, widths)
         
+        # Scroll infinito: al acercarse al final se pide la siguiente página
+        self._hay_mas = False
+        self._cargando = False
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        
         # Cargar datos iniciales
         self.refresh_data()
     
@@ -41,6 +46,33 @@ class MovimientosView(BaseView):
         """Retorna el nombre de la vista"""
         return "movimientos"
     
+    def refresh_data(self):
+        """Recarga la primera página de movimientos"""
+        super().refresh_data()
+        self._hay_mas = True
+    
+    def _on_tree_scroll(self, first, last):
+        """Actualiza la scrollbar y carga más filas al llegar cerca del final"""
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.95 and self._hay_mas and not self._cargando:
+            self._cargando = True
+            self.main_frame.after_idle(self._cargar_siguiente_pagina)
+    
+    def _cargar_siguiente_pagina(self):
+        """Agrega la siguiente página de movimientos a la tabla"""
+        try:
+            pagina = self.on_action("load_more_movimientos", {})
+            if not pagina:
+                self._hay_mas = False
+                return
+            self._hay_mas = pagina.get('has_more', False)
+            self.append_to_table(pagina.get('data', []))
+        except Exception as e:
+            self._hay_mas = False
+            self.show_error("Error", f"Error al cargar más movimientos: {str(e)}")
+        finally:
+            self._cargando = False
+    
     def _registrar_ingreso(self):
         """Muestra formulario para registrar ingreso de producto"""
         self._mostrar_formulario_ingreso()
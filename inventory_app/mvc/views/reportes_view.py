@@ -2,10 +2,16 @@
 # File: inventory_app/mvc/views/reportes_view.py
 # ==============================
 from __future__ import annotations
+from datetime import date
+from itertools import islice
 from typing import List, Dict, Any
 import tkinter as tk
+from tkinter import ttk, filedialog
 from .base_view import BaseView
 
+# Filas del kardex que se agregan a la tabla por cada vuelta del bucle de eventos
+KARDEX_TANDA = 200
+
 
 class ReportesView(BaseView):
     """Vista para reportes y alertas del sistema"""
@@ -122,6 +128,56 @@ class ReportesView(BaseView):
         )
         btn_clear_search.pack(side="left", padx=(5, 0))
         
+        # Separador
+        separator = tk.Frame(self.action_frame, bg='#D5D5D5', width=2)
+        separator.pack(side="left", fill="y", padx=15, pady=5)
+        
+        # Frame para stock a una fecha (vacío = stock actual)
+        fecha_frame = tk.Frame(self.action_frame, bg=self.white)
+        fecha_frame.pack(side="left", padx=5)
+        
+        fecha_label = tk.Label(
+            fecha_frame,
+            text="Stock al:",
+            bg=self.white,
+            font=("Arial", 11, "bold")
+        )
+        fecha_label.pack(side="left", padx=(0, 10))
+        
+        self.fecha_var = tk.StringVar()
+        fecha_entry = tk.Entry(
+            fecha_frame,
+            textvariable=self.fecha_var,
+            font=('Arial', 10),
+            relief='solid',
+            bd=1,
+            width=12,
+            highlightthickness=1,
+            highlightcolor='#2E86C1',
+            highlightbackground='#D5D5D5'
+        )
+        fecha_entry.pack(side="left", ipady=4)
+        fecha_entry.bind("<Return>", lambda event: self._on_fecha_change())
+        
+        btn_clear_fecha = tk.Button(
+            fecha_frame,
+            text="✕",
+            command=self._clear_fecha,
+            bg='#95A5A6',
+            fg='white',
+            font=('Arial', 10, 'bold'),
+            relief='flat',
+            cursor='hand2',
+            bd=0,
+            padx=8,
+            pady=4
+        )
+        btn_clear_fecha.pack(side="left", padx=(5, 0))
+        
+        # Kardex del producto seleccionado
+        btn_kardex = self.create_button("Kardex", self._mostrar_kardex, self.light_blue)
+        btn_kardex.pack(side="left", padx=(15, 0))
+        
         # Configurar tabla
         columns = ["ID", "Producto", "Tienda", "Estado", "Stock"]
         widths = [80, 200, 120, 100, 80]
@@ -172,3 +228,130 @@ class ReportesView(BaseView):
         """Limpia el campo de búsqueda"""
         self.search_var.set("")
     
+    def _mostrar_kardex(self):
+        """Abre el kardex del producto seleccionado, cargándolo por tandas"""
+        selected = self.get_selected_item()
+        if not selected:
+            self.show_warning("Advertencia", "Seleccione un producto para ver su kardex")
+            return
+        sku = str(selected['data'].get('id', ''))
+        
+        hoy = date.today()
+        desde = self.ask_string("Kardex", "Desde (AAAA-MM-DD):", hoy.replace(day=1).isoformat())
+        if not desde:
+            return
+        hasta = self.ask_string("Kardex", "Hasta (AAAA-MM-DD):", hoy.isoformat())
+        if not hasta:
+            return
+        
+        try:
+            kardex = self.on_action("get_kardex", {"sku": sku, "desde": desde, "hasta": hasta})
+        except Exception as e:
+            self.show_error("Error", f"Error al obtener kardex: {str(e)}")
+            return
+        if not kardex:
+            return
+        
+        window = tk.Toplevel(self.parent_frame.winfo_toplevel())
+        window.title(f"Kardex {kardex['titulo']}")
+        window.geometry("900x500")
+        window.configure(bg='white')
+        
+        header = tk.Frame(window, bg='white')
+        header.pack(fill='x', padx=20, pady=(15, 10))
+        tk.Label(
+            header,
+            text=f"{kardex['titulo']}  ({desde} a {hasta})",
+            bg='white',
+            font=('Arial', 12, 'bold')
+        ).pack(side='left')
+        tk.Button(
+            header,
+            text="Exportar CSV",
+            command=lambda: self._exportar_kardex(sku, desde, hasta),
+            bg=self.blue_color,
+            fg=self.white,
+            font=('Arial', 10, 'bold'),
+            relief='flat',
+            cursor='hand2',
+            padx=10,
+            pady=4
+        ).pack(side='right')
+        
+        container = tk.Frame(window, bg='white')
+        container.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+        columnas = ("fecha", "tipo", "entrada", "salida", "saldo", "usuario", "nota")
+        tree = ttk.Treeview(container, columns=columnas, show="headings")
+        for col, width in zip(columnas, (130, 110, 80, 80, 90, 100, 200)):
+            tree.heading(col, text=col.capitalize())
+            tree.column(col, width=width)
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        
+        filas = kardex['filas']
+        
+        def cargar_tanda():
+            if not window.winfo_exists():
+                filas.close()
+                return
+            try:
+                tanda = list(islice(filas, KARDEX_TANDA))
+            except Exception as e:
+                self.show_error("Error", f"Error al cargar kardex: {str(e)}")
+                return
+            for f in tanda:
+                tree.insert("", "end", values=[f[col] for col in columnas])
+            if len(tanda) == KARDEX_TANDA:
+                window.after(1, cargar_tanda)
+        
+        cargar_tanda()
+    
+    def _exportar_kardex(self, sku: str, desde: str, hasta: str):
+        """Exporta el kardex mostrado a un archivo CSV"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")],
+            initialfile=f"kardex_{sku}_{desde}_{hasta}.csv"
+        )
+        if not filename:
+            return
+        try:
+            success = self.on_action("handle_view_action", {
+                "view_name": "reportes",
+                "action": "export_kardex",
+                "action_data": {
+                    "sku": sku,
+                    "desde": desde,
+                    "hasta": hasta,
+                    "filename": filename
+                }
+            })
+            if success:
+                self.show_info("Éxito", f"Kardex exportado a {filename}")
+        except Exception as e:
+            self.show_error("Error", f"Error al exportar kardex: {str(e)}")
+    
+    def _on_fecha_change(self):
+        """Muestra el stock al cierre de la fecha ingresada (AAAA-MM-DD)"""
+        try:
+            fecha = self.fecha_var.get().strip() or None
+            success = self.on_action("handle_view_action", {
+                "view_name": "reportes",
+                "action": "set_fecha_filter",
+                "action_data": {
+                    "fecha": fecha
+                }
+            })
+            
+            if success:
+                self.refresh_data()
+        except Exception as e:
+            self.show_error("Error", f"Error al cambiar fecha: {str(e)}")
+    
+    def _clear_fecha(self):
+        """Vuelve al stock actual"""
+        self.fecha_var.set("")
+        self._on_fecha_change()
+    
@@ -21,6 +21,9 @@ class TiendasView(BaseView):
         btn_quitar = self.create_button("Quitar tienda", self._eliminar_tienda, self.red_color)
         btn_quitar.pack(side="left", padx=5)
         
+        # Búsqueda por nombre
+        self.create_search_box()
+        
         # Configurar tabla
         columns = ["ID", "Nombre", "Dirección", "Teléfono", "Email", "Responsable"]
         widths = [60, 180, 200, 100, 150, 150]
@@ -115,7 +118,9 @@ class TiendasView(BaseView):
             # Obtener solo empleados con rol ENCARGADO
             try:
                 empleados = self.controller.inventory_models.inventory_service.listar_empleados()
-                usuarios_data = [self.controller.user_models.get_usuario_por_id(e.usuario_id) for e in empleados]
+                usuarios = self.controller.inventory_models.nuevo_cargador().obtener_varios(
+                    "usuarios", (e.usuario_id for e in empleados))
+                usuarios_data = [usuarios.get(e.usuario_id) for e in empleados]
                 
                 # Filtrar solo ENCARGADOS
                 encargados = [(e, u) for e, u in zip(empleados, usuarios_data) if u and u.rol == "ENCARGADO"]
@@ -372,7 +377,9 @@ class TiendasView(BaseView):
             # Obtener solo empleados con rol ENCARGADO
             try:
                 empleados = self.controller.inventory_models.inventory_service.listar_empleados()
-                usuarios_data = [self.controller.user_models.get_usuario_por_id(e.usuario_id) for e in empleados]
+                usuarios = self.controller.inventory_models.nuevo_cargador().obtener_varios(
+                    "usuarios", (e.usuario_id for e in empleados))
+                usuarios_data = [usuarios.get(e.usuario_id) for e in empleados]
                 
                 # Filtrar solo ENCARGADOS
                 encargados = [(e, u) for e, u in zip(empleados, usuarios_data) if u and u.rol == "ENCARGADO"]
@@ -0,0 +1,68 @@
+# ==============================
+# File: inventory_app/services/cargador.py
+# ==============================
+"""
+Cargador por lotes (dataloader) para búsquedas por id.
+
+Vive lo que dura una solicitud (armar una tabla, abrir un formulario): se
+anotan los ids que se van a necesitar con ``pedir`` y la primera lectura
+resuelve todos los pendientes de ese tipo con un solo ``WHERE id IN (...)``.
+Lo ya leído queda memorizado hasta que el cargador se descarta, así que no
+debe sobrevivir a una escritura.
+
+    cargador = servicio.cargador()
+    for p in productos:
+        cargador.pedir("tiendas", p.tienda_id)
+    nombre = cargador.obtener("tiendas", productos[0].tienda_id).nombre
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+# Función de repositorio que resuelve un lote: ids -> {id: entidad}
+Resolutor = Callable[[Iterable[int]], Dict[int, Any]]
+
+
+class CargadorLotes:
+    def __init__(self, resolutores: Dict[str, Resolutor]):
+        self._resolutores = resolutores
+        self._memoria: Dict[str, Dict[int, Any]] = {tipo: {} for tipo in resolutores}
+        self._pendientes: Dict[str, Set[int]] = {tipo: set() for tipo in resolutores}
+        self.consultas = 0
+
+    def _tipo(self, tipo: str) -> str:
+        if tipo not in self._resolutores:
+            raise ValueError(f"Tipo de entidad desconocido: {tipo}")
+        return tipo
+
+    def pedir(self, tipo: str, *ids: Optional[int]) -> None:
+        """Anota ids para el próximo lote (None y los ya cargados se ignoran)"""
+        memoria = self._memoria[self._tipo(tipo)]
+        self._pendientes[tipo].update(i for i in ids if i is not None and i not in memoria)
+
+    def _despachar(self, tipo: str) -> None:
+        pendientes = self._pendientes[tipo]
+        if not pendientes:
+            return
+        encontrados = self._resolutores[tipo](pendientes)
+        self.consultas += 1
+        memoria = self._memoria[tipo]
+        # Los inexistentes se memorizan como None para no volver a buscarlos
+        memoria.update(dict.fromkeys(pendientes))
+        memoria.update(encontrados)
+        pendientes.clear()
+
+    def obtener(self, tipo: str, id_: Optional[int]) -> Optional[Any]:
+        """Entidad con ese id (None si no existe); resuelve el lote pendiente del tipo"""
+        if id_ is None:
+            return None
+        self.pedir(tipo, id_)
+        self._despachar(tipo)
+        return self._memoria[tipo][id_]
+
+    def obtener_varios(self, tipo: str, ids: Iterable[Optional[int]]) -> Dict[int, Any]:
+        """{id: entidad} de los ids que existen, en un solo lote"""
+        ids = [i for i in ids if i is not None]
+        self.pedir(tipo, *ids)
+        self._despachar(tipo)
+        memoria = self._memoria[tipo]
+        return {i: memoria[i] for i in ids if memoria[i] is not None}
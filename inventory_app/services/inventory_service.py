@@ -2,12 +2,30 @@
 # File: inventory_app/services/inventory_service.py
 # ==============================
 from __future__ import annotations
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import sqlite3
 
-from ..domain.models import Usuario, Tienda, Producto, Empleado
+from ..domain.models import Usuario, Tienda, TiendaDetalle, Producto, Empleado, EmpleadoDetalle, LineaMovimiento
 from ..domain.interfaces import RepoUsuarios, RepoTiendas, RepoProductos, RepoInventario, RepoEmpleados, Reporte
-from .reports import ReporteTablaTexto
+from ..domain.tiempo import MS_POR_DIA, ahora_ms, dia_ms, formatear
+from .cargador import CargadorLotes
+from .reports import COLUMNAS_KARDEX, ReporteTablaTexto, ReporteValorizacionTexto, escribir_csv
+
+# Cada cuánto se guarda una foto del stock para las consultas a una fecha
+SNAPSHOT_INTERVALO = timedelta(days=1)
+# Filas del kardex leídas por consulta
+KARDEX_PAGINA = 500
+
+
+def _fecha_iso(fecha: date | str) -> str:
+    """Acepta date/datetime o 'AAAA-MM-DD' y devuelve 'AAAA-MM-DD'"""
+    if isinstance(fecha, date):
+        return fecha.isoformat()[:10]
+    try:
+        return date.fromisoformat(fecha).isoformat()
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {fecha} (formato AAAA-MM-DD)") from None
 
 
 class InventarioService:
@@ -18,6 +36,15 @@ class InventarioService:
         self._ri = ri
         self._re = re
 
+    def cargador(self) -> CargadorLotes:
+        """Cargador por lotes nuevo para una solicitud (usuarios, empleados, tiendas, productos)"""
+        return CargadorLotes({
+            "usuarios": self._ru.obtener_por_ids,
+            "empleados": self._re.obtener_por_ids,
+            "tiendas": self._rt.obtener_por_ids,
+            "productos": self._rp.obtener_por_ids,
+        })
+
     # Auth
     def login(self, username: str, password: str) -> Optional[Usuario]:
         return self._ru.autenticar(username, password)
@@ -30,6 +57,13 @@ class InventarioService:
 
     def listar_tiendas(self) -> List[Tienda]:
         return self._rt.listar_tiendas()
+
+    def listar_tiendas_detalle(self) -> List[TiendaDetalle]:
+        """Listado de tiendas con responsable y totales (una consulta)"""
+        return self._rt.listar_tiendas_detalle()
+
+    def buscar_tiendas(self, q: str) -> List[Tienda]:
+        return self._rt.buscar_tiendas(q)
     
     def actualizar_tienda(self, tienda_id: int, nombre: str, direccion: Optional[str] = None,
                          telefono: Optional[str] = None, email: Optional[str] = None,
@@ -71,6 +105,12 @@ class InventarioService:
 
     def listar_productos(self, q: str = "") -> List[Producto]:
         return self._rp.listar_productos(q)
+
+    def buscar_producto_por_sku(self, sku: str) -> Optional[Producto]:
+        return self._rp.buscar_por_sku(sku)
+
+    def obtener_productos_por_ids(self, ids: Iterable[int]) -> Dict[int, Producto]:
+        return self._rp.obtener_por_ids(ids)
     
     def buscar_productos_con_stock(self, filtro: str = "", stock_mayor_a: float = 0):
         """Busca productos que tengan stock disponible"""
@@ -94,18 +134,156 @@ class InventarioService:
     def egresar(self, tienda_id: int, producto_id: int, cantidad: float, usuario_id: int, nota: str | None = None) -> None:
         self._ri.ajustar_stock(tienda_id, producto_id, -abs(cantidad), usuario_id, nota)
 
+    def ingresar_lote(self, lineas: Iterable[Tuple[int, int, float]], usuario_id: int, nota: str | None = None) -> List[Dict[str, Any]]:
+        """Registra varios ingresos (tienda_id, producto_id, cantidad) en una sola transacción"""
+        return self._ri.ajustar_stock_lote(self._lineas(lineas, 1, nota), usuario_id)
+
+    def egresar_lote(self, lineas: Iterable[Tuple[int, int, float]], usuario_id: int, nota: str | None = None) -> List[Dict[str, Any]]:
+        """Registra varias salidas (tienda_id, producto_id, cantidad) en una sola transacción"""
+        return self._ri.ajustar_stock_lote(self._lineas(lineas, -1, nota), usuario_id)
+
+    def registrar_venta(self, lineas: Iterable[Tuple[int, float]], usuario_id: int, nota: str | None = None) -> List[Dict[str, Any]]:
+        """Registra un ticket de venta (producto_id, cantidad) de forma atómica.
+
+        Cada producto sale de su propia tienda. Si alguna línea falla (producto
+        inexistente o inactivo, stock insuficiente) no se registra ninguna.
+        """
+        lineas = list(lineas)
+        if not lineas:
+            raise ValueError("El ticket no tiene líneas")
+        productos = self._rp.obtener_por_ids(pid for pid, _ in lineas)
+        errores = []
+        for n, (producto_id, _) in enumerate(lineas, start=1):
+            producto = productos.get(producto_id)
+            if producto is None:
+                errores.append(f"Línea {n}: producto {producto_id} no encontrado")
+            elif not producto.activo:
+                errores.append(f"Línea {n}: el producto {producto.sku} está inactivo")
+        if errores:
+            raise ValueError("\n".join(errores))
+        return self.egresar_lote(
+            [(productos[pid].tienda_id, pid, cantidad) for pid, cantidad in lineas],
+            usuario_id,
+            nota,
+        )
+
+    def _lineas(self, lineas: Iterable[Tuple[int, int, float]], signo: int, nota: str | None) -> List[LineaMovimiento]:
+        resultado = []
+        for n, (tienda_id, producto_id, cantidad) in enumerate(lineas, start=1):
+            if cantidad is None or cantidad <= 0:
+                raise ValueError(f"Línea {n}: la cantidad debe ser mayor a 0")
+            resultado.append(LineaMovimiento(tienda_id, producto_id, signo * cantidad, nota))
+        return resultado
+
     def reporte_stock(self, tienda_id: int, renderer: Reporte | None = None) -> str:
         filas = self._ri.reporte_stock(tienda_id)
         renderer = renderer or ReporteTablaTexto()
         return renderer.render(filas)
 
+    def valorizacion(self, agrupar_por: Iterable[str] = ("tienda", "categoria", "proveedor"),
+                     tienda_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Valor del stock (cantidad × precio unitario) agrupado por tienda, categoría y/o proveedor"""
+        return self._ri.valorizacion(agrupar_por, tienda_id)
+
+    def reporte_valorizacion(self, agrupar_por: Iterable[str] = ("tienda", "categoria", "proveedor"),
+                             tienda_id: Optional[int] = None, renderer: Reporte | None = None) -> str:
+        renderer = renderer or ReporteValorizacionTexto()
+        return renderer.render(self.valorizacion(agrupar_por, tienda_id))
+
+    def consultar_stock(self, tienda_id: Optional[int] = None, estados: Optional[Iterable[str]] = None,
+                        texto: str = "", orden: str = "tienda", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Reporte de stock con los filtros resueltos en la base de datos"""
+        if limit is not None and limit <= 0:
+            raise ValueError("El límite debe ser mayor a 0")
+        return self._ri.consultar_reporte_stock(tienda_id, estados, texto, orden, limit)
+
+    def alertas_stock(self, tienda_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Productos en BAJO MINIMO o SIN STOCK de una tienda o de todas"""
+        return self._ri.obtener_alertas(tienda_id)
+
+    def transiciones_stock(self, tienda_id: Optional[int] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        return self._ri.obtener_transiciones_stock(tienda_id, limit)
+
+    def resumen_movimientos(self, desde: date | str, hasta: date | str, tienda_id: Optional[int] = None,
+                            producto_id: Optional[int] = None, por_dia: bool = False) -> List[Dict[str, Any]]:
+        """Ingresos y salidas (totales y cantidad de movimientos) entre dos fechas, ambas inclusive.
+
+        Se responde desde el resumen diario, sin recorrer los movimientos.
+        """
+        desde, hasta = _fecha_iso(desde), _fecha_iso(hasta)
+        if desde > hasta:
+            raise ValueError("La fecha inicial no puede ser posterior a la final")
+        return self._ri.resumen_movimientos(desde, hasta, tienda_id, producto_id, por_dia)
+
+    def reconstruir_resumen_diario(self, desde: date | str | None = None, hasta: date | str | None = None) -> int:
+        """Recalcula el resumen diario desde los movimientos (todo, o solo el rango indicado)"""
+        return self._ri.reconstruir_resumen_diario(
+            _fecha_iso(desde) if desde else None, _fecha_iso(hasta) if hasta else None
+        )
+
+    def stock_al(self, fecha: date | str, tienda_id: Optional[int] = None,
+                 estados: Optional[Iterable[str]] = None, texto: str = "") -> List[Dict[str, Any]]:
+        """Stock al cierre del día ``fecha`` (incluye todos sus movimientos)"""
+        fin_del_dia = dia_ms(_fecha_iso(fecha)) + MS_POR_DIA
+        return self._ri.stock_al(fin_del_dia, tienda_id, estados, texto)
+
+    def tomar_snapshot_stock(self) -> Dict[str, Any]:
+        return self._ri.tomar_snapshot_stock()
+
+    def snapshot_periodico(self, intervalo: timedelta = SNAPSHOT_INTERVALO) -> Optional[Dict[str, Any]]:
+        """Toma una foto del stock si la última tiene más de ``intervalo``; devuelve la nueva o None"""
+        ultimo = self._ri.ultimo_snapshot_stock()
+        if ultimo and ultimo["ts"] > ahora_ms() - intervalo // timedelta(milliseconds=1):
+            return None
+        return self._ri.tomar_snapshot_stock()
+
+    def kardex(self, tienda_id: int, producto_id: int, desde: date | str, hasta: date | str,
+               pagina: int = KARDEX_PAGINA) -> Iterator[Dict[str, Any]]:
+        """Kardex de un producto entre dos fechas (inclusive), fila por fila.
+
+        La primera fila es el saldo inicial; las demás son los movimientos con su
+        saldo acumulado. Se lee por páginas, sin retener la conexión entre filas.
+        """
+        desde, hasta = _fecha_iso(desde), _fecha_iso(hasta)
+        if desde > hasta:
+            raise ValueError("La fecha inicial no puede ser posterior a la final")
+        inicio, fin = dia_ms(desde), dia_ms(hasta) + MS_POR_DIA
+        saldo = self._ri.saldo_al(tienda_id, producto_id, inicio)
+        yield {"id": None, "ts": inicio, "tipo": "SALDO INICIAL", "nota": None, "username": None,
+               "entrada": 0.0, "salida": 0.0, "saldo": saldo}
+        cursor = None
+        while True:
+            filas = self._ri.kardex(tienda_id, producto_id, inicio, fin, saldo, cursor, pagina)
+            yield from filas
+            if len(filas) < pagina:
+                return
+            ultima = filas[-1]
+            cursor, saldo = (ultima["ts"], ultima["id"]), ultima["saldo"]
+
+    def exportar_kardex(self, ruta: str, tienda_id: int, producto_id: int,
+                        desde: date | str, hasta: date | str) -> int:
+        """Escribe el kardex en un CSV a medida que se lee; devuelve las filas escritas"""
+        filas = ({**f, "ts": formatear(f["ts"], segundos=True)} for f in self.kardex(tienda_id, producto_id, desde, hasta))
+        return escribir_csv(ruta, filas, COLUMNAS_KARDEX)
+
     def items_bajo_minimo(self, tienda_id: int):
-        filas = self._ri.reporte_stock(tienda_id)
-        return [r for r in filas if r["estado"] in ("SIN STOCK", "BAJO MINIMO")]
+        return self._ri.obtener_alertas(tienda_id)
     
-    def obtener_movimientos(self, tienda_id: Optional[int] = None, limit: int = 200):
-        """Obtiene movimientos con información completa"""
-        return self._ri.obtener_movimientos(tienda_id, limit)
+    def obtener_movimientos(self, tienda_id: Optional[int] = None, limit: int = 200, cursor: Optional[Tuple[Any, int]] = None,
+                            historico: bool = False):
+        """Obtiene movimientos con información completa (``historico`` incluye los años archivados)"""
+        return self._ri.obtener_movimientos(tienda_id, limit, cursor, historico)
+
+    def pagina_movimientos(self, tienda_id: Optional[int] = None, limit: int = 100,
+                           cursor: Optional[Tuple[Any, int]] = None,
+                           historico: bool = False) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, int]]]:
+        """Devuelve una página de movimientos y el cursor de la siguiente (None si no hay más)"""
+        movimientos = self._ri.obtener_movimientos(tienda_id, limit, cursor, historico)
+        siguiente = None
+        if len(movimientos) == limit:
+            ultimo = movimientos[-1]
+            siguiente = (ultimo['ts'], ultimo['id'])
+        return movimientos, siguiente
 
     # Empleados
     def crear_empleado(self, usuario_id: int, nombres: str, apellidos: str, dni: str, jornada: str, tienda_id: int) -> Empleado:
@@ -114,6 +292,13 @@ class InventarioService:
     def listar_empleados(self) -> List[Empleado]:
         return self._re.listar_empleados()
 
+    def listar_empleados_detalle(self, tienda_id: Optional[int] = None) -> List[EmpleadoDetalle]:
+        """Listado de empleados con usuario y tienda (una consulta), opcionalmente de una tienda"""
+        return self._re.listar_empleados_detalle(tienda_id)
+
+    def buscar_empleados(self, q: str) -> List[Empleado]:
+        return self._re.buscar_empleados(q)
+
     def obtener_empleado_por_usuario(self, usuario_id: int) -> Optional[Empleado]:
         return self._re.obtener_empleado_por_usuario(usuario_id)
 
@@ -2,9 +2,11 @@
 # File: inventory_app/services/reports.py
 # ==============================
 from __future__ import annotations
-from typing import Iterable, Dict, Any
+from typing import Iterable, Dict, Any, Sequence
+import csv
 
 from ..domain.interfaces import Reporte
+from ..domain.unidades import a_centavos, de_centavos
 
 
 class ReporteTablaTexto(Reporte):
@@ -15,4 +17,44 @@ class ReporteTablaTexto(Reporte):
             out.append(
                 f"{r['sku']:<12} {r['nombre']:<30} {r['unidad']:<5} {r['cantidad']:>8.2f} {r['minimo']:>6.2f} {r['estado']:<12}"
             )
-        return "\n".join(out)
\ No newline at end of file
+        return "\n".join(out)
+
+
+# Columnas del kardex en el orden de exportación
+COLUMNAS_KARDEX = ("ts", "tipo", "entrada", "salida", "saldo", "username", "nota")
+
+
+# Dimensiones de la valorización: clave en la fila -> (título, ancho)
+_COLUMNAS_VALORIZACION = (
+    ("tienda_nombre", "Tienda", 20),
+    ("categoria", "Categoría", 16),
+    ("proveedor", "Proveedor", 16),
+)
+
+
+class ReporteValorizacionTexto(Reporte):
+    def render(self, filas: Iterable[Dict[str, Any]]) -> str:
+        filas = list(filas)
+        dimensiones = [(k, t, w) for k, t, w in _COLUMNAS_VALORIZACION if filas and k in filas[0]]
+        out = [" ".join(f"{t:<{w}}" for _, t, w in dimensiones) + f" {'Productos':>9} {'Con stock':>9} {'Valor':>14}"]
+        out.append("-" * 80)
+        total = 0  # en centavos: sumar floats arrastraría error de redondeo
+        for r in filas:
+            celdas = " ".join(f"{(r[k] or '(sin dato)')[:w]:<{w}}" for k, _, w in dimensiones)
+            out.append(f"{celdas} {r['productos']:>9} {r['con_stock'] or 0:>9} {r['valor']:>14,.2f}")
+            total += a_centavos(r["valor"])
+        out.append("-" * 80)
+        out.append(f"{'Total':<{sum(w + 1 for _, _, w in dimensiones) + 19}} {de_centavos(total):>14,.2f}")
+        return "\n".join(out)
+
+
+def escribir_csv(ruta: str, filas: Iterable[Dict[str, Any]], columnas: Sequence[str]) -> int:
+    """Escribe las filas en un CSV a medida que llegan; devuelve cuántas se escribieron"""
+    n = 0
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(columnas), extrasaction="ignore")
+        writer.writeheader()
+        for fila in filas:
+            writer.writerow(fila)
+            n += 1
+    return n
@@ -6,7 +6,7 @@ Aplicación principal del Sistema de Inventario Multitienda
 Ahora usa la arquitectura MVC para mejor organización y mantenibilidad
 """
 
-from inventory_app.infra.db import init_db
+from inventory_app.infra.db import init_db, close_all
 from inventory_app.infra.sqlite_repos import (
     SQLiteRepoUsuarios,
     SQLiteRepoTiendas,
@@ -23,6 +23,9 @@ from inventory_app.domain.models import Usuario
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+# Cada cuánto se revisa si toca otra foto del stock (se toma una por SNAPSHOT_INTERVALO)
+SNAPSHOT_REVISION_MS = 15 * 60 * 1000
+
 
 class MVCApp:
     """Aplicación principal usando arquitectura MVC"""
@@ -37,6 +40,7 @@ class MVCApp:
         self.current_user = None
         
         self._initialize_services()
+        self._programar_snapshots()
         self._build_login()
     
     def _initialize_services(self):
@@ -62,6 +66,15 @@ class MVCApp:
         # Cargar datos de demo
         self._bootstrap_demo_data()
     
+    def _programar_snapshots(self):
+        """Foto diaria del stock para los reportes a una fecha: al iniciar y, mientras la
+        aplicación siga abierta, revisando cada SNAPSHOT_REVISION_MS con el bucle de Tk"""
+        try:
+            self.inventory_service.snapshot_periodico()
+        except Exception as e:
+            print(f"Error al tomar la foto del stock: {e}")
+        self.root.after(SNAPSHOT_REVISION_MS, self._programar_snapshots)
+    
     def _bootstrap_demo_data(self):
         """Carga datos de demostración con nuevo sistema de roles"""
         # Crear demo si no hay tiendas
@@ -358,6 +371,12 @@ class MVCApp:
                 return self.dashboard_controller._switch_view(data)
             elif action == "handle_view_action":
                 return self.dashboard_controller._handle_view_action(data)
+            elif action == "get_kardex":
+                return self.dashboard_controller.reportes_controller.get_kardex(
+                    data.get('sku', ''), data.get('desde'), data.get('hasta')
+                )
+            elif action == "load_more_movimientos":
+                return self.dashboard_controller.movimientos_controller.get_next_page()
             elif action == "get_productos_con_stock":
                 return self.dashboard_controller.movimientos_controller.get_productos_con_stock(data.get('filtro', ''))
             else:
@@ -368,7 +387,11 @@ class MVCApp:
     
     def run(self):
         """Ejecuta la aplicación"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Cerrar explícitamente las conexiones del pool
+            close_all()
 
 
 def main():
@@ -0,0 +1,28 @@
+"""Egresos concurrentes sobre un mismo SKU: ninguna actualización se pierde"""
+import pytest
+
+from inventory_app.infra.concurrencia import base_temporal, egresos_concurrentes
+from inventory_app.infra.memo import registro
+
+HILOS, EGRESOS = 16, 50
+TOTAL = HILOS * EGRESOS
+
+
+@pytest.fixture(scope="module")
+def base():
+    registro.invalidar()
+    with base_temporal() as ruta:
+        yield ruta
+    registro.invalidar()
+
+
+@pytest.mark.parametrize("sku, inicial", [("CONC-SOBRA", TOTAL + 7), ("CONC-MITAD", TOTAL // 2)],
+                         ids=["stock suficiente", "stock para la mitad"])
+def test_egresos_concurrentes_cuadran(base, sku, inicial):
+    r = egresos_concurrentes(inicial, HILOS, EGRESOS, sku)
+    assert r.inesperados == []
+    assert r.aceptados == min(TOTAL, inicial)
+    assert r.rechazados == TOTAL - r.aceptados
+    assert r.saldo == inicial - r.aceptados >= 0
+    assert r.movimientos == r.aceptados
+    assert r.cuadra
@@ -0,0 +1,38 @@
+"""Esquema resultante de las migraciones"""
+import sqlite3
+
+from inventory_app.infra.migrations import MIGRACIONES, _aplicar, migrar
+
+
+def aplicar_hasta(c, version):
+    c.commit()
+    for m in MIGRACIONES:
+        if c.execute("PRAGMA user_version").fetchone()[0] < m.version <= version:
+            _aplicar(c, m)
+
+
+def test_alertas_con_marcas_en_milisegundos():
+    c = sqlite3.connect(":memory:")
+    migrar(c)
+    c.execute("INSERT INTO tiendas(nombre) VALUES ('Centro')")
+    c.execute("INSERT INTO productos(sku, nombre, unidad, precio_unit, tienda_id) VALUES ('A-1', 'Arroz', 'und', 100, 1)")
+    c.execute("INSERT INTO stock(tienda_id, producto_id, cantidad, minimo) VALUES (1, 1, 1000, 5000)")
+    assert c.execute("SELECT estado, typeof(desde) FROM alertas_stock").fetchall() == [("BAJO MINIMO", "integer")]
+    assert {r[0] for r in c.execute("SELECT typeof(ts) FROM alertas_stock_transiciones")} == {"integer"}
+
+
+def test_resumen_diario_al_migrar_con_ts_en_texto():
+    c = sqlite3.connect(":memory:")
+    aplicar_hasta(c, 5)
+    c.execute("INSERT INTO movimientos(tienda_id, producto_id, tipo, cantidad, usuario_id, ts) "
+              "VALUES (1, 1, 'INGRESO', 5, 1, '2024-03-05 10:00:00')")
+    aplicar_hasta(c, 10)  # el resumen nace con ts todavía en texto
+    c.execute("INSERT INTO movimientos(tienda_id, producto_id, tipo, cantidad, usuario_id, ts) "
+              "VALUES (1, 1, 'SALIDA', 2, 1, '2024-03-06 09:30:00')")
+    assert c.execute("SELECT fecha, ingreso_movs, salida_movs FROM movimientos_diarios ORDER BY fecha").fetchall() == [
+        ("2024-03-05", 1, 0), ("2024-03-06", 0, 1)]
+    migrar(c)
+    c.execute("INSERT INTO movimientos(tienda_id, producto_id, tipo, cantidad, usuario_id, ts) "
+              "VALUES (1, 1, 'SALIDA', 1000, 1, 1709805600000)")  # 2024-03-07 10:00 UTC
+    assert c.execute("SELECT fecha, ingreso_total, salida_total FROM movimientos_diarios ORDER BY fecha").fetchall() == [
+        ("2024-03-05", 5000, 0), ("2024-03-06", 0, 2000), ("2024-03-07", 0, 1000)]
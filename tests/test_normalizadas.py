@@ -0,0 +1,14 @@
+"""Las columnas *_norm no dependen de funciones registradas en la conexión"""
+import sqlite3
+
+from inventory_app.infra.migrations import migrar
+
+
+def test_escritura_desde_otra_conexion():
+    c = sqlite3.connect(":memory:")
+    migrar(c)
+    c.execute("INSERT INTO tiendas(nombre) VALUES ('Centro')")
+    c.execute("INSERT INTO empleados(usuario_id, nombres, apellidos, dni, jornada, tienda_id) "
+              "VALUES (1, 'Ana', 'Ruiz', '1', 'COMPLETA', 1)")
+    assert c.execute("SELECT nombre_norm FROM tiendas").fetchall() == [("centro",)]
+    assert c.execute("SELECT nombres_norm FROM empleados").fetchone() == ("ana",)
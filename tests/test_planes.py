@@ -0,0 +1,35 @@
+"""Las consultas críticas usan sus índices (ver inventory_app/infra/planes.py)"""
+import pytest
+
+from inventory_app.infra.planes import (
+    CONSULTAS_CRITICAS,
+    base_de_planes,
+    plan,
+    problemas_de_consulta,
+    problemas_de_plan,
+)
+
+
+@pytest.fixture(scope="module")
+def conexion():
+    c = base_de_planes()
+    yield c
+    c.close()
+
+
+@pytest.mark.parametrize("consulta", CONSULTAS_CRITICAS, ids=lambda consulta: consulta.nombre)
+def test_consulta_critica_usa_indices(conexion, consulta):
+    problemas = problemas_de_consulta(conexion, consulta)
+    if problemas is None:
+        pytest.skip(f"la base no tiene {consulta.requiere}")
+    assert problemas == []
+
+
+def test_detecta_recorrido_completo(conexion):
+    detalles = plan(conexion, "SELECT * FROM productos WHERE descripcion = ?", ("x",))
+    assert any("recorrido completo" in p for p in problemas_de_plan(detalles))
+
+
+def test_detecta_indice_faltante(conexion):
+    detalles = plan(conexion, "SELECT * FROM productos WHERE sku = ?", ("X",))
+    assert problemas_de_plan(detalles, ("idx_inexistente",)) == ["no usa idx_inexistente"]